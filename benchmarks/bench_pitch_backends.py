@@ -0,0 +1,89 @@
+"""Compares the speed of the pitch backends, and how well they agree with parselmouth.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_pitch_backends --seconds 10 60 --noise 0 0.02 --silence 0 5
+
+With `--workers 4`, the default backend also runs on chunks in 4 processes, see `ChunkedBackend`.
+"""
+
+import argparse
+from itertools import product
+
+import numpy as np
+
+from benchmarks.bench_segmentation import best_of
+from src.my_types import floatlist
+from src.note import turn_into_notes_strings
+from src.pitch_tracking import DEFAULT_PITCH_BACKEND, PITCH_BACKENDS, ChunkedBackend
+from src.wave_generation import marginify_wave
+from src.whistle_analysis import analyse_recording_to_notes
+from src.words_functions import get_sentence_wave, get_words_from_sentence
+
+SAMPLE_RATE = 44100
+SENTENCE = "mi wile moku .kili pi jan pona la mi pilin pona"
+
+
+def synthesised_recording(
+    seconds: float, noise: float, silence: float = 0, seed: int = 0
+) -> floatlist:
+    """Repeats a synthesised sentence until it lasts `seconds`, and adds white noise.
+
+    The sentences are preceded and followed by `silence` seconds of silence (or noise).
+    """
+    sentence_wave = marginify_wave(
+        get_sentence_wave(get_words_from_sentence(SENTENCE), speed=10)
+    )
+    repeats = int(np.ceil(seconds * SAMPLE_RATE / len(sentence_wave)))
+    recording = np.tile(sentence_wave, repeats)[: int(seconds * SAMPLE_RATE)]
+    lead_in = np.zeros(int(silence * SAMPLE_RATE))
+    recording = np.concatenate([lead_in, recording, lead_in])
+    rng = np.random.default_rng(seed)
+    return recording + rng.normal(0, noise, len(recording))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--seconds", type=float, nargs="+", default=[10, 60])
+    parser.add_argument("--noise", type=float, nargs="+", default=[0, 0.02])
+    parser.add_argument("--silence", type=float, nargs="+", default=[0])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    backends = dict(PITCH_BACKENDS)
+    if args.workers > 1:
+        chunked = ChunkedBackend(DEFAULT_PITCH_BACKEND, args.workers)
+        backends[chunked.name] = chunked
+
+    reference = PITCH_BACKENDS["parselmouth"]
+    print(
+        f"{'seconds':>8} {'noise':>6} {'silence':>8} {'backend':>28} {'time (ms)':>10} "
+        f"{'x realtime':>11} {'voicing':>8} {'cents p50':>10} {'cents p95':>10} {'notes':>6}"
+    )
+    for seconds, noise, silence in product(args.seconds, args.noise, args.silence):
+        recording = synthesised_recording(seconds, noise, silence)
+        duration_recording = len(recording) / SAMPLE_RATE
+        reference_freqs, reference_voiced = reference.track(recording, SAMPLE_RATE)
+        reference_notes = turn_into_notes_strings(
+            analyse_recording_to_notes(recording, SAMPLE_RATE, backend=reference)[0]
+        )
+        for name, backend in backends.items():
+            duration, (freqs, voiced) = best_of(
+                lambda: backend.track(recording, SAMPLE_RATE), args.repeats
+            )
+            both = voiced & reference_voiced
+            cents = np.abs(1200 * np.log2(freqs[both] / reference_freqs[both]))
+            notes = turn_into_notes_strings(
+                analyse_recording_to_notes(recording, SAMPLE_RATE, backend=backend)[0]
+            )
+            print(
+                f"{seconds:>8g} {noise:>6g} {silence:>8g} {name:>28} "
+                f"{duration * 1000:>10.1f} {duration_recording / duration:>10.0f}x "
+                f"{np.mean(voiced == reference_voiced):>8.1%} "
+                f"{np.median(cents):>10.2f} {np.percentile(cents, 95):>10.2f} "
+                f"{'same' if notes == reference_notes else 'diff':>6}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""Compares the NumPy segmentation and pitch post-processing against the original loops.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_segmentation --minutes 1 5 20
+"""
+
+import argparse
+from math import log
+import time
+from typing import Any, Callable
+
+import numpy as np
+
+from src.augmentation import Augmentation
+from src.constants import FREQ_ROOT
+from src.my_types import floatlist, segbounds
+from src.segment_stats import SegmentStats
+from src.whistle_analysis import (
+    determine_float_note_and_augmentations_of_segment,
+    determine_float_notes_and_augmentations_of_segments,
+    estimate_root,
+    filter_segment_bounds_below_min_length,
+    find_segment_bounds_parselmouth,
+    freqs_to_float_pitches,
+    merge_segment_bounds_with_distance,
+)
+
+FRAMES_PER_SEC = 400
+
+
+# The original pure Python implementations, kept here for reference
+
+
+def find_segment_bounds_loop(freqs: floatlist) -> list[tuple[int, int]]:
+    segment_bounds: list[tuple[int, int]] = []
+    active_lower_bound: int = -1
+    for i in range(len(freqs)):
+        if freqs[i] != 0 and active_lower_bound == -1:
+            active_lower_bound = i
+        elif freqs[i] == 0 and active_lower_bound != -1:
+            segment_bounds.append((active_lower_bound, i))
+            active_lower_bound = -1
+    if active_lower_bound != -1:
+        segment_bounds.append((active_lower_bound, len(freqs)))
+    return segment_bounds
+
+
+def merge_segment_bounds_loop(
+    segment_bounds: list[tuple[int, int]], distance: float = 3
+) -> list[tuple[int, int]]:
+    merged: list[tuple[int, int]] = []
+    i = 0
+    while i < len(segment_bounds):
+        j = i
+        while (
+            j < len(segment_bounds) - 1
+            and segment_bounds[j + 1][0] - segment_bounds[j][1] <= distance
+        ):
+            j += 1
+        merged.append((segment_bounds[i][0], segment_bounds[j][1]))
+        i = j + 1
+    return merged
+
+
+def filter_segment_bounds_loop(
+    segment_bounds: list[tuple[int, int]], min_length: float = 2
+) -> list[tuple[int, int]]:
+    return [
+        (lower_bound, upper_bound)
+        for lower_bound, upper_bound in segment_bounds
+        if upper_bound - lower_bound >= min_length
+    ]
+
+
+def freqs_to_float_pitches_loop(
+    freqs: floatlist, freq_root: float = FREQ_ROOT
+) -> floatlist:
+    freqs_normalised_to_root: floatlist = freqs / freq_root
+    pitches: list[float] = [
+        log(freq, 2) * 12 if freq > 0 else np.nan for freq in freqs_normalised_to_root
+    ]
+    return np.array(pitches)
+
+
+def regular_length_loop(lengths: Any) -> int:
+    if len(lengths) == 0:
+        return 0
+    if len(lengths) == 1:
+        return int(lengths[0])
+    lengths_sorted = np.sort(lengths)
+    return int(np.median(lengths_sorted[: len(lengths_sorted) * 2 // 3]))
+
+
+def thresholds_loop(
+    all_lengths: Any, short_factor: float, long_factor: float, pauses: bool
+) -> tuple[float, float]:
+    regular_length = regular_length_loop(all_lengths)
+    long_threshold_guess = regular_length * long_factor
+    relevant_lengths = [
+        length
+        for length in all_lengths
+        if length >= regular_length and length < long_threshold_guess
+    ]
+    higher_lengths = [length for length in all_lengths if length >= long_threshold_guess]
+    if higher_lengths:
+        relevant_lengths.append(min(higher_lengths))
+    sorted_relevant_lengths = list(sorted(relevant_lengths))
+    if len(sorted_relevant_lengths) == 0:
+        return (0, 0)
+    if len(sorted_relevant_lengths) == 1:
+        return (sorted_relevant_lengths[0] - 1, sorted_relevant_lengths[0] + 1)
+    if pauses and len(all_lengths) == 2 and all_lengths[1] < 2 * all_lengths[0]:
+        return (all_lengths[0] - 1, all_lengths[1] + 1)
+    index_of_last_regular = np.argmax(np.diff(sorted_relevant_lengths))
+    if sorted_relevant_lengths[-1] < long_threshold_guess:
+        return (regular_length * short_factor, long_threshold_guess)
+    return (
+        regular_length * short_factor,
+        (
+            sorted_relevant_lengths[index_of_last_regular]
+            + sorted_relevant_lengths[index_of_last_regular + 1]
+        )
+        / 2,
+    )
+
+
+def statistics_loop(segment_bounds: segbounds) -> tuple[Any, ...]:
+    """What `analyse_recording_to_notes` used to ask for, each computing the lengths again."""
+    note_lengths = segment_bounds[:, 1] - segment_bounds[:, 0]
+    pause_lengths = segment_bounds[1:, 0] - segment_bounds[:-1, 1]
+    return (
+        regular_length_loop(note_lengths),
+        thresholds_loop(note_lengths, 0.3, 2, False),
+        thresholds_loop(pause_lengths, 0.4, 1.7, True),
+    )
+
+
+def statistics_numpy(segment_bounds: segbounds) -> tuple[Any, ...]:
+    stats = SegmentStats(segment_bounds)
+    return (stats.regular_note_length, stats.note_thresholds, stats.pause_thresholds)
+
+
+def augmentations_loop(
+    float_pitches: floatlist, segment_bounds: segbounds
+) -> list[tuple[float, Augmentation]]:
+    stats = SegmentStats(segment_bounds)
+    return [
+        determine_float_note_and_augmentations_of_segment(
+            float_pitches[lower_bound:upper_bound],
+            stats.regular_note_length,
+            stats.note_thresholds[1],
+        )
+        for lower_bound, upper_bound in segment_bounds
+    ]
+
+
+def augmentations_numpy_arrays(
+    float_pitches: floatlist, segment_bounds: segbounds
+) -> tuple[floatlist, Any]:
+    stats = SegmentStats(segment_bounds)
+    return determine_float_notes_and_augmentations_of_segments(
+        float_pitches, segment_bounds, stats.regular_note_length, stats.note_thresholds[1]
+    )
+
+
+def augmentations_numpy(
+    float_pitches: floatlist, segment_bounds: segbounds
+) -> list[tuple[float, Augmentation]]:
+    start_pitches, augmentations = augmentations_numpy_arrays(
+        float_pitches, segment_bounds
+    )
+    return list(
+        zip(start_pitches.tolist(), map(Augmentation, augmentations.tolist()))
+    )
+
+
+def root_loop(float_notes: list[float]) -> float:
+    """How `normalise_float_notes` used to find the root, growing the notes close to the first."""
+    first_notes: list[float] = [float_notes[0]]
+    for float_note in float_notes[1:]:
+        if abs(float_note - np.mean(first_notes)) < 0.75:
+            first_notes.append(float_note)
+    return float(np.mean(first_notes))
+
+
+def fake_pitch_track(minutes: float, seed: int = 0) -> floatlist:
+    """Creates something that looks like the output of the pitch analysis of a long whistle.
+
+    Notes of random pitch and length are separated by pauses, and every now and then
+    a note has a dropout of a few frames, which the merging step has to repair.
+    """
+    rng = np.random.default_rng(seed)
+    nr_of_frames = int(minutes * 60 * FRAMES_PER_SEC)
+    freqs = np.zeros(nr_of_frames)
+    i = 0
+    while i < nr_of_frames:
+        note_length = int(rng.choice([80, 80, 80, 160, 240]) * rng.uniform(0.8, 1.2))
+        pitch = rng.integers(-5, 10)
+        freqs[i : i + note_length] = FREQ_ROOT * 2 ** (
+            (pitch + rng.normal(0, 0.1, len(freqs[i : i + note_length]))) / 12
+        )
+        if rng.random() < 0.2:
+            dropout = int(rng.integers(i, i + note_length))
+            freqs[dropout : dropout + int(rng.integers(1, 4))] = 0
+        i += note_length + int(rng.choice([12, 12, 12, 80]) * rng.uniform(0.8, 1.2))
+    return freqs
+
+
+def best_of(f: Callable[[], Any], repeats: int) -> tuple[float, Any]:
+    times: list[float] = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = f()
+        times.append(time.perf_counter() - start)
+    return (min(times), result)
+
+
+def run_loops(freqs: floatlist) -> tuple[list[tuple[int, int]], floatlist]:
+    raw = find_segment_bounds_loop(freqs)
+    merged = merge_segment_bounds_loop(raw, 5)
+    filtered = filter_segment_bounds_loop(merged, 20)
+    return (filtered, freqs_to_float_pitches_loop(freqs))
+
+
+def run_numpy(freqs: floatlist) -> tuple[Any, floatlist]:
+    raw = find_segment_bounds_parselmouth(freqs)
+    merged = merge_segment_bounds_with_distance(raw, 5)
+    filtered = filter_segment_bounds_below_min_length(merged, 20)
+    return (filtered, freqs_to_float_pitches(freqs))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--minutes", type=float, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'minutes':>8} {'frames':>9} {'stage':>16} {'loops (ms)':>11} {'numpy (ms)':>11} {'speedup':>8}")
+    for minutes in args.minutes:
+        freqs = fake_pitch_track(minutes)
+        raw_loop = find_segment_bounds_loop(freqs)
+        raw_numpy = find_segment_bounds_parselmouth(freqs)
+        merged_loop = merge_segment_bounds_loop(raw_loop, 5)
+        merged_numpy = merge_segment_bounds_with_distance(raw_numpy, 5)
+        filtered_numpy = filter_segment_bounds_below_min_length(merged_numpy, 20)
+        float_pitches = freqs_to_float_pitches(freqs)
+        float_notes, _ = augmentations_numpy_arrays(float_pitches, filtered_numpy)
+        note_lengths = filtered_numpy[:, 1] - filtered_numpy[:, 0]
+
+        stages: list[tuple[str, Callable[[], Any], Callable[[], Any]]] = [
+            ("segmentation", lambda: find_segment_bounds_loop(freqs), lambda: find_segment_bounds_parselmouth(freqs)),
+            ("merging", lambda: merge_segment_bounds_loop(raw_loop, 5), lambda: merge_segment_bounds_with_distance(raw_numpy, 5)),
+            ("filtering", lambda: filter_segment_bounds_loop(merged_loop, 20), lambda: filter_segment_bounds_below_min_length(merged_numpy, 20)),
+            ("statistics", lambda: statistics_loop(merged_numpy), lambda: statistics_numpy(merged_numpy)),
+            ("augmentations", lambda: augmentations_loop(float_pitches, filtered_numpy), lambda: augmentations_numpy(float_pitches, filtered_numpy)),
+            ("root", lambda: root_loop(float_notes.tolist()), lambda: estimate_root(float_notes, note_lengths)),
+            ("hz to semitones", lambda: freqs_to_float_pitches_loop(freqs), lambda: freqs_to_float_pitches(freqs)),
+            ("all", lambda: run_loops(freqs), lambda: run_numpy(freqs)),
+        ]
+        for name, loops, vectorised in stages:
+            time_loops, result_loops = best_of(loops, args.repeats)
+            time_numpy, result_numpy = best_of(vectorised, args.repeats)
+            if name in ("statistics", "augmentations"):
+                assert result_loops == result_numpy
+            if name == "root":
+                assert abs(result_loops - result_numpy) < 0.1
+            if name == "all":
+                assert result_loops[0] == [tuple(b) for b in result_numpy[0].tolist()]
+                np.testing.assert_allclose(result_loops[1], result_numpy[1])
+            print(
+                f"{minutes:>8g} {len(freqs):>9} {name:>16} {time_loops * 1000:>11.2f} "
+                f"{time_numpy * 1000:>11.2f} {time_loops / time_numpy:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""Measures the speed and accuracy of the recognition on recordings made by our own synthesiser.
+
+Run from the root of the repository:
+
+    python -m benchmarks.golden_corpus --speeds 5 10 15 --noise 0.01 --jitter 0.1 --drift 0.2
+
+The corpus consists of the example sentences in `resources/examples.txt` and the words in
+the lexicon, a sample of each by default. Every entry is synthesised at every combination of
+speed, offset and octave, with noise, random detuning and pauses, and a tempo that drifts
+over the sentence. The recordings are analysed with `analyse_recording_to_notes`, and the
+words are matched with `interpret_notes`, with `--decode-boundaries` after reconsidering
+the word boundaries with `decode_word_boundaries`. Reported are:
+
+- throughput, as seconds of audio per CPU second,
+- percentiles of the time per stage of the analysis (see `src.tracing`),
+- word accuracy, as 1 minus the edit distance between the words and the words found,
+  relative to the nr of words.
+
+With `--save-baseline`, the results are stored in `golden_corpus_baseline.json` next to
+this file, and later runs with the same settings are compared against it.
+"""
+
+import argparse
+from dataclasses import asdict, dataclass
+from itertools import product
+import json
+import os
+import time
+
+import numpy as np
+
+from src.file_management import load_examples_from_file
+from src.lexicon import LEXICON
+from src.my_types import floatlist
+from src.tracing import span, tracing
+from src.wave_generation import add_pause, marginify_wave
+from src.whistle_analysis import (
+    analyse_recording_to_notes,
+    get_lexicon_matrices,
+    get_neighbourhood_table,
+    get_notes_trie,
+    interpret_notes,
+)
+from src.word import InvalidWordException, Word
+from src.words_functions import get_words_from_sentence
+
+SAMPLE_RATE = 44100
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "golden_corpus_baseline.json")
+
+# how much worse than the baseline counts as a regression
+MAX_ACCURACY_DROP = 0.005
+MAX_THROUGHPUT_DROP = 0.1
+
+
+@dataclass
+class Settings:
+    speeds: list[float]
+    offsets: list[float]
+    octaves: list[int]
+    noise: float
+    jitter: float
+    drift: float
+    examples: int
+    words: int
+    seed: int
+    decode_boundaries: bool = False
+
+
+def load_corpus(nr_of_examples: int, nr_of_words: int, seed: int) -> list[list[Word]]:
+    """Picks example sentences and words from the lexicon, `-1` meaning all of them."""
+    rng = np.random.default_rng(seed)
+    sentences: list[list[Word]] = []
+    for tm, _ in load_examples_from_file():
+        try:
+            sentences.append(get_words_from_sentence(tm))
+        except InvalidWordException:
+            continue
+    words = [[word] for word in LEXICON.words if word.nr_of_notes > 0]
+
+    corpus: list[list[Word]] = []
+    for entries, n in [(sentences, nr_of_examples), (words, nr_of_words)]:
+        if 0 <= n < len(entries):
+            indices = sorted(rng.choice(len(entries), n, replace=False))
+            entries = [entries[i] for i in indices]
+        corpus += entries
+    return corpus
+
+
+def render(
+    sentence: list[Word],
+    speed: float,
+    offset: float,
+    noise: float,
+    jitter: float,
+    drift: float,
+    rng: np.random.Generator,
+) -> floatlist:
+    """Synthesises a sentence like `get_sentence_wave`, but less perfect.
+
+    Parameters
+    ----------
+    sentence : list[Word]
+        The words to synthesise.
+    speed : float
+        The speed halfway the sentence.
+    offset : float
+        The nr of semitones by which to transpose.
+    noise : float
+        The standard deviation of the white noise, relative to the loudest sample.
+    jitter : float
+        The standard deviation of the detuning of every word, in semitones.
+        The pause after every word is longer or shorter by up to the same fraction.
+    drift : float
+        How much faster the end of the sentence is than the start, relative to `speed`.
+
+    Returns
+    -------
+    floatlist
+        The sound wave.
+    """
+    waves_per_word: list[floatlist] = []
+    tempos = speed * (1 + drift * np.linspace(-0.5, 0.5, len(sentence)))
+    for word, tempo in zip(sentence, tempos):
+        if word.get_notes_string() == "+":
+            offset += 2
+            continue
+        if word.get_notes_string() == "-":
+            offset -= 2
+            continue
+        wave = word.wave(tempo, offset + rng.normal(0, jitter), SAMPLE_RATE)
+        if wave is None:
+            continue
+        pause = 1 + rng.uniform(-jitter, jitter)
+        waves_per_word.append(add_pause(wave, pause, tempo, SAMPLE_RATE))
+
+    recording = marginify_wave(np.concatenate(waves_per_word))
+    peak = np.max(np.abs(recording))
+    return recording + rng.normal(0, noise * peak, len(recording))
+
+
+def spoken_words(sentence: list[Word]) -> list[str]:
+    """The words we expect to find, `unpi` being indistinguishable from `la`."""
+    return [
+        "la" if str(word) == "unpi" else str(word)
+        for word in sentence
+        if (word.nr_of_notes > 0 and word.name != "rest")
+        or word.get_notes_string() in ("+", "-")
+    ]
+
+
+def edit_distance(a: list[str], b: list[str]) -> int:
+    distances = np.arange(len(b) + 1)
+    for i in range(1, len(a) + 1):
+        previous = distances.copy()
+        distances[0] = i
+        for j in range(1, len(b) + 1):
+            distances[j] = min(
+                previous[j] + 1,
+                distances[j - 1] + 1,
+                previous[j - 1] + (a[i - 1] != b[j - 1]),
+            )
+    return int(distances[-1])
+
+
+def warm_up(sentence: list[Word], settings: Settings) -> None:
+    """Does what only the first analysis of a process does, so it isn't counted in the results.
+
+    That's loading the neighbourhood table and building the lexicon structures, which takes
+    longer without a table, and filling the caches that later analyses find filled.
+    """
+    get_notes_trie()
+    get_neighbourhood_table()
+    get_lexicon_matrices()
+    # with a generator of its own, so the corpus is rendered the same as without warming up
+    rng = np.random.default_rng(settings.seed)
+    recording = render(
+        sentence,
+        settings.speeds[0],
+        0,
+        settings.noise,
+        settings.jitter,
+        settings.drift,
+        rng,
+    )
+    notes, *_ = analyse_recording_to_notes(
+        recording, SAMPLE_RATE, decode_boundaries=settings.decode_boundaries
+    )
+    interpret_notes(notes)
+
+
+def run(settings: Settings) -> dict:
+    """Analyses the whole corpus with the given settings, and summarises the results."""
+    rng = np.random.default_rng(settings.seed)
+    corpus = load_corpus(settings.examples, settings.words, settings.seed)
+    warm_up(corpus[0], settings)
+
+    audio_seconds = 0.0
+    cpu_seconds = 0.0
+    nr_of_words = 0
+    nr_of_errors = 0
+    nr_of_failures = 0
+    stage_times: dict[str, list[float]] = {}
+    for sentence, speed, offset, octave in product(
+        corpus, settings.speeds, settings.offsets, settings.octaves
+    ):
+        recording = render(
+            sentence,
+            speed,
+            offset + 12 * octave,
+            settings.noise,
+            settings.jitter,
+            settings.drift,
+            rng,
+        )
+        expected = spoken_words(sentence)
+
+        cpu_start = time.process_time()
+        with tracing("golden corpus") as trace:
+            try:
+                notes, *_ = analyse_recording_to_notes(
+                    recording,
+                    SAMPLE_RATE,
+                    decode_boundaries=settings.decode_boundaries,
+                )
+                with span("interpretation", words=len(expected)):
+                    found, _ = interpret_notes(notes)
+                found_words = [
+                    "???" if word is None else str(word) for word in found
+                ]
+            except (AssertionError, ValueError):
+                # nothing sensible was found in the recording
+                nr_of_failures += 1
+                found_words = []
+        cpu_seconds += time.process_time() - cpu_start
+        audio_seconds += len(recording) / SAMPLE_RATE
+
+        nr_of_words += len(expected)
+        nr_of_errors += min(len(expected), edit_distance(expected, found_words))
+        for stage, seconds in trace.totals().items():
+            stage_times.setdefault(stage, []).append(seconds)
+
+    return {
+        "settings": asdict(settings),
+        "recordings": len(corpus)
+        * len(settings.speeds)
+        * len(settings.offsets)
+        * len(settings.octaves),
+        "failures": nr_of_failures,
+        "audio_seconds": audio_seconds,
+        "throughput": audio_seconds / max(cpu_seconds, 1e-9),
+        "word_accuracy": 1 - nr_of_errors / max(nr_of_words, 1),
+        "stage_ms": {
+            stage: {
+                f"p{p}": float(np.percentile(times, p) * 1000) for p in (50, 90, 99)
+            }
+            for stage, times in stage_times.items()
+        },
+    }
+
+
+def report(results: dict, baseline: dict | None) -> bool:
+    """Prints the results, next to the baseline, and tells whether they're as good."""
+    print(
+        f"{results['recordings']} recordings, {results['audio_seconds']:.0f} s of audio, "
+        f"{results['failures']} without any notes"
+    )
+    as_good = True
+    for key, max_drop in [
+        ("throughput", MAX_THROUGHPUT_DROP),
+        ("word_accuracy", MAX_ACCURACY_DROP),
+    ]:
+        line = f"{key:>16} {results[key]:>10.3f}"
+        if baseline is not None:
+            if key == "throughput":
+                worse = results[key] < baseline[key] * (1 - max_drop)
+            else:
+                worse = results[key] < baseline[key] - max_drop
+            as_good &= not worse
+            line += f" (baseline {baseline[key]:.3f}{', WORSE' if worse else ''})"
+        print(line)
+
+    print(f"{'stage':>16} {'p50 (ms)':>10} {'p90 (ms)':>10} {'p99 (ms)':>10}")
+    for stage, percentiles in results["stage_ms"].items():
+        print(
+            f"{stage:>16} {percentiles['p50']:>10.2f} {percentiles['p90']:>10.2f} "
+            f"{percentiles['p99']:>10.2f}"
+        )
+    return as_good
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--speeds", type=float, nargs="+", default=[5, 10, 15])
+    parser.add_argument("--offsets", type=float, nargs="+", default=[0])
+    parser.add_argument("--octaves", type=int, nargs="+", default=[0])
+    parser.add_argument("--noise", type=float, default=0.01)
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--drift", type=float, default=0.2)
+    parser.add_argument("--examples", type=int, default=40, help="-1 for all")
+    parser.add_argument("--words", type=int, default=40, help="-1 for all")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--decode-boundaries", action="store_true")
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    settings = Settings(
+        args.speeds,
+        args.offsets,
+        args.octaves,
+        args.noise,
+        args.jitter,
+        args.drift,
+        args.examples,
+        args.words,
+        args.seed,
+        args.decode_boundaries,
+    )
+    results = run(settings)
+
+    baselines: list[dict] = []
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+            baselines = json.load(f)
+    baseline = next(
+        (b for b in baselines if b["settings"] == results["settings"]), None
+    )
+    as_good = report(results, baseline)
+
+    if args.save_baseline:
+        baselines = [b for b in baselines if b["settings"] != results["settings"]]
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump(baselines + [results], f, indent=2)
+            f.write("\n")
+    elif not as_good:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+from collections import OrderedDict
+import hashlib
+import os
+import pickle
+import threading
+from typing import Any
+
+from src.constants import (
+    ANALYSIS_CACHE_MAX_BYTES_ON_DISK,
+    ANALYSIS_CACHE_MAX_ENTRIES,
+    ANALYSIS_CACHE_ON_DISK,
+)
+from src.file_management import ANALYSIS_CACHE_FOLDER
+
+
+def make_analysis_key(
+    recording_bytes: bytes,
+    f_min: float,
+    f_max: float,
+    octave: int,
+    reference_whistle: str,
+    pitch_band: tuple[float, float] | None = None,
+) -> str:
+    """Creates a key identifying an analysis, based on the recording and the analysis parameters.
+
+    Parameters
+    ----------
+    recording_bytes : bytes
+        The raw bytes of the recording, as provided by the recorder.
+    f_min : float
+        The lowest frequency to detect in the recording.
+    f_max : float
+        The highest frequency to detect in the recording.
+    octave : int
+        The nr of octaves by which to transpose the corrected version.
+    reference_whistle : str
+        The sentence the user tried to whistle.
+    pitch_band : tuple[float, float] | None, optional
+        The band known from earlier attempts, by default `None`.
+
+    Returns
+    -------
+    str
+        A hexadecimal hash, equal for equal inputs.
+    """
+    hasher = hashlib.sha256(recording_bytes)
+    hasher.update(repr((float(f_min), float(f_max), int(octave))).encode("utf-8"))
+    if pitch_band is not None:
+        hasher.update(repr(tuple(float(f) for f in pitch_band)).encode("utf-8"))
+    hasher.update(reference_whistle.encode("utf-8"))
+    return hasher.hexdigest()
+
+
+class AnalysisCache:
+    """Stores the results of analyses, so they don't have to be redone on every Streamlit rerun.
+
+    Results are kept in memory, up to `max_entries` of them, evicting the least recently used.
+    Optionally, results are also pickled to `folder`, which is kept below `max_bytes_on_disk`
+    by removing the least recently used files.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = ANALYSIS_CACHE_MAX_ENTRIES,
+        folder: str | None = None,
+        max_bytes_on_disk: int = ANALYSIS_CACHE_MAX_BYTES_ON_DISK,
+    ):
+        self.max_entries = max_entries
+        self.folder = folder
+        self.max_bytes_on_disk = max_bytes_on_disk
+        self._memory: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        if folder is not None and not os.path.exists(folder):
+            os.makedirs(folder)
+
+    def get(self, key: str) -> Any | None:
+        """Looks up a result, first in memory, then on disk.
+
+        Parameters
+        ----------
+        key : str
+            Key of the analysis, see `make_analysis_key`.
+
+        Returns
+        -------
+        Any | None
+            The stored result, or `None` if there isn't one.
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        value = self._load_from_disk(key)
+        if value is not None:
+            self._store_in_memory(key, value)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Stores a result in memory, and on disk if a folder was provided.
+
+        Parameters
+        ----------
+        key : str
+            Key of the analysis, see `make_analysis_key`.
+        value : Any
+            The result to store, which has to be picklable if a folder was provided.
+        """
+        self._store_in_memory(key, value)
+        if self.folder is not None:
+            self._save_to_disk(key, value)
+
+    def clear(self) -> None:
+        """Removes all results, from memory and from disk."""
+        with self._lock:
+            self._memory.clear()
+        for file_path in self._files_on_disk():
+            os.remove(file_path)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            if key in self._memory:
+                return True
+        return self.folder is not None and os.path.exists(self._path(key))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._memory)
+
+    def _store_in_memory(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        assert self.folder is not None, "no folder to store analyses in"
+        return os.path.join(self.folder, f"{key}.pkl")
+
+    def _files_on_disk(self) -> list[str]:
+        if self.folder is None or not os.path.exists(self.folder):
+            return []
+        return [
+            os.path.join(self.folder, filename)
+            for filename in os.listdir(self.folder)
+            if filename.endswith(".pkl")
+        ]
+
+    def _load_from_disk(self, key: str) -> Any | None:
+        if self.folder is None:
+            return None
+        file_path = self._path(key)
+        try:
+            with open(file_path, "rb") as f:
+                value = pickle.load(f)
+            # mark as recently used, for eviction
+            os.utime(file_path)
+            return value
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _save_to_disk(self, key: str, value: Any) -> None:
+        file_path = self._path(key)
+        # write to a temporary file first, so other sessions never read half a file
+        temporary_path = f"{file_path}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, file_path)
+        self._evict_from_disk()
+
+    def _evict_from_disk(self) -> None:
+        files: list[tuple[float, int, str]] = []
+        for file_path in self._files_on_disk():
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, file_path))
+
+        total_size = sum(size for _, size, _ in files)
+        for _, size, file_path in sorted(files):
+            if total_size <= self.max_bytes_on_disk:
+                break
+            try:
+                os.remove(file_path)
+            except OSError:
+                pass
+            total_size -= size
+
+
+ANALYSIS_CACHE = AnalysisCache(
+    folder=ANALYSIS_CACHE_FOLDER if ANALYSIS_CACHE_ON_DISK else None
+)
@@ -1,9 +1,66 @@
-from enum import Enum
+from enum import IntFlag
 
 
-class Augmentation(str, Enum):
-    LONG = "_"
-    TRILL_UP = "^"
-    TRILL_DOWN = "*"
-    SLIDE_UP = "/"
-    SLIDE_DOWN = "\\"
+class Augmentation(IntFlag):
+    """The augmentations of a note, which can be combined like `LONG | TRILL_UP`.
+
+    A combination of augmentations fits in a single byte, and comparing two of them
+    is a bitwise operation. No augmentations at all is `Augmentation(0)`.
+    """
+
+    LONG = 1
+    TRILL_UP = 2
+    TRILL_DOWN = 4
+    SLIDE_UP = 8
+    SLIDE_DOWN = 16
+
+    @property
+    def symbol(self) -> str:
+        """The characters representing these augmentations in a notes string."""
+        return AUGMENTATION_SYMBOLS[self]
+
+    @classmethod
+    def from_symbols(cls, symbols: str) -> "Augmentation":
+        """Finds the augmentations represented by characters in a notes string."""
+        augmentations = cls(0)
+        for augmentation in cls:
+            if SINGLE_SYMBOLS[augmentation] in symbols:
+                augmentations |= augmentation
+        return augmentations
+
+
+SINGLE_SYMBOLS: dict[Augmentation, str] = {
+    Augmentation.LONG: "_",
+    Augmentation.TRILL_UP: "^",
+    Augmentation.TRILL_DOWN: "*",
+    Augmentation.SLIDE_UP: "/",
+    Augmentation.SLIDE_DOWN: "\\",
+}
+
+# the characters for every combination of augmentations, indexed by its value
+AUGMENTATION_SYMBOLS: list[str] = [
+    "".join(symbol for a, symbol in SINGLE_SYMBOLS.items() if mask & a)
+    for mask in range(1 << len(SINGLE_SYMBOLS))
+]
+
+
+class Modifier(IntFlag):
+    """The modifications of a word, which can be combined like `PLURAL | QUESTION`."""
+
+    PLURAL = 1
+    PAST_TENSE = 2
+    COMPARATIVE = 4
+    SUPERLATIVE = 8
+    QUESTION = 16
+    FINITE_VERB = 32
+    DIRECT_OBJECT = 64
+
+
+# the augmentation a modifier adds to the end of a word, in the order they're added
+MODIFIER_AUGMENTATIONS: dict[Modifier, Augmentation] = {
+    Modifier.PLURAL: Augmentation.LONG,
+    Modifier.COMPARATIVE: Augmentation.TRILL_DOWN,
+    Modifier.SUPERLATIVE: Augmentation.TRILL_UP,
+    Modifier.PAST_TENSE: Augmentation.SLIDE_DOWN,
+    Modifier.QUESTION: Augmentation.SLIDE_UP,
+}
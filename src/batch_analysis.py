@@ -0,0 +1,325 @@
+"""Analyses a corpus of whistle recordings, and writes what was found to a JSONL file.
+
+Run from the root of the repository:
+
+    python -m src.batch_analysis recordings/ -o results.jsonl --workers 4
+
+The input can be a mix of folders, which are searched for audio files, and manifests,
+text files listing one recording per line. Results are written as soon as they're available,
+one line per recording. When the output file already exists, the recordings it contains
+are skipped, so an interrupted run can be resumed by running the same command again.
+Recordings that couldn't be analysed are tried again.
+"""
+
+import argparse
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+import json
+import os
+import sys
+import time
+from typing import Any, Iterable, Iterator, TextIO
+
+import numpy as np
+import soundfile as sf  # type: ignore
+
+from src.my_types import floatlist
+from src.note import turn_into_notes_strings
+
+# importing this loads the lexicon, which happens once in each worker process
+from src.whistle_analysis import analyse_recording_to_notes, interpret_notes
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".ogg", ".mp3", ".aiff", ".aif")
+
+# the nr of recordings per worker that are submitted ahead of time
+QUEUE_LENGTH_PER_WORKER = 4
+
+
+def find_recordings(inputs: Iterable[str]) -> list[str]:
+    """Collects the paths of the recordings to analyse.
+
+    Parameters
+    ----------
+    inputs : Iterable[str]
+        Folders, which are searched recursively for audio files, and manifests, text files
+        with one path per line. Relative paths in a manifest are relative to the manifest.
+
+    Returns
+    -------
+    list[str]
+        The paths of the recordings, without duplicates, in a consistent order.
+    """
+    recordings: list[str] = []
+    for input_path in inputs:
+        if os.path.isdir(input_path):
+            for folder, _, file_names in sorted(os.walk(input_path)):
+                recordings += [
+                    os.path.join(folder, file_name)
+                    for file_name in sorted(file_names)
+                    if file_name.lower().endswith(AUDIO_EXTENSIONS)
+                ]
+        elif input_path.lower().endswith(AUDIO_EXTENSIONS):
+            recordings.append(input_path)
+        else:
+            manifest_folder = os.path.dirname(input_path)
+            with open(input_path, encoding="utf-8") as f:
+                for line in f:
+                    if (path := line.strip()) and not path.startswith("#"):
+                        recordings.append(os.path.join(manifest_folder, path))
+    return list(dict.fromkeys(os.path.normpath(path) for path in recordings))
+
+
+def load_finished_recordings(output_path: str) -> set[str]:
+    """Determines which recordings were already analysed successfully in a previous run.
+
+    A line that was only partly written when the previous run was interrupted is removed.
+
+    Parameters
+    ----------
+    output_path : str
+        The JSONL file the results are written to.
+
+    Returns
+    -------
+    set[str]
+        The paths of the recordings that don't have to be analysed again.
+    """
+    if not os.path.exists(output_path):
+        return set()
+
+    with open(output_path, "rb+") as f:
+        contents = f.read()
+        if contents and not contents.endswith(b"\n"):
+            f.truncate(contents.rfind(b"\n") + 1)
+            contents = contents[: contents.rfind(b"\n") + 1]
+
+    finished: set[str] = set()
+    for line in contents.decode("utf-8").splitlines():
+        try:
+            result = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if "error" not in result:
+            finished.add(result["path"])
+    return finished
+
+
+def read_recording(path: str) -> tuple[floatlist, int]:
+    """Reads an audio file, mixing it down to mono.
+
+    Parameters
+    ----------
+    path : str
+        The path of the audio file.
+
+    Returns
+    -------
+    tuple[floatlist, int]
+        The recording, and its sample rate.
+    """
+    recording, sample_rate = sf.read(path, dtype="float64", always_2d=True)  # type: ignore
+    return (np.mean(recording, axis=1), int(sample_rate))  # type: ignore
+
+
+_worker_settings: dict[str, float] = {}
+
+
+def _init_worker(f_min: float, f_max: float) -> None:
+    """Stores the settings of the analysis in a worker process, once instead of per recording."""
+    _worker_settings["f_min"] = f_min
+    _worker_settings["f_max"] = f_max
+
+
+def analyse_file(path: str) -> dict[str, Any]:
+    """Analyses a single recording, and interprets the result as Toki Musi.
+
+    Parameters
+    ----------
+    path : str
+        The path of the recording.
+
+    Returns
+    -------
+    dict[str, Any]
+        What was found, ready to be written as JSON. If something went wrong,
+        this contains the error instead.
+    """
+    start = time.perf_counter()
+    result: dict[str, Any] = {"path": path, "worker": os.getpid()}
+    try:
+        recording, sample_rate = read_recording(path)
+        result["duration"] = len(recording) / sample_rate
+        notes, _, _, offset, *_ = analyse_recording_to_notes(
+            recording,
+            sample_rate,
+            _worker_settings.get("f_min", 300),
+            _worker_settings.get("f_max", 4000),
+        )
+        notes_strings = turn_into_notes_strings(notes)
+        words, _ = interpret_notes(notes)
+        result["offset"] = offset
+        result["notes_strings"] = notes_strings
+        result["words"] = [str(word) if word is not None else None for word in words]
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+@dataclass
+class WorkerStats:
+    """How much a single worker has done."""
+
+    recordings: int = 0
+    errors: int = 0
+    audio_seconds: float = 0
+    busy_seconds: float = 0
+
+    def add(self, result: dict[str, Any]) -> None:
+        self.recordings += 1
+        self.errors += "error" in result
+        self.audio_seconds += result.get("duration", 0)
+        self.busy_seconds += result["seconds"]
+
+
+def analyse_in_pool(
+    paths: list[str], workers: int, f_min: float, f_max: float
+) -> Iterator[dict[str, Any]]:
+    """Analyses recordings in a pool of processes, yielding results as soon as they're available.
+
+    Only a few recordings per worker are submitted ahead of time, so the memory use doesn't
+    depend on the size of the corpus.
+
+    Parameters
+    ----------
+    paths : list[str]
+        The recordings to analyse.
+    workers : int
+        The nr of processes.
+    f_min : float
+        The lowest frequency to detect.
+    f_max : float
+        The highest frequency to detect.
+
+    Yields
+    ------
+    dict[str, Any]
+        The result of `analyse_file` for each recording, in order of completion.
+    """
+    with ProcessPoolExecutor(
+        workers, initializer=_init_worker, initargs=(f_min, f_max)
+    ) as executor:
+        to_submit = iter(paths)
+        pending: set[Future[dict[str, Any]]] = set()
+        while True:
+            while len(pending) < workers * QUEUE_LENGTH_PER_WORKER:
+                if (path := next(to_submit, None)) is None:
+                    break
+                pending.add(executor.submit(analyse_file, path))
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def run_batch(
+    inputs: Iterable[str],
+    output_path: str,
+    workers: int = 1,
+    f_min: float = 300,
+    f_max: float = 4000,
+    log: TextIO | None = sys.stderr,
+) -> dict[int, WorkerStats]:
+    """Analyses all recordings that weren't analysed yet, appending the results to `output_path`.
+
+    Parameters
+    ----------
+    inputs : Iterable[str]
+        Folders and manifests, see `find_recordings`.
+    output_path : str
+        The JSONL file the results are written to.
+    workers : int, optional
+        The nr of processes, by default 1
+    f_min : float, optional
+        The lowest frequency to detect, by default 300
+    f_max : float, optional
+        The highest frequency to detect, by default 4000
+    log : TextIO | None, optional
+        Where to report progress and throughput, by default `sys.stderr`
+
+    Returns
+    -------
+    dict[int, WorkerStats]
+        What each worker did, by process id.
+    """
+    recordings = find_recordings(inputs)
+    finished = load_finished_recordings(output_path)
+    to_do = [path for path in recordings if path not in finished]
+    if log is not None:
+        print(
+            f"{len(recordings)} recordings, {len(recordings) - len(to_do)} already done",
+            file=log,
+        )
+
+    stats: dict[int, WorkerStats] = {}
+    start = time.perf_counter()
+    with open(output_path, "a", encoding="utf-8") as output:
+        for i, result in enumerate(analyse_in_pool(to_do, workers, f_min, f_max)):
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+            stats.setdefault(result["worker"], WorkerStats()).add(result)
+            if log is not None and "error" in result:
+                print(f"{result['path']}: {result['error']}", file=log)
+            if log is not None and (i + 1) % 100 == 0:
+                print(f"{i + 1}/{len(to_do)}", file=log)
+
+    if log is not None:
+        report_throughput(stats, time.perf_counter() - start, log)
+    return stats
+
+
+def report_throughput(
+    stats: dict[int, WorkerStats], wall_seconds: float, log: TextIO
+) -> None:
+    """Prints a table with the throughput of every worker, and of the pool as a whole."""
+    print(
+        f"{'worker':>8} {'files':>7} {'errors':>7} {'audio (s)':>10} {'busy (s)':>9} "
+        f"{'files/s':>8} {'x realtime':>11}",
+        file=log,
+    )
+    total = WorkerStats()
+    for pid, worker_stats in sorted(stats.items()):
+        _print_stats_row(str(pid), worker_stats, worker_stats.busy_seconds, log)
+        total.recordings += worker_stats.recordings
+        total.errors += worker_stats.errors
+        total.audio_seconds += worker_stats.audio_seconds
+        total.busy_seconds += worker_stats.busy_seconds
+    _print_stats_row("total", total, wall_seconds, log)
+
+
+def _print_stats_row(
+    name: str, stats: WorkerStats, seconds: float, log: TextIO
+) -> None:
+    seconds = max(seconds, 1e-9)
+    print(
+        f"{name:>8} {stats.recordings:>7} {stats.errors:>7} {stats.audio_seconds:>10.1f} "
+        f"{stats.busy_seconds:>9.1f} {stats.recordings / seconds:>8.2f} "
+        f"{stats.audio_seconds / seconds:>10.1f}x",
+        file=log,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("inputs", nargs="+", help="folders and/or manifests")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file to write to")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--f-min", type=float, default=300)
+    parser.add_argument("--f-max", type=float, default=4000)
+    args = parser.parse_args()
+    run_batch(args.inputs, args.output, args.workers, args.f_min, args.f_max)
+
+
+if __name__ == "__main__":
+    main()
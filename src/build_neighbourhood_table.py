@@ -0,0 +1,41 @@
+"""Finds the closest word for every notes string near one, and stores them for the app to use.
+
+Run from the root of the repository:
+
+    python -m src.build_neighbourhood_table
+
+Matching a notes string without an exact match normally means searching the words for the
+closest ones. With the table, `score_closest_words_for_notes_string` finds most of them with
+a single lookup, and only searches for notes strings that are further away from any word.
+The app never builds the table itself, since that takes a while, so run this when deploying,
+and again once the words or their prevalences change. Until then, the table is ignored.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from src.file_management import NEIGHBOURHOOD_TABLE_FILE
+from src.whistle_analysis import build_neighbourhood_table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("-o", "--output", default=NEIGHBOURHOOD_TABLE_FILE)
+    parser.add_argument("--max-dev", type=int, default=2)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = build_neighbourhood_table(args.max_dev)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    table.save(args.output)
+    print(
+        f"{len(table)} notes strings written to {args.output} "
+        f"in {time.perf_counter() - start:.0f} s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
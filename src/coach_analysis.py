@@ -0,0 +1,264 @@
+from dataclasses import dataclass, field
+from typing import cast
+import numpy as np
+
+from src.note import NoteArray, turn_into_notes_strings
+from src.my_types import floatlist, segbounds
+from src.pitch_tracking import (
+    PITCH_BACKENDS,
+    BandEstimatingBackend,
+    FixedBandBackend,
+    PitchTrack,
+)
+from src.tracing import span
+from src.whistle_analysis import (
+    analyse_recording_to_notes,
+    cut_notes_sentence_into_notes_per_word,
+    extract_recording_per_word,
+    freqs_to_float_pitches,
+    get_freq_timelines_of_words,
+    get_synthesised_versions_of_words,
+    interpret_notes,
+    merge_into_one_wave,
+)
+from src.word import InvalidWordException, Word, make_printable
+from src.words_functions import get_words_from_sentence
+
+
+@dataclass
+class CoachAnalysis:
+    """Everything the Whistle Coach derives from a single recorded attempt."""
+
+    # the notes in the recording, and where they occur (see `analyse_recording_to_notes`)
+    notes: NoteArray
+    segment_bounds: segbounds
+    new_word_flags: list[bool]
+    offset: float
+    sample_rate_pm: int
+    # the interpretation of the recording, one entry per word
+    target_words: list[Word | None]
+    strings_to_print: list[str]
+    word_names: list[str]
+    # audio per word, both as recorded and as it should have sounded
+    recording_per_word: list[floatlist | None]
+    synthesised_versions_of_words: list[floatlist | None]
+    # the pitch of the recording and of the corrected version over time, for plotting
+    times: floatlist
+    pitch_recording: floatlist
+    pitch_target: floatlist
+    # messages about how the reference sentence was used
+    remarks: list[str] = field(default_factory=list)
+    # the floor and ceiling of the pitch analysis, to start from in the next attempt
+    pitch_band: tuple[float, float] | None = None
+
+
+def analyse_attempt(
+    recording: floatlist,
+    sample_rate: int,
+    f_min: float,
+    f_max: float,
+    octave: int,
+    reference_whistle: str,
+    words: list[Word],
+    pitch_band: tuple[float, float] | None = None,
+) -> CoachAnalysis:
+    """Runs the full Whistle Coach pipeline on a recording, without displaying anything.
+
+    Parameters
+    ----------
+    recording : floatlist
+        The recorded attempt.
+    sample_rate : int
+        The sample rate of the recording.
+    f_min : float
+        The lowest frequency to detect in the recording.
+    f_max : float
+        The highest frequency to detect in the recording.
+    octave : int
+        The nr of octaves by which to transpose the corrected version.
+    reference_whistle : str
+        The sentence the user tried to whistle, or an empty string to interpret freely.
+    words : list[Word]
+        The vocabulary the reference sentence has to be based on.
+    pitch_band : tuple[float, float] | None, optional
+        The band used in earlier attempts of the same user, by default `None`.
+        The pitch analysis is limited to this band and the one found in the recording,
+        see `BandEstimatingBackend.choose_band`.
+
+    Returns
+    -------
+    CoachAnalysis
+        The analysis, ready to be displayed.
+    """
+    remarks: list[str] = []
+    inner_backend = PITCH_BACKENDS["parselmouth-band-limited-vad"]
+    # the band is chosen once, both to analyse this recording and to start the next from
+    pitch_band = BandEstimatingBackend(inner_backend, pitch_band).choose_band(
+        recording, sample_rate, f_min, f_max
+    )
+    backend = FixedBandBackend(inner_backend, pitch_band)
+
+    with span("analyse recording", samples=len(recording)) as stage:
+        (
+            notes_from_recording,
+            segment_bounds,
+            new_word_flags,
+            offset,
+            sample_rate_pm,
+            pitch_track,
+        ) = analyse_recording_to_notes(recording, sample_rate, f_min, f_max, backend)
+        stage.sizes["notes"] = len(notes_from_recording)
+
+    strings_from_recording: list[str] = turn_into_notes_strings(notes_from_recording)
+    target_words: list[Word | None] = []
+    usable_reference = False
+
+    if reference_whistle != "":
+        try:
+            target_words = cast(
+                list[Word | None],
+                get_words_from_sentence(reference_whistle, words),
+            )
+            nr_of_sounded_target_words = len(
+                [
+                    w
+                    for w in target_words
+                    if w is not None and w.nr_of_notes != 0 and w.name != "rest"
+                ]
+            )
+            if nr_of_sounded_target_words == len(strings_from_recording):
+                usable_reference = True
+            else:
+                remarks.append(
+                    "Different number of words detected from reference sentence, whistle interpreted freely."
+                )
+
+        except InvalidWordException:
+            remarks.append("Reference sentence invalid, whistle interpreted freely.")
+
+    if not usable_reference:
+        with span("interpretation", words=len(strings_from_recording)):
+            target_words, strings_from_recording = interpret_notes(
+                notes_from_recording
+            )
+
+    for i, word in enumerate(target_words):
+        if word is None or word.nr_of_notes == 0 or word.name == "rest":
+            strings_from_recording.insert(i, "")
+
+    strings_to_print = [
+        (
+            target_word.get_notes_string(True)
+            if target_word is not None
+            else make_printable(string_from_recording)
+        )
+        for target_word, string_from_recording in zip(
+            target_words, strings_from_recording
+        )
+    ]
+
+    word_names = [
+        f"({str(word)})" if word is not None else "(???)" for word in target_words
+    ]
+
+    notes_per_word: list[NoteArray] = cut_notes_sentence_into_notes_per_word(
+        notes_from_recording, target_words
+    )
+
+    recording_per_word: list[floatlist | None] = extract_recording_per_word(
+        recording,
+        new_word_flags,
+        segment_bounds,
+        target_words,
+        sample_rate,
+        sample_rate_pm,
+    )
+
+    with span("synthesis", words=len(target_words)):
+        synthesised_versions_of_words: list[floatlist | None] = (
+            get_synthesised_versions_of_words(
+                target_words,
+                notes_per_word,
+                segment_bounds,
+                offset + octave * 12,
+                sample_rate,
+                sample_rate_pm,
+            )
+        )
+
+    with span("pitch contours", samples=len(recording)):
+        target_freq_timeline: floatlist = merge_into_one_wave(
+            get_freq_timelines_of_words(
+                target_words,
+                notes_per_word,
+                segment_bounds,
+                offset,
+                sample_rate,
+                sample_rate_pm,
+            ),
+            len(recording),
+            segment_bounds,
+            new_word_flags,
+            sample_rate,
+            sample_rate_pm,
+            np.nan,
+        )
+
+        times, pitch_recording, pitch_target = determine_pitch_contours(
+            pitch_track, target_freq_timeline, offset, sample_rate
+        )
+
+    return CoachAnalysis(
+        notes_from_recording,
+        segment_bounds,
+        new_word_flags,
+        offset,
+        sample_rate_pm,
+        target_words,
+        strings_to_print,
+        word_names,
+        recording_per_word,
+        synthesised_versions_of_words,
+        times,
+        pitch_recording,
+        pitch_target,
+        remarks,
+        pitch_band,
+    )
+
+
+def determine_pitch_contours(
+    pitch_track: PitchTrack,
+    target_freq_timeline: floatlist,
+    offset: float,
+    sample_rate: int,
+) -> tuple[floatlist, floatlist, floatlist]:
+    """Determines the pitch of a recording over time, and that of a corrected version.
+
+    Parameters
+    ----------
+    pitch_track : PitchTrack
+        The output of the pitch analysis of the recording.
+    target_freq_timeline : floatlist
+        The frequency of the corrected version for every sample of the recording,
+        `nan` where it's silent.
+    offset : float
+        The pitch to consider 0, expressed in semitones from the standard key.
+    sample_rate : int
+        The sample rate of the recording.
+
+    Returns
+    -------
+    tuple[floatlist, floatlist, floatlist]
+        The times of the pitch values in seconds, the pitch of the recording,
+        and the pitch of the corrected version.
+    """
+    times = pitch_track.times
+    pitch_recording = pitch_track.float_pitches - offset
+
+    samples = np.clip(
+        np.rint(times * sample_rate).astype(int), 0, len(target_freq_timeline) - 1
+    )
+    pitch_target = freqs_to_float_pitches(target_freq_timeline[samples]) - offset
+
+    return (times, pitch_recording, pitch_target)
@@ -0,0 +1,274 @@
+"""Serves live feedback on whistling over a WebSocket, while the learner is still whistling.
+
+Run from the root of the repository:
+
+    python -m src.coach_server --host localhost --port 8765
+
+A session goes as follows. Every message from the server is a JSON object.
+
+1. The client sends a text message `{"type": "start", "sample_rate": 44100}`,
+   optionally with `"format": "int16"` instead of the default `"float32"`,
+   and with `"f_min"` and `"f_max"` to override the range of frequencies to detect.
+2. The client sends the audio as binary messages of raw little endian mono PCM, in blocks
+   of any size. The server analyses them with an `IncrementalAnalyser`, and answers with:
+   - `{"type": "pitch", ...}`, with the pitch per new frame of the pitch analysis,
+     in semitones relative to the root, or relative to C while the root isn't known yet.
+   - `{"type": "note", ...}`, for every note that's been finalised.
+   - `{"type": "word", ...}`, for every word that's been completed, with its interpretation.
+3. The client sends `{"type": "end"}`, after which the server analyses what's left,
+   and answers with the last results, followed by `{"type": "end"}`.
+
+A session that doesn't start like this is closed with code 1008, and a text message that's
+not a JSON object closes it with code 1007.
+
+Every message from the server has a field `"block"`, the index of the last block of audio
+that was analysed for it, so the client can tell how long it took to get there.
+When the analysis can't keep up, the blocks that have piled up are analysed together,
+such that the feedback doesn't fall further and further behind.
+"""
+
+import argparse
+import asyncio
+import json
+from typing import Any
+
+import numpy as np
+from websockets.asyncio.server import Server, ServerConnection, serve
+from websockets.exceptions import ConnectionClosed
+
+from src.note import get_str_rep_for_note
+from src.streaming_analysis import IncrementalAnalyser, StreamUpdate, WordInterpreter
+from src.whistle_analysis import freqs_to_float_pitches
+
+# how long it should take at most to give feedback on a block of audio, in seconds
+LATENCY_TARGET = 0.1
+
+PCM_FORMATS = {"float32": ("<f4", 1.0), "int16": ("<i2", 1 / 32768)}
+
+
+class CoachSession:
+    """The analysis of the audio coming in over a single connection."""
+
+    def __init__(
+        self,
+        sample_rate: int,
+        pcm_format: str = "float32",
+        f_min: float = 300,
+        f_max: float = 4000,
+    ):
+        if pcm_format not in PCM_FORMATS:
+            raise ValueError(f"unknown PCM format: {pcm_format}")
+        self.dtype, self.scale = PCM_FORMATS[pcm_format]
+        self.analyser = IncrementalAnalyser(sample_rate, f_min, f_max)
+        self.interpreter = WordInterpreter()
+
+    def decode(self, data: bytes) -> np.ndarray:
+        """Converts a binary message to samples."""
+        return np.frombuffer(data, dtype=self.dtype).astype(float) * self.scale
+
+    def feed(self, blocks: list[bytes], block_index: int) -> list[dict[str, Any]]:
+        """Analyses blocks of audio, and describes what was found in messages for the client."""
+        samples = np.concatenate([self.decode(block) for block in blocks])
+        return self.describe(self.analyser.feed(samples), block_index)
+
+    def finish(self, block_index: int) -> list[dict[str, Any]]:
+        """Analyses what's left, and describes what was found in messages for the client."""
+        return self.describe(self.analyser.finish(), block_index)
+
+    def describe(self, update: StreamUpdate, block_index: int) -> list[dict[str, Any]]:
+        messages: list[dict[str, Any]] = []
+        analyser = self.analyser
+        if len(update.freqs):
+            frames = update.first_frame + np.arange(len(update.freqs))
+            pitches = freqs_to_float_pitches(update.freqs) - (update.offset or 0)
+            messages.append(
+                {
+                    "type": "pitch",
+                    "block": block_index,
+                    "offset": update.offset,
+                    "times": [
+                        round(analyser.frame_time(frame), 4) for frame in frames.tolist()
+                    ],
+                    "pitches": [
+                        None if np.isnan(pitch) else round(pitch, 3)
+                        for pitch in pitches.tolist()
+                    ],
+                }
+            )
+
+        for note, (lower_bound, upper_bound) in zip(
+            update.notes, update.segment_bounds.tolist()
+        ):
+            messages.append(
+                {
+                    "type": "note",
+                    "block": block_index,
+                    "notes_string": get_str_rep_for_note(
+                        round(note.pitch), note.augmentations
+                    ),
+                    "pitch": round(note.pitch, 3),
+                    "augmentations": int(note.augmentations),
+                    "first_of_word": bool(note.first_of_word),
+                    "start": round(analyser.frame_time(lower_bound), 4),
+                    "end": round(analyser.frame_time(upper_bound), 4),
+                }
+            )
+
+        for word, (lower_bound, upper_bound) in zip(
+            update.words, update.word_bounds.tolist()
+        ):
+            notes_string, match = self.interpreter.interpret(word)
+            messages.append(
+                {
+                    "type": "word",
+                    "block": block_index,
+                    "notes_string": notes_string,
+                    "words": None if match is None else [str(w) for w in match],
+                    "start": round(analyser.frame_time(lower_bound), 4),
+                    "end": round(analyser.frame_time(upper_bound), 4),
+                }
+            )
+        return messages
+
+
+def parse_start_message(message: str | bytes) -> dict[str, Any] | None:
+    """Checks the first message of a session, and gives the settings for its `CoachSession`.
+
+    Parameters
+    ----------
+    message : str | bytes
+        The message, which should be a start message as described at the top of this module.
+
+    Returns
+    -------
+    dict[str, Any] | None
+        The arguments for `CoachSession`, or `None` if the message isn't a valid start message.
+    """
+    if not isinstance(message, str):
+        return None
+    try:
+        start = json.loads(message)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(start, dict) or start.get("type") != "start":
+        return None
+
+    settings = {
+        "sample_rate": start.get("sample_rate"),
+        "f_min": start.get("f_min", 300),
+        "f_max": start.get("f_max", 4000),
+    }
+    for value in settings.values():
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+            return None
+    if start.get("format", "float32") not in PCM_FORMATS:
+        return None
+    settings["sample_rate"] = int(settings["sample_rate"])
+    settings["pcm_format"] = start.get("format", "float32")
+    return settings
+
+
+async def handle_connection(connection: ServerConnection) -> None:
+    """Runs a session for a single client, as described at the top of this module."""
+    try:
+        settings = parse_start_message(await connection.recv())
+        if settings is None:
+            await connection.close(
+                1008, "expected a start message with a positive sample rate"
+            )
+            return
+    except ConnectionClosed:
+        return
+    session = CoachSession(**settings)
+
+    # Receiving goes on while a block is being analysed, so blocks that arrive in the meantime
+    # pile up here, and are analysed together.
+    queue: asyncio.Queue[bytes | None] = asyncio.Queue()
+    # whether the client sent something it shouldn't have, after which the session is over
+    aborted = False
+
+    async def receive() -> None:
+        nonlocal aborted
+        try:
+            async for message in connection:
+                if isinstance(message, bytes):
+                    await queue.put(message)
+                    continue
+                try:
+                    control = json.loads(message)
+                except json.JSONDecodeError:
+                    control = None
+                if not isinstance(control, dict):
+                    aborted = True
+                    await connection.close(1007, "expected a JSON object")
+                    break
+                if control.get("type") == "end":
+                    break
+        except ConnectionClosed:
+            pass
+        finally:
+            queue.put_nowait(None)
+
+    receiver = asyncio.create_task(receive())
+    block_index = -1
+    ended = False
+    try:
+        while not ended:
+            blocks = [await queue.get()]
+            while not queue.empty():
+                blocks.append(queue.get_nowait())
+            if None in blocks:
+                blocks = blocks[: blocks.index(None)]
+                ended = True
+            if blocks:
+                block_index += len(blocks)
+                # the analysis would block receiving, so it runs in a thread
+                messages = await asyncio.to_thread(session.feed, blocks, block_index)
+                for message in messages:
+                    await connection.send(json.dumps(message))
+
+        if aborted:
+            return
+        messages = await asyncio.to_thread(session.finish, block_index)
+        for message in messages + [{"type": "end", "block": block_index}]:
+            await connection.send(json.dumps(message))
+    except ConnectionClosed:
+        pass
+    finally:
+        receiver.cancel()
+
+
+async def start_server(host: str = "localhost", port: int = 8765) -> Server:
+    """Starts serving, until the returned `Server` is closed.
+
+    Parameters
+    ----------
+    host : str, optional
+        The interface to listen on, by default "localhost"
+    port : int, optional
+        The port to listen on, by default 8765, or any free port for 0.
+
+    Returns
+    -------
+    Server
+        The server, with the actual port in `server.sockets[0].getsockname()`.
+    """
+    return await serve(handle_connection, host, port)
+
+
+async def _serve_forever(host: str, port: int) -> None:
+    server = await start_server(host, port)
+    print(f"serving on ws://{host}:{port}")
+    await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    asyncio.run(_serve_forever(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -18,3 +18,15 @@ FREQ_ROOT: float = 440 * 2 ** (ROOT / 12)
 
 # the max variance we expect for a segment of a note that's elongated, but doesn't contain any other augmentations
 VAR_THRESHOLD_FOR_LONG_NOTE = 0.2
+
+# how many analysed recordings to keep in memory, so Streamlit reruns don't redo the analysis
+ANALYSIS_CACHE_MAX_ENTRIES = 32
+
+# whether to also store analysed recordings on disk, and how many bytes they can take up there
+ANALYSIS_CACHE_ON_DISK = False
+ANALYSIS_CACHE_MAX_BYTES_ON_DISK = 256 * 2**20
+
+# whether to append a trace of every Whistle Coach attempt to a file, with the time per stage
+TRACES_TO_FILE = False
+# whether to show the time per stage below the Whistle Coach's feedback
+SHOW_TRACES = False
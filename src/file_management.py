@@ -26,6 +26,9 @@ TRANSCRIBE_COACH_INSTRUCTIONS_FILE = create_path(
 WELCOME_TEXT_FILE = create_path("../resources/welcome_text.md")
 GUIDE_TEXT_FILE = create_path("../resources/guide_text.md")
 ABOUT_TEXT_FILE = create_path("../resources/about_text.md")
+ANALYSIS_CACHE_FOLDER = create_path("../cache/analyses")
+TRACES_FILE = create_path("../cache/traces.jsonl")
+NEIGHBOURHOOD_TABLE_FILE = create_path("../cache/neighbourhood_table.npz")
 
 
 def save_words_to_folder(*words: Word, composite: bool = False) -> None:
@@ -0,0 +1,93 @@
+"""The words of the language, loaded once per process.
+
+Streamlit runs the script of a page again on every interaction, but modules like this one
+are only imported once, so every session and every page shares the same `LEXICON`.
+"""
+
+from src.file_management import (
+    COMPOSITE_WORDS_FOLDER,
+    WORDS_FOLDER,
+    load_words_from_folder,
+)
+from src.word import Word
+
+# the boolean properties of a word that are available as a view with `Lexicon.by_flag`
+FLAGS = (
+    "toki_pona",
+    "particle",
+    "content_word",
+    "preposition",
+    "interjection",
+    "colour",
+    "composite",
+    "pluralizable",
+    "past_tensifiable",
+    "comparativizable",
+    "questionifiable",
+)
+
+# the characters that make a word contain a slide, which the Whistle Coach can't judge yet
+SLIDE_CHARACTERS = ("/", "\\", "^", "*")
+
+
+class Lexicon:
+    """All words, with the selections and indexes the different parts of the app need.
+
+    Every word is loaded only once, and the views share the same `Word` objects,
+    so neither the lists nor the words in them should be changed.
+    """
+
+    def __init__(self, basic_words: list[Word], composite_words: list[Word]):
+        self.basic_words = basic_words
+        self.composite_words = composite_words
+        self.words = basic_words + composite_words
+        self.words_without_slides = [
+            word
+            for word in self.words
+            if not any(c in word.notes_string for c in SLIDE_CHARACTERS)
+        ]
+
+        self.by_nr_of_notes: dict[int, list[Word]] = {}
+        for word in self.words:
+            self.by_nr_of_notes.setdefault(word.nr_of_notes, []).append(word)
+        self.by_flag: dict[str, list[Word]] = {
+            flag: [word for word in self.words if getattr(word, flag)] for flag in FLAGS
+        }
+
+        # for names and notes strings shared by more than one word, the first one
+        self.by_name: dict[str, Word] = {}
+        self.by_notes_string: dict[str, Word] = {}
+        for word in self.words:
+            self.by_name.setdefault(word.name, word)
+            self.by_notes_string.setdefault(word.notes_string, word)
+
+    @classmethod
+    def load(
+        cls,
+        basic_folder: str = WORDS_FOLDER,
+        composite_folder: str = COMPOSITE_WORDS_FOLDER,
+    ) -> "Lexicon":
+        """Reads the words from their JSON files.
+
+        Parameters
+        ----------
+        basic_folder : str, optional
+            The folder with the basic words, by default `WORDS_FOLDER`
+        composite_folder : str, optional
+            The folder with the composites, by default `COMPOSITE_WORDS_FOLDER`
+
+        Returns
+        -------
+        Lexicon
+            The words in both folders.
+        """
+        return cls(
+            load_words_from_folder([basic_folder]),
+            load_words_from_folder([composite_folder]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+
+LEXICON = Lexicon.load()
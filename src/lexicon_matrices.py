@@ -0,0 +1,154 @@
+from typing import Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+from src.augmentation import Augmentation
+from src.my_types import floatlist
+from src.notes_trie import TrieNote
+
+
+# the nr of bits per note in the augmentations packed in one `int`, see `_pack_masks`,
+# which limits the nr of notes of the words that can be compared to 12
+_BITS_PER_MASK = 5
+_MAX_NR_OF_NOTES = 63 // _BITS_PER_MASK
+# the nr of bits set in every possible `int` of long notes, to count the differences in length
+_POPCOUNTS = np.array(
+    [bin(i).count("1") for i in range(1 << (_MAX_NR_OF_NOTES - 1))], dtype=np.int64
+)
+
+
+def _pack_masks(
+    masks: npt.NDArray[np.uint8],
+) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+    """Packs the augmentations of every row of notes into two `int`s.
+
+    The first has all augmentations but whether the notes after the first are long,
+    which have to be the same for two rows to be compared, and the second has a bit
+    for every note after the first that's long.
+    """
+    long = np.uint8(Augmentation.LONG)
+    others = masks.astype(np.int64)
+    others[:, 1:] &= ~int(long)
+    shifts = _BITS_PER_MASK * np.arange(masks.shape[1], dtype=np.int64)
+    keys = np.bitwise_or.reduce(others << shifts, axis=1)
+    long_bits = (masks[:, 1:] & long != 0).astype(np.int64)
+    bits = np.bitwise_or.reduce(long_bits << np.arange(masks.shape[1] - 1), axis=1)
+    return keys, bits
+
+
+class LexiconMatrices:
+    """Word forms as matrices, to compare notes with unrounded pitches against all of them at once.
+
+    The forms are grouped by their nr of notes, with a matrix of pitches and one of augmentations
+    per group, one row per form. Comparing all words of a sentence with the same nr of notes
+    to a group takes a few array operations, rather than a loop over either.
+
+    Like in `score_closest_words_for_notes_string`, the first note is the root, which can be off
+    by 1 after rounding, but has to have the same augmentations. The other notes cost the square
+    of the difference in pitch, plus 1 if one is long and the other isn't. The cost is computed
+    for the rounded pitches, to decide which forms are close enough, and the distance for
+    the pitches as they are, to rank them.
+    """
+
+    def __init__(
+        self, forms: Sequence[tuple[Sequence[TrieNote], str]], prevalences: Sequence[int]
+    ):
+        self.pitches: dict[int, npt.NDArray[np.int16]] = {}
+        self.masks: dict[int, npt.NDArray[np.uint8]] = {}
+        self.prevalences: dict[int, npt.NDArray[np.int64]] = {}
+        self.forms: dict[int, list[str]] = {}
+        self._keys: dict[int, npt.NDArray[np.int64]] = {}
+        self._long_bits: dict[int, npt.NDArray[np.int64]] = {}
+
+        indices_by_length: dict[int, list[int]] = {}
+        for i, (notes, _) in enumerate(forms):
+            indices_by_length.setdefault(len(notes), []).append(i)
+        for length, indices in sorted(indices_by_length.items()):
+            pitches = np.array([[p for p, _ in forms[i][0]] for i in indices], dtype=np.int16)
+            masks = np.array([[a for _, a in forms[i][0]] for i in indices], dtype=np.uint8)
+            # sorted by pitches, then by augmentations, for ties between forms
+            order = np.lexsort(np.concatenate([masks.T[::-1], pitches.T[::-1]]))
+            self.pitches[length] = pitches[order]
+            self.masks[length] = masks[order]
+            self.prevalences[length] = np.array(prevalences, dtype=np.int64)[indices][order]
+            self.forms[length] = [forms[indices[j]][1] for j in order.tolist()]
+            self._keys[length], self._long_bits[length] = _pack_masks(masks[order])
+
+    def __len__(self) -> int:
+        return sum(len(forms) for forms in self.forms.values())
+
+    def score(
+        self,
+        pitches: Sequence[floatlist],
+        masks: Sequence[npt.NDArray[np.uint8]],
+        max_cost: int = 2,
+        nr_of_candidates: int = 5,
+    ) -> list[list[tuple[str, float, int]]]:
+        """Finds the forms close to every word, ranked by their distance.
+
+        Parameters
+        ----------
+        pitches : Sequence[floatlist]
+            The pitch of every note, for every word.
+        masks : Sequence[npt.NDArray[np.uint8]]
+            The augmentations of every note, as the value of an `Augmentation`, for every word.
+        max_cost : int, optional
+            The max cost of a form, for the rounded pitches, by default 2
+        nr_of_candidates : int, optional
+            The max nr of forms to return per word, by default 5
+
+        Returns
+        -------
+        list[list[tuple[str, float, int]]]
+            For every word, the closest forms at most `max_cost` away, with their distance
+            and cost, the closest first. Ties are broken by prevalence, and then by the pitches.
+        """
+        results: list[list[tuple[str, float, int]]] = [[] for _ in pitches]
+        words_by_length: dict[int, list[int]] = {}
+        for i, word_pitches in enumerate(pitches):
+            words_by_length.setdefault(len(word_pitches), []).append(i)
+
+        for length, words in words_by_length.items():
+            if length not in self.forms or length > _MAX_NR_OF_NOTES:
+                continue
+            word_pitches = np.array([pitches[i] for i in words], dtype=np.float64)
+            rounded = np.round(word_pitches)
+            keys, long_bits = _pack_masks(np.array([masks[i] for i in words], dtype=np.uint8))
+            form_pitches = self.pitches[length]
+
+            # every word and form with the same augmentations, besides lengths,
+            # of which a first note that's a bit off is still the root
+            rows, columns = np.nonzero(
+                (keys[:, None] == self._keys[length][None, :])
+                & (np.abs(rounded[:, None, 0] - form_pitches[None, :, 0]) <= 1)
+            )
+            toggles = _POPCOUNTS[long_bits[rows] ^ self._long_bits[length][columns]]
+            costs = np.sum((rounded[rows, 1:] - form_pitches[columns, 1:]) ** 2, axis=1)
+            costs += toggles
+            close = costs <= max_cost
+            rows, columns, costs = rows[close], columns[close], costs[close]
+            distances = np.sum(
+                (word_pitches[rows, 1:] - form_pitches[columns, 1:]) ** 2, axis=1
+            )
+            distances += toggles[close]
+
+            order = np.lexsort(
+                (columns, -self.prevalences[length][columns], distances, rows)
+            )
+            rows, columns = rows[order], columns[order]
+            distances, costs = distances[order], costs[order]
+            starts = np.searchsorted(rows, np.arange(len(words)))
+            for row, i in enumerate(words):
+                found = slice(starts[row], starts[row] + nr_of_candidates)
+                results[i] = [
+                    (self.forms[length][c], d, int(cost))
+                    for c, d, cost, r in zip(
+                        columns[found].tolist(),
+                        distances[found].tolist(),
+                        costs[found].tolist(),
+                        rows[found].tolist(),
+                    )
+                    if r == row
+                ]
+        return results
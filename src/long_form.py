@@ -0,0 +1,197 @@
+"""Transcribes a long recording, like a lesson or a performance, to subtitles.
+
+Run from the root of the repository:
+
+    python -m src.long_form lesson.wav -o lesson.srt
+
+The recording is read in blocks, and every block is cut at the last silence in it, such that
+the pitch analysis runs on windows from one silence to the next, with some overlap for context.
+The windows are analysed by an `IncrementalAnalyser`, and every word is written to the output
+as soon as it's complete. Only a block and the audio since the last silence are kept in memory,
+so memory use doesn't grow with the length of the recording.
+
+The output is SRT for files ending in `.srt`, and JSONL otherwise, one word per line.
+"""
+
+import argparse
+import json
+import sys
+from typing import Iterator, TextIO
+
+import numpy as np
+import soundfile as sf  # type: ignore
+
+from src.my_types import floatlist
+from src.streaming_analysis import IncrementalAnalyser, StreamUpdate, WordInterpreter
+
+# how long a stretch has to be quiet to cut there, in seconds
+MIN_SILENCE_FOR_CUT = 0.05
+# how quiet that is, relative to the loudest sample so far
+SILENCE_FOR_CUT_THRESHOLD = 0.05
+
+
+def find_cut(block: floatlist, sample_rate: int, peak: float) -> int | None:
+    """Finds the middle of the last silence in a block of audio.
+
+    Parameters
+    ----------
+    block : floatlist
+        The audio to cut.
+    sample_rate : int
+        The sample rate of the audio.
+    peak : float
+        The loudest sample seen so far, which determines what counts as silence.
+
+    Returns
+    -------
+    int | None
+        The index of the sample to cut at, or `None` if there's no silence.
+    """
+    silence = max(1, int(MIN_SILENCE_FOR_CUT * sample_rate))
+    nr_of_stretches = len(block) // silence
+    if nr_of_stretches == 0 or peak == 0:
+        return None
+    stretches = np.abs(block[: nr_of_stretches * silence]).reshape(-1, silence)
+    quiet = np.flatnonzero(stretches.max(axis=1) < SILENCE_FOR_CUT_THRESHOLD * peak)
+    if len(quiet) == 0:
+        return None
+    return int(quiet[-1] * silence + silence // 2)
+
+
+def transcribe(
+    path: str,
+    block_seconds: float = 10,
+    f_min: float = 300,
+    f_max: float = 4000,
+) -> Iterator[dict]:
+    """Transcribes a recording, one word at a time.
+
+    Parameters
+    ----------
+    path : str
+        The path of the recording, in any format `soundfile` can read.
+    block_seconds : float, optional
+        How much audio to read at once, by default 10
+    f_min : float, optional
+        The lowest frequency to detect in the recording, by default 300
+    f_max : float, optional
+        The highest frequency to detect in the recording, by default 4000
+
+    Yields
+    ------
+    dict
+        For every word, its start and end in seconds, its notes string,
+        and its interpretation, or `None` if there's no match.
+    """
+    sample_rate: int = sf.info(path).samplerate
+    analyser = IncrementalAnalyser(sample_rate, f_min, f_max, min_frames_per_update=1)
+    interpreter = WordInterpreter()
+    peak = 0.0
+    # the audio since the last cut, which will be analysed together with the next block
+    remainder: floatlist = np.zeros(0)
+
+    block_size = int(block_seconds * sample_rate)
+    blocks = sf.blocks(path, blocksize=block_size, dtype="float32", always_2d=True)
+    for block in blocks:
+        block = np.concatenate([remainder, block.mean(axis=1)])
+        peak = max(peak, float(np.max(np.abs(block))))
+        cut = find_cut(block, sample_rate, peak)
+        if cut is None:
+            # Without any silence, the window gets cut anyway when it gets too long.
+            cut = len(block) if len(block) > 3 * block_size else 0
+        remainder = block[cut:]
+        if cut > 0:
+            update = analyser.feed(block[:cut])
+            yield from _describe_words(update, analyser, interpreter)
+
+    yield from _describe_words(analyser.feed(remainder), analyser, interpreter)
+    yield from _describe_words(analyser.finish(), analyser, interpreter)
+
+
+def _describe_words(
+    update: StreamUpdate, analyser: IncrementalAnalyser, interpreter: WordInterpreter
+) -> Iterator[dict]:
+    for word, (lower_bound, upper_bound) in zip(
+        update.words, update.word_bounds.tolist()
+    ):
+        notes_string, match = interpreter.interpret(word)
+        yield {
+            "start": round(analyser.frame_time(lower_bound), 3),
+            "end": round(analyser.frame_time(upper_bound), 3),
+            "notes_string": notes_string,
+            "words": None if match is None else [str(w) for w in match],
+        }
+
+
+def write_srt(words: Iterator[dict], f: TextIO) -> int:
+    """Writes words as subtitles, one per word, as soon as they're available.
+
+    Parameters
+    ----------
+    words : Iterator[dict]
+        The words, as produced by `transcribe`.
+    f : TextIO
+        The file to write to.
+
+    Returns
+    -------
+    int
+        The nr of words written.
+    """
+    nr_of_words = 0
+    for nr_of_words, word in enumerate(words, 1):
+        text = "???" if word["words"] is None else " ".join(word["words"])
+        start, end = _srt_time(word["start"]), _srt_time(word["end"])
+        f.write(f"{nr_of_words}\n{start} --> {end}\n{text}\n{word['notes_string']}\n\n")
+        f.flush()
+    return nr_of_words
+
+
+def write_jsonl(words: Iterator[dict], f: TextIO) -> int:
+    """Writes words as JSON, one per line, as soon as they're available.
+
+    Parameters
+    ----------
+    words : Iterator[dict]
+        The words, as produced by `transcribe`.
+    f : TextIO
+        The file to write to.
+
+    Returns
+    -------
+    int
+        The nr of words written.
+    """
+    nr_of_words = 0
+    for nr_of_words, word in enumerate(words, 1):
+        f.write(json.dumps(word) + "\n")
+        f.flush()
+    return nr_of_words
+
+
+def _srt_time(time: float) -> str:
+    milliseconds = int(round(time * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("input", help="the recording to transcribe")
+    parser.add_argument("-o", "--output", required=True, help=".srt or .jsonl file")
+    parser.add_argument("--block-seconds", type=float, default=10)
+    parser.add_argument("--f-min", type=float, default=300)
+    parser.add_argument("--f-max", type=float, default=4000)
+    args = parser.parse_args()
+
+    words = transcribe(args.input, args.block_seconds, args.f_min, args.f_max)
+    write = write_srt if args.output.lower().endswith(".srt") else write_jsonl
+    with open(args.output, "w", encoding="utf-8") as f:
+        nr_of_words = write(words, f)
+    print(f"{nr_of_words} words written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
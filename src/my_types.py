@@ -4,4 +4,7 @@ import numpy as np
 
 
 floatlist = npt.NDArray[np.floating[Any]]
-segbounds = list[tuple[int, int]]
+intlist = npt.NDArray[np.integer[Any]]
+# shape (n, 2): the start and end of n segments
+segbounds = intlist
+boollist = npt.NDArray[np.bool_]
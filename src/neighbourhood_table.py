@@ -0,0 +1,175 @@
+import hashlib
+from typing import Iterator
+
+import numpy as np
+import numpy.typing as npt
+
+from src.augmentation import Augmentation
+from src.notes_trie import TrieNote
+
+
+def hash_notes_string(notes_string: str) -> int:
+    """A 64 bit hash of a notes string, that's the same in every process."""
+    digest = hashlib.blake2b(notes_string.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def substitution_cost(a: list[TrieNote], b: list[TrieNote]) -> int | None:
+    """The cost of the differences between two sequences of notes of the same length.
+
+    As in `NotesTrie.search`, that's the square of the difference in pitch of every note,
+    plus 1 for every note that's long in one sequence and not in the other.
+
+    Returns
+    -------
+    int | None
+        The cost, or `None` if the sequences have different lengths or first notes,
+        or differ in other augmentations than length.
+    """
+    if len(a) != len(b) or len(a) == 0 or a[0] != b[0]:
+        return None
+    cost = 0
+    for (pitch, augmentations), (other_pitch, other_augmentations) in zip(a, b):
+        toggled = augmentations ^ other_augmentations
+        if toggled & ~Augmentation.LONG:
+            return None
+        cost += (pitch - other_pitch) ** 2 + (toggled != 0)
+    return cost
+
+
+def substitution_neighbours(
+    notes: list[TrieNote], max_cost: int
+) -> Iterator[tuple[list[TrieNote], int]]:
+    """All sequences of notes within `max_cost` of a sequence, without inserting or deleting notes.
+
+    Like in `NotesTrie.search`, the first note stays the same.
+
+    Parameters
+    ----------
+    notes : list[TrieNote]
+        The sequence to find the neighbours of.
+    max_cost : int
+        The maximum cost of the differences, see `substitution_cost`.
+
+    Yields
+    ------
+    tuple[list[TrieNote], int]
+        Every neighbour, including the sequence itself, with its cost.
+    """
+    long = int(Augmentation.LONG)
+
+    def neighbours_from(i: int, budget: int) -> Iterator[tuple[list[TrieNote], int]]:
+        if i == len(notes):
+            yield [], 0
+            return
+        pitch, augmentations = notes[i]
+        max_step = int(budget**0.5)
+        for step in range(-max_step, max_step + 1):
+            for toggle in (0, 1):
+                cost = step * step + toggle
+                if cost > budget:
+                    continue
+                note = (pitch + step, augmentations ^ long if toggle else augmentations)
+                for rest, rest_cost in neighbours_from(i + 1, budget - cost):
+                    yield [note] + rest, cost + rest_cost
+
+    if len(notes) > 0:
+        for rest, cost in neighbours_from(1, max_cost):
+            yield [notes[0]] + rest, cost
+
+
+class NeighbourhoodTable:
+    """The closest word form for every notes string near one, computed in advance.
+
+    Notes strings are stored by their hash, in a sorted array, so a lookup is a binary search,
+    and the whole table takes 13 bytes per notes string.
+
+    The table also records what it was built from (see `fingerprint`), so a table built
+    for another version of the lexicon can be recognised and ignored.
+    """
+
+    def __init__(
+        self,
+        hashes: npt.NDArray[np.uint64],
+        form_indices: npt.NDArray[np.uint32],
+        costs: npt.NDArray[np.uint8],
+        forms: list[str],
+        max_cost: int,
+        fingerprint: str,
+    ):
+        order = np.argsort(hashes, kind="stable")
+        self.hashes = hashes[order]
+        self.form_indices = form_indices[order]
+        self.costs = costs[order]
+        self.forms = forms
+        self.max_cost = max_cost
+        self.fingerprint = fingerprint
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    @classmethod
+    def from_entries(
+        cls, entries: dict[str, tuple[str, int]], max_cost: int, fingerprint: str
+    ) -> "NeighbourhoodTable":
+        """Creates a table from the closest form and its cost for every notes string."""
+        forms = sorted({form for form, _ in entries.values()})
+        index_of_form = {form: i for i, form in enumerate(forms)}
+        hashes = np.fromiter(
+            (hash_notes_string(s) for s in entries), dtype=np.uint64, count=len(entries)
+        )
+        form_indices = np.fromiter(
+            (index_of_form[form] for form, _ in entries.values()),
+            dtype=np.uint32,
+            count=len(entries),
+        )
+        costs = np.fromiter(
+            (cost for _, cost in entries.values()), dtype=np.uint8, count=len(entries)
+        )
+        return cls(hashes, form_indices, costs, forms, max_cost, fingerprint)
+
+    def lookup(self, notes_string: str) -> tuple[str, int] | None:
+        """Finds the closest form to a notes string.
+
+        Since two notes strings could have the same hash, the caller should check that the form
+        is at the cost found, for instance with `substitution_cost`.
+
+        Parameters
+        ----------
+        notes_string : str
+            The notes string to look up.
+
+        Returns
+        -------
+        tuple[str, int] | None
+            The closest form and its cost, or `None` if the notes string isn't in the table.
+        """
+        key = np.uint64(hash_notes_string(notes_string))
+        i = int(np.searchsorted(self.hashes, key))
+        if i == len(self.hashes) or self.hashes[i] != key:
+            return None
+        return self.forms[self.form_indices[i]], int(self.costs[i])
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                hashes=self.hashes,
+                form_indices=self.form_indices,
+                costs=self.costs,
+                forms=np.array("\n".join(self.forms)),
+                max_cost=np.array(self.max_cost),
+                fingerprint=np.array(self.fingerprint),
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "NeighbourhoodTable":
+        with np.load(path) as data:
+            return cls(
+                data["hashes"],
+                data["form_indices"],
+                data["costs"],
+                str(data["forms"]).split("\n"),
+                int(data["max_cost"]),
+                str(data["fingerprint"]),
+            )
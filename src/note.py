@@ -1,6 +1,10 @@
 from dataclasses import dataclass
+from typing import Iterator, overload
+import numpy as np
+import numpy.typing as npt
 
-from src.augmentation import Augmentation
+from src.augmentation import AUGMENTATION_SYMBOLS, Augmentation
+from src.my_types import boollist, intlist, segbounds
 
 
 @dataclass
@@ -12,17 +16,173 @@ class Note:
     # lengths of the note
     length: int
     # augmentations of the note (see augmentation.py)
-    augmentations: list[Augmentation]
+    augmentations: Augmentation
     # whether this note is the first of a word, determined by the length of the silence before it
     first_of_word: bool = False
 
 
-def turn_into_notes_strings(notes: list[Note]) -> list[str]:
-    """Converts a `list` of `Note` objects to a `list` of notes strings, one for each word.
+class NoteView:
+    """A single note in a `NoteArray`, which can be used like a `Note`.
+
+    Changing an attribute changes the `NoteArray`.
+    """
+
+    __slots__ = ("_notes", "_index")
+
+    def __init__(self, notes: "NoteArray", index: int):
+        self._notes = notes
+        self._index = index
+
+    @property
+    def pitch(self) -> float:
+        return float(self._notes.pitches[self._index])
+
+    @pitch.setter
+    def pitch(self, pitch: float) -> None:
+        self._notes.pitches[self._index] = pitch
+
+    @property
+    def length(self) -> int:
+        return int(self._notes.lengths[self._index])
+
+    @length.setter
+    def length(self, length: int) -> None:
+        self._notes.lengths[self._index] = length
+
+    @property
+    def augmentations(self) -> Augmentation:
+        return Augmentation(int(self._notes.augmentation_masks[self._index]))
+
+    @augmentations.setter
+    def augmentations(self, augmentations: Augmentation) -> None:
+        self._notes.augmentation_masks[self._index] = augmentations
+
+    @property
+    def first_of_word(self) -> bool:
+        return bool(self._notes.first_of_word[self._index])
+
+    @first_of_word.setter
+    def first_of_word(self, first_of_word: bool) -> None:
+        self._notes.first_of_word[self._index] = first_of_word
+
+    def to_note(self) -> Note:
+        return Note(self.pitch, self.length, self.augmentations, self.first_of_word)
+
+    def __repr__(self) -> str:
+        return (
+            f"NoteView({self.pitch!r}, {self.length!r}, "
+            f"{self.augmentations!r}, {self.first_of_word!r})"
+        )
+
+
+@dataclass
+class NoteArray:
+    """The notes in a sentence, stored as parallel columns instead of one object per note.
+
+    Slicing gives a `NoteArray` sharing the columns, without copying anything.
+    Indexing gives a `NoteView`, which behaves like a `Note`.
+    """
+
+    # average pitch of each note
+    pitches: npt.NDArray[np.float32]
+    # length of each note
+    lengths: npt.NDArray[np.int32]
+    # augmentations of each note, as the value of an `Augmentation`
+    augmentation_masks: npt.NDArray[np.uint8]
+    # whether each note is the first of a word
+    first_of_word: boollist
+
+    def __post_init__(self) -> None:
+        self.pitches = np.asarray(self.pitches, dtype=np.float32)
+        self.lengths = np.asarray(self.lengths, dtype=np.int32)
+        self.augmentation_masks = np.asarray(self.augmentation_masks, dtype=np.uint8)
+        self.first_of_word = np.asarray(self.first_of_word, dtype=np.bool_)
+        assert (
+            len(self.pitches)
+            == len(self.lengths)
+            == len(self.augmentation_masks)
+            == len(self.first_of_word)
+        ), "all columns have to have the same length"
+
+    @classmethod
+    def from_notes(cls, notes: "list[Note] | NoteArray") -> "NoteArray":
+        """Creates a `NoteArray` from `Note` objects."""
+        return cls(
+            [note.pitch for note in notes],
+            [note.length for note in notes],
+            [note.augmentations for note in notes],
+            [note.first_of_word for note in notes],
+        )
+
+    def to_notes(self) -> list[Note]:
+        """Creates a separate `Note` object for every note."""
+        return [
+            Note(pitch, length, Augmentation(mask), first_of_word)
+            for pitch, length, mask, first_of_word in zip(
+                self.pitches.tolist(),
+                self.lengths.tolist(),
+                self.augmentation_masks.tolist(),
+                self.first_of_word.tolist(),
+            )
+        ]
+
+    def __len__(self) -> int:
+        return len(self.pitches)
+
+    def __eq__(self, other: object) -> bool:
+        # the generated `__eq__` would compare the columns as tuples of arrays, which fails
+        if not isinstance(other, NoteArray):
+            return NotImplemented
+        return (
+            np.array_equal(self.pitches, other.pitches)
+            and np.array_equal(self.lengths, other.lengths)
+            and np.array_equal(self.augmentation_masks, other.augmentation_masks)
+            and np.array_equal(self.first_of_word, other.first_of_word)
+        )
+
+    @overload
+    def __getitem__(self, index: int) -> NoteView: ...
+
+    @overload
+    def __getitem__(self, index: slice | intlist | boollist) -> "NoteArray": ...
+
+    def __getitem__(
+        self, index: int | slice | intlist | boollist
+    ) -> "NoteView | NoteArray":
+        if isinstance(index, (int, np.integer)):
+            return NoteView(self, range(len(self))[index])
+        return NoteArray(
+            self.pitches[index],
+            self.lengths[index],
+            self.augmentation_masks[index],
+            self.first_of_word[index],
+        )
+
+    def __iter__(self) -> Iterator[NoteView]:
+        return (NoteView(self, i) for i in range(len(self)))
+
+    def word_bounds(self) -> segbounds:
+        """The start and end of every word, in terms of indices of the notes.
+
+        Notes before the first note that's marked as the first of a word form a word too.
+        """
+        starts = np.flatnonzero(self.first_of_word)
+        if len(self) > 0 and (len(starts) == 0 or starts[0] != 0):
+            starts = np.concatenate([[0], starts])
+        ends = np.append(starts[1:], len(self))
+        return np.stack([starts, ends], axis=1)
+
+    def words(self) -> "list[NoteArray]":
+        """Splits the notes per word, without copying anything."""
+        return [self[start:end] for start, end in self.word_bounds()]
+
+
+def turn_into_notes_strings(notes: list[Note] | NoteArray) -> list[str]:
+    """Converts notes to a `list` of notes strings, one for each word.
 
     Parameters
     ----------
-    notes : list[Note]
+    notes : list[Note] | NoteArray
         The notes in a sentence, which can span multiple words.
 
     Returns
@@ -32,6 +192,18 @@ def turn_into_notes_strings(notes: list[Note]) -> list[str]:
     """
     if len(notes) == 0:
         return []
+    if isinstance(notes, NoteArray):
+        strings_for_notes = [
+            str(note) + AUGMENTATION_SYMBOLS[mask]
+            for note, mask in zip(
+                np.round(notes.pitches).astype(int).tolist(),
+                notes.augmentation_masks.tolist(),
+            )
+        ]
+        return [
+            ":".join(strings_for_notes[start:end])
+            for start, end in notes.word_bounds()
+        ]
     words: list[list[str]] = []
     for note in notes:
         if note.first_of_word:
@@ -43,24 +215,19 @@ def turn_into_notes_strings(notes: list[Note]) -> list[str]:
     return words_strings
 
 
-def get_str_rep_for_note(note: int, augmentations: list[Augmentation]) -> str:
+def get_str_rep_for_note(note: int, augmentations: Augmentation) -> str:
     """Converts the information for a single note into a string, in the format of a notes string.
 
     Parameters
     ----------
     note : int
         The rounded pitch value of this note.
-    augmentations : list[Augmentation]
-        A `list` of augmentations for this note.
+    augmentations : Augmentation
+        The augmentations of this note.
 
     Returns
     -------
     str
         The string representation, in the format of a notes string, without colon.
     """
-    str_rep = str(note)
-    for a in Augmentation:
-        if a in augmentations:
-            str_rep += a.value
-
-    return str_rep
+    return str(note) + augmentations.symbol
@@ -0,0 +1,174 @@
+import math
+from typing import Any, Iterable, Iterator
+
+from src.augmentation import Augmentation
+
+# a note in the trie: its pitch, and its augmentations as an `int`
+TrieNote = tuple[int, int]
+
+# costs are packed in one `int` with the nr of inserted and deleted notes in the lowest bits,
+# such that comparing two of them compares the costs first, and the nr of indels second
+_INDEL_BITS = 8
+_INFINITE = 1 << 62
+
+
+class _Node:
+    __slots__ = ("children", "value")
+
+    def __init__(self):
+        self.children: dict[TrieNote, _Node] = {}
+        self.value: Any = None
+
+
+class NotesTrie:
+    """Sequences of notes, with a value for each, searchable by how close they are to a sequence.
+
+    The cost of a difference between two notes is the same as in `generate_neighbours`:
+    the square of the difference in pitch, plus 1 if one is long and the other isn't.
+    Any other difference in augmentations can't be made up for. Optionally, notes can also be
+    inserted or deleted, at a fixed cost per note.
+
+    The search walks down the trie while keeping, for every prefix of the sequence searched for,
+    the cost of the cheapest way to turn it into the notes on the way, as in the edit distance.
+    Branches are left as soon as all of those costs exceed the maximum, so the time a search takes
+    depends on how many sequences are close, rather than on the length of the sequence.
+    """
+
+    def __init__(self):
+        self._root = _Node()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def insert(self, notes: list[TrieNote], value: Any) -> None:
+        """Adds a sequence of notes, replacing the value of the same sequence added before."""
+        node = self._root
+        for note in notes:
+            node = node.children.setdefault(note, _Node())
+        if node.value is None:
+            self._size += 1
+        node.value = value
+
+    def get(self, notes: list[TrieNote]) -> Any:
+        """The value of exactly this sequence, or `None` if it wasn't added."""
+        node: _Node | None = self._root
+        for note in notes:
+            if node is None:
+                return None
+            node = node.children.get(note)
+        return None if node is None else node.value
+
+    def items(self) -> Iterator[tuple[tuple[TrieNote, ...], Any]]:
+        """Every sequence of notes that was added, with its value, in no particular order."""
+        stack: list[tuple[_Node, tuple[TrieNote, ...]]] = [(self._root, ())]
+        while stack:
+            node, path = stack.pop()
+            if node.value is not None:
+                yield path, node.value
+            for note, child in node.children.items():
+                stack.append((child, path + (note,)))
+
+    def search(
+        self, notes: list[TrieNote], max_cost: int, indel_cost: int | None = None
+    ) -> list[tuple[int, int, tuple[TrieNote, ...], Any]]:
+        """Finds all sequences within `max_cost` of a sequence of notes.
+
+        The first note has to match exactly, like the root of a word.
+
+        Parameters
+        ----------
+        notes : list[TrieNote]
+            The sequence to search for, as pitches and augmentations.
+        max_cost : int
+            The maximum cost of the differences.
+        indel_cost : int | None, optional
+            The cost of inserting or deleting a note, by default `None`,
+            in which case only sequences of the same length are found
+
+        Returns
+        -------
+        list[tuple[int, int, tuple[TrieNote, ...], Any]]
+            For every sequence found, the lowest cost to get there, the nr of insertions
+            and deletions that takes, the sequence itself, and its value, in no particular order.
+        """
+        if len(notes) == 0 or (start := self._root.children.get(notes[0])) is None:
+            return []
+        rest = notes[1:]
+        limit = (max_cost << _INDEL_BITS) | ((1 << _INDEL_BITS) - 1)
+        indel = _INFINITE if indel_cost is None else (indel_cost << _INDEL_BITS) | 1
+        long = int(Augmentation.LONG)
+        max_indels = 0 if indel_cost is None else max_cost // max(indel_cost, 1)
+
+        found: list[tuple[int, int, tuple[TrieNote, ...], Any]] = []
+        # for every node to visit: the cost of turning every prefix of `rest` into its notes
+        first_row = [min(j * indel, _INFINITE) for j in range(len(rest) + 1)]
+        stack: list[tuple[_Node, list[int], tuple[TrieNote, ...]]] = [
+            (start, first_row, (notes[0],))
+        ]
+        while stack:
+            node, row, path = stack.pop()
+            if node.value is not None and row[-1] <= limit:
+                cost = row[-1]
+                found.append(
+                    (cost >> _INDEL_BITS, cost & ((1 << _INDEL_BITS) - 1), path, node.value)
+                )
+            # with a limited nr of indels, only the prefixes of about the same length matter
+            depth = len(path)
+            first, last = max(1, depth - max_indels), min(len(rest), depth + max_indels)
+            for note, child in self._children_within(node, row, rest, limit, indel):
+                pitch, augmentations = note
+                new_row = [row[0] + indel] + [_INFINITE] * (first - 1)
+                for j in range(first, last + 1):
+                    other_pitch, other_augmentations = rest[j - 1]
+                    if augmentations == other_augmentations:
+                        substitution = (pitch - other_pitch) ** 2 << _INDEL_BITS
+                    elif augmentations ^ other_augmentations == long:
+                        substitution = (1 + (pitch - other_pitch) ** 2) << _INDEL_BITS
+                    else:
+                        substitution = _INFINITE
+                    new_row.append(
+                        min(row[j - 1] + substitution, row[j] + indel, new_row[-1] + indel)
+                    )
+                new_row += [_INFINITE] * (len(rest) - last)
+                if min(new_row) <= limit:
+                    stack.append((child, new_row, path + (note,)))
+        return found
+
+    @staticmethod
+    def _children_within(
+        node: _Node, row: list[int], rest: list[TrieNote], limit: int, indel: int
+    ) -> Iterable[tuple[TrieNote, _Node]]:
+        """The children of a node that can still be on the way to a sequence within the limit."""
+        children: dict[TrieNote, _Node] = {}
+
+        # an inserted note can be anything, but if that's all the budget allows,
+        # it has to be followed by the rest of the sequence exactly
+        inserting = [j for j, cost in enumerate(row) if cost + indel <= limit]
+        if any(limit - row[j] - indel >> _INDEL_BITS > 0 for j in inserting):
+            return node.children.items()
+        if inserting:
+            for note, child in node.children.items():
+                if any(
+                    rest[j] in child.children if j < len(rest) else child.value is not None
+                    for j in inserting
+                ):
+                    children[note] = child
+
+        # otherwise, the note has to be close to a note of the sequence
+        for cost, (pitch, augmentations) in zip(row, rest):
+            if cost > limit:
+                continue
+            budget = (limit - cost) >> _INDEL_BITS
+            max_step = math.isqrt(budget)
+            for step in range(-max_step, max_step + 1):
+                for other_augmentations, extra in (
+                    (augmentations, 0),
+                    (augmentations ^ Augmentation.LONG, 1),
+                ):
+                    if step * step + extra > budget:
+                        continue
+                    note = (pitch + step, int(other_augmentations))
+                    if (child := node.children.get(note)) is not None:
+                        children[note] = child
+        return children.items()
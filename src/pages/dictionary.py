@@ -9,13 +9,11 @@ from src.words_functions import (
     get_prevalence,
     get_words_from_sentence,
 )
-from src.file_management import (
-    load_examples_from_file,
-    load_words_from_folder,
-)
+from src.file_management import load_examples_from_file
+from src.lexicon import LEXICON
 
 
-WORDS = load_words_from_folder()
+WORDS = LEXICON.words
 EXAMPLES = load_examples_from_file()
 
 
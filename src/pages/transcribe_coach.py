@@ -3,10 +3,10 @@ from random import choice
 
 from src.file_management import (
     load_examples_from_file,
-    load_words_from_folder,
     load_markdown_from_file,
     TRANSCRIBE_COACH_INSTRUCTIONS_FILE,
 )
+from src.lexicon import LEXICON
 from src.util_streamlit import display_example, render_settings
 from src.word import Word, InvalidWordException
 from src.words_functions import get_words_from_sentence
@@ -36,7 +36,7 @@ TRANSCRIBE_COACH_INSTRUCTIONS = load_markdown_from_file(
     TRANSCRIBE_COACH_INSTRUCTIONS_FILE
 )
 
-WORDS: list[Word] = load_words_from_folder()
+WORDS: list[Word] = LEXICON.words
 EXAMPLES: list[tuple[str, str]] = load_examples_from_file()
 COMBINED: list[tuple[str, str]] = combine_examples_and_words(EXAMPLES, WORDS)
 
@@ -1,6 +1,6 @@
 import io
+import os
 from typing import cast
-import parselmouth
 import matplotlib.pyplot as plt
 import streamlit as st
 import numpy as np
@@ -9,24 +9,16 @@ from streamlit_mic_recorder import mic_recorder  # type: ignore
 from scipy.io import wavfile  # type: ignore
 
 
-from src.constants import SAMPLE_RATE
-from src.note import Note, turn_into_notes_strings
+from src.analysis_cache import ANALYSIS_CACHE, make_analysis_key
+from src.coach_analysis import CoachAnalysis, analyse_attempt
+from src.lexicon import LEXICON
+from src.constants import SAMPLE_RATE, SHOW_TRACES, TRACES_TO_FILE
+from src.tracing import Trace, span, tracing
 from src.util_streamlit import render_settings, st_audio
 from src.wave_generation import marginify_wave
-from src.whistle_analysis import (
-    analyse_recording_to_notes,
-    cut_notes_sentence_into_notes_per_word,
-    extract_recording_per_word,
-    find_closest_words_for_notes_string,
-    freqs_to_float_pitches,
-    get_synthesised_versions_of_words,
-    merge_into_one_wave,
-    pitch_string_by,
-)
 from src.word import (
     InvalidWordException,
     Word,
-    make_printable,
 )
 from src.words_functions import get_sentence_wave, get_words_from_sentence
 from src.my_types import floatlist
@@ -34,19 +26,12 @@ from src.file_management import (
     load_examples_from_file,
     load_markdown_from_file,
     WHISTLE_COACH_INSTRUCTIONS_FILE,
-    load_words_from_folder,
+    TRACES_FILE,
 )
 
 INTRUCTIONS = load_markdown_from_file(WHISTLE_COACH_INSTRUCTIONS_FILE)
 
-WORDS_WITHOUT_SLIDES = [
-    w
-    for w in load_words_from_folder()
-    if "/" not in w.notes_string
-    and "\\" not in w.notes_string
-    and "^" not in w.notes_string
-    and "*" not in w.notes_string
-]
+WORDS_WITHOUT_SLIDES = LEXICON.words_without_slides
 
 
 def get_examples_with_words(
@@ -75,52 +60,61 @@ EXAMPLES = get_examples_with_words(WORDS_WITHOUT_SLIDES)
 
 
 def plot_with_target(
-    recording: floatlist, synthesised_version: floatlist, offset: float
+    times: floatlist, pitch_recording: floatlist, pitch_target: floatlist
 ):
     """Displays a plot of the pitch of a recording, against the pitch of a corrected version.
 
     Parameters
     ----------
-    recording : floatlist
-        The recording to plot the pitch of.
-    synthesised_version : floatlist
-        The corrected version to plot the pitch of.
-    offset : float
-        The pitch to consider 0, expressed in semitones from the standard key.
+    times : floatlist
+        The times of the pitch values, in seconds.
+    pitch_recording : floatlist
+        The pitch of the recording over time.
+    pitch_target : floatlist
+        The pitch of the corrected version over time.
     """
-    snd_recording = parselmouth.Sound(  # type: ignore
-        recording, sampling_frequency=st.session_state["sample_rate"]
-    )
-    pm_recording = snd_recording.to_pitch_ac(pitch_floor=st.session_state["f_min"], pitch_ceiling=st.session_state["f_max"], silence_threshold=0.1)  # type: ignore
-    frequencies_recording = np.array(pm_recording.selected_array["frequency"], dtype=float)  # type: ignore
-    pitch_recording = freqs_to_float_pitches(frequencies_recording) - offset
-
-    snd_synth = parselmouth.Sound(  # type: ignore
-        synthesised_version, sampling_frequency=st.session_state["sample_rate"]
-    )
-    pm_synth = snd_synth.to_pitch_ac(pitch_floor=st.session_state["f_min"], pitch_ceiling=st.session_state["f_max"], silence_threshold=0.1)  # type: ignore
-    frequencies_synth = np.array(pm_synth.selected_array["frequency"], dtype=float)  # type: ignore
-    pitch_synth = (
-        freqs_to_float_pitches(frequencies_synth)
-        - 12 * st.session_state["octave"]
-        - offset
-    )
-
-    # Plot pitch
-    plt.plot(pm_recording.xs(), pitch_recording, label="Recording")  # type: ignore
-    plt.plot(pm_recording.xs(), pitch_synth, label="Target")  # type: ignore
+    plt.plot(times, pitch_recording, label="Recording")  # type: ignore
+    plt.plot(times, pitch_target, label="Target")  # type: ignore
     plt.xlabel("Time (s)")  # type: ignore
     plt.ylabel("Pitch (semitones)")  # type: ignore
     plt.title("Whistle Pitch Analysis")  # type: ignore
     plt.legend(loc="upper left")  # type: ignore
     ax = plt.gca()
-    y_min = float(min(-5, np.nanmin(pitch_recording), np.nanmin(pitch_synth)) - 1)
-    y_max = float(max(9, np.nanmax(pitch_recording), np.nanmax(pitch_synth)) + 1)
+    y_min = float(min(-5, np.nanmin(pitch_recording), np.nanmin(pitch_target)) - 1)
+    y_max = float(max(9, np.nanmax(pitch_recording), np.nanmax(pitch_target)) + 1)
     ax.set_ylim(y_min, y_max)
     st.pyplot(plt)  # type: ignore
 
 
 def analyse_and_show_analysis():
+    with tracing("whistle coach") as trace:
+        show_analysis()
+    if TRACES_TO_FILE:
+        os.makedirs(os.path.dirname(TRACES_FILE), exist_ok=True)
+        trace.save(TRACES_FILE)
+    if SHOW_TRACES:
+        show_trace(trace)
+
+
+def show_trace(trace: Trace) -> None:
+    """Shows how long each stage took, and offers the trace for download."""
+    stages = list(trace.walk())
+    with st.expander("Timings"):
+        st.table(  # type: ignore
+            {
+                "stage": [stage.name for stage in stages],
+                "wall (ms)": [round(stage.wall_time * 1000, 1) for stage in stages],
+                "cpu (ms)": [round(stage.cpu_time * 1000, 1) for stage in stages],
+                "sizes": [str(stage.sizes) for stage in stages],
+            }
+        )
+        st.download_button("Trace (JSON)", trace.to_json(), "trace.json")
+        st.download_button(
+            "Trace (Chrome)", trace.to_chrome_trace(), "trace_chrome.json"
+        )
+
+
+def show_analysis():
     audio_bytes = st.session_state.my_recorder_output["bytes"]
 
     audio_buffer = io.BytesIO(audio_bytes)
@@ -128,129 +122,61 @@ def analyse_and_show_analysis():
     st.session_state["sample_rate"] = cast(int, sample_rate)
     audio_data = cast(floatlist, audio_data)
 
-    st_audio(audio_data, sample_rate)
-
-    notes_from_recording, segment_bounds, new_word_flags, offset, sample_rate_pm = (
-        analyse_recording_to_notes(
-            audio_data,
-            st.session_state["sample_rate"],
-            st.session_state["f_min"],
-            st.session_state["f_max"],
-        )
+    with span("audio encoding", samples=len(audio_data)):
+        st_audio(audio_data, sample_rate)
+
+    # the band of the attempts before this recording, which stays the same on reruns
+    if st.session_state.get("pitch_band_recording") != audio_bytes:
+        st.session_state["pitch_band_recording"] = audio_bytes
+        st.session_state["known_pitch_band"] = st.session_state.get("pitch_band")
+
+    # Every widget interaction reruns this script, so we only analyse a recording once
+    key = make_analysis_key(
+        audio_bytes,
+        st.session_state["f_min"],
+        st.session_state["f_max"],
+        st.session_state["octave"],
+        st.session_state["reference_whistle"],
+        st.session_state["known_pitch_band"],
     )
-
-    strings_from_recording: list[str] = turn_into_notes_strings(notes_from_recording)
-    target_words: list[Word | None] = []
-    usable_reference = False
-
-    if st.session_state["reference_whistle"] != "":
-        try:
-            target_words = cast(
-                list[Word | None],
-                get_words_from_sentence(
-                    st.session_state["reference_whistle"], WORDS_WITHOUT_SLIDES
-                ),
+    analysis: CoachAnalysis | None = ANALYSIS_CACHE.get(key)
+    if analysis is None:
+        with span("analyse attempt"):
+            analysis = analyse_attempt(
+                audio_data,
+                st.session_state["sample_rate"],
+                st.session_state["f_min"],
+                st.session_state["f_max"],
+                st.session_state["octave"],
+                st.session_state["reference_whistle"],
+                WORDS_WITHOUT_SLIDES,
+                st.session_state["known_pitch_band"],
             )
-            nr_of_sounded_target_words = len(
-                [
-                    w
-                    for w in target_words
-                    if w is not None and w.nr_of_notes != 0 and w.name != "rest"
-                ]
-            )
-            if nr_of_sounded_target_words == len(strings_from_recording):
-                usable_reference = True
-            else:
-                st.write(  # type: ignore
-                    "Different number of words detected from reference sentence, whistle interpreted freely."
-                )
+        ANALYSIS_CACHE.put(key, analysis)
+    # the next attempts of this user only have to search the band used so far
+    st.session_state["pitch_band"] = analysis.pitch_band
 
-        except InvalidWordException:
-            st.write("Reference sentence invalid, whistle interpreted freely.")  # type: ignore
-
-    if not usable_reference:
-        for i in range(len(strings_from_recording)):
-            s = strings_from_recording[i]
-            # try:
-            if (result := find_closest_words_for_notes_string(s)) is None:
-                target_words.append(None)
-            else:
-                best_match, d_offset = result
-                target_words += best_match
-                for j in range(i, len(strings_from_recording)):
-                    strings_from_recording[j] = pitch_string_by(
-                        strings_from_recording[j], d_offset
-                    )
-            # except:
-            #     raise Exception
-
-    for i, word in enumerate(target_words):
-        if word is None or word.nr_of_notes == 0 or word.name == "rest":
-            strings_from_recording.insert(i, "")
-
-    strings_to_print = [
-        (
-            target_word.get_notes_string(True)
-            if target_word is not None
-            else make_printable(string_from_recording)
-        )
-        for target_word, string_from_recording in zip(
-            target_words, strings_from_recording
-        )
-    ]
-
-    word_names = [
-        f"({str(word)})" if word is not None else "(???)" for word in target_words
-    ]
-
-    notes_per_word: list[list[Note]] = cut_notes_sentence_into_notes_per_word(
-        notes_from_recording, target_words
-    )
-
-    recording_per_word: list[floatlist | None] = extract_recording_per_word(
-        audio_data,
-        new_word_flags,
-        segment_bounds,
-        target_words,
-        st.session_state["sample_rate"],
-        sample_rate_pm,
-    )
-
-    synthesised_versions_of_words: list[floatlist | None] = (
-        get_synthesised_versions_of_words(
-            target_words,
-            notes_per_word,
-            segment_bounds,
-            offset + st.session_state["octave"] * 12,
-            st.session_state["sample_rate"],
-            sample_rate_pm,
-        )
-    )
-
-    full_wave: floatlist = merge_into_one_wave(
-        synthesised_versions_of_words,
-        len(audio_data),
-        segment_bounds,
-        new_word_flags,
-        st.session_state["sample_rate"],
-        sample_rate_pm,
-    )
+    for remark in analysis.remarks:
+        st.write(remark)  # type: ignore
 
     st.divider()
     st.header("Whistle Coach's interpretation:")
 
-    for string, name in zip(strings_to_print, word_names):
+    for string, name in zip(analysis.strings_to_print, analysis.word_names):
         st.write(string, name)  # type: ignore
 
     st.header("Deviations:")
-    plot_with_target(audio_data, full_wave, offset)
+    with span("plot", frames=len(analysis.times)):
+        plot_with_target(
+            analysis.times, analysis.pitch_recording, analysis.pitch_target
+        )
 
     st.header("Word by word feedback:")
 
     for word, recording_word, synthesised_word in zip(
-        target_words,
-        recording_per_word,
-        synthesised_versions_of_words,
+        analysis.target_words,
+        analysis.recording_per_word,
+        analysis.synthesised_versions_of_words,
     ):
         if word is not None:
             st.header(str(word))
@@ -265,10 +191,12 @@ def analyse_and_show_analysis():
             st.write("This really shouldn't happen")  # type: ignore
         else:
             st.write("Your audio:")  # type: ignore
-            st_audio(recording_word, st.session_state["sample_rate"])
+            with span("audio encoding", samples=len(recording_word)):
+                st_audio(recording_word, st.session_state["sample_rate"])
             if synthesised_word is not None:
                 st.write("Corrected version:")  # type: ignore
-                st_audio(synthesised_word, st.session_state["sample_rate"])
+                with span("audio encoding", samples=len(synthesised_word)):
+                    st_audio(synthesised_word, st.session_state["sample_rate"])
             else:
                 st.write("No correction available")  # type: ignore
 
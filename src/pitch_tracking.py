@@ -0,0 +1,984 @@
+from abc import ABC, abstractmethod
+import atexit
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from functools import lru_cache, partial
+import numpy as np
+import parselmouth
+from scipy import fft  # type: ignore
+from scipy.ndimage import maximum_filter1d  # type: ignore
+from scipy.signal import firwin, oaconvolve, resample_poly  # type: ignore
+
+from src.my_types import boollist, floatlist, intlist
+
+# the analysis window spans this many periods of the lowest frequency (the same as Praat)
+PERIODS_PER_WINDOW = 3
+
+# how many frames the YIN backend analyses at once, to bound its memory use
+FRAMES_PER_BATCH = 2048
+
+# before the pitch analysis, recordings are resampled to at least this many samples per period
+# of the highest frequency to detect, a bit more than the 2 of Nyquist to keep a clean band
+MIN_SAMPLES_PER_PERIOD = 2.5
+# and to at least this many samples per period of the lowest frequency, since with fewer,
+# the autocorrelation of Praat now and then misses frequencies close to the floor
+MIN_SAMPLES_PER_FLOOR_PERIOD = 8
+# the band that is kept, relative to `f_min` and `f_max`
+BAND_MARGIN = 1.2
+
+# voice activity detection looks at the loudest sample in blocks of this duration, in seconds
+VAD_BLOCK_DURATION = 0.01
+# blocks are active when they're louder than this portion of the silence threshold
+VAD_THRESHOLD = 0.5
+# the silence kept around active regions, in seconds, as context for the pitch analysis
+VAD_PADDING = 0.1
+# active regions closer together than this, in seconds, are analysed in one go
+VAD_MIN_GAP = 1
+
+# the chunked backend only cuts in pauses at least this long, in seconds, where nothing is voiced
+MIN_PAUSE_FOR_SPLIT = 0.2
+# it makes a few chunks per process, such that processes that finish early can take another one
+CHUNKS_PER_WORKER = 2
+# and no chunks shorter than this, in seconds, since starting the analysis of a chunk has a cost
+MIN_CHUNK_DURATION = 5
+
+# the coarse pass of the band estimate looks at the spectrum of blocks of about this duration
+BAND_ESTIMATE_BLOCK_DURATION = 0.04
+# the portion of the blocks that may be left out of the band, at either end, as outliers
+BAND_ESTIMATE_OUTLIERS = 0.01
+# the margin added to the band on either side, in semitones
+BAND_ESTIMATE_MARGIN = 3
+# with fewer loud blocks than this, there's too little to go on, and the band isn't narrowed
+BAND_ESTIMATE_MIN_BLOCKS = 5
+
+
+def default_time_step(f_min: float) -> float:
+    """The time between two frames of the pitch analysis, if not specified otherwise.
+
+    This is the same as the default of Praat, and results in 400 frames per second for
+    `f_min` := 300.
+
+    Parameters
+    ----------
+    f_min : float
+        The lowest frequency to detect.
+
+    Returns
+    -------
+    float
+        The time step, in seconds.
+    """
+    return 0.75 / f_min
+
+
+def frame_times(
+    nr_of_samples: int, sample_rate: int, f_min: float, time_step: float
+) -> floatlist:
+    """Determines the centres of the frames of the pitch analysis of a recording.
+
+    Frames are placed where a full analysis window fits, and centred in the recording,
+    the same way Praat does it.
+
+    Parameters
+    ----------
+    nr_of_samples : int
+        The length of the recording.
+    sample_rate : int
+        The sample rate of the recording.
+    f_min : float
+        The lowest frequency to detect, which determines the size of the analysis window.
+    time_step : float
+        The time between two frames, in seconds.
+
+    Returns
+    -------
+    floatlist
+        The time of every frame, in seconds from the start of the recording.
+    """
+    # the same arithmetic as Praat, which can make a difference of a frame
+    duration = nr_of_samples * (1 / sample_rate)
+    window = PERIODS_PER_WINDOW / f_min
+    nr_of_frames = max(0, int(np.floor((duration - window) / time_step)) + 1)
+    first_time = (duration - (nr_of_frames - 1) * time_step) / 2
+    return first_time + np.arange(nr_of_frames) * time_step
+
+
+def frames_above_silence(
+    recording: floatlist,
+    sample_rate: int,
+    times: floatlist,
+    f_min: float,
+    silence_threshold: float,
+) -> boollist:
+    """Determines which frames have a sample louder than the silence threshold in their window.
+
+    Parameters
+    ----------
+    recording : floatlist
+        A `np.array` representing a sound wave of a monophonic recording.
+    sample_rate : int
+        The sample rate of the recording.
+    times : floatlist
+        The centres of the frames, in seconds.
+    f_min : float
+        The lowest frequency to detect, which determines the size of the analysis window.
+    silence_threshold : float
+        The portion of the loudest sample of the recording a frame has to reach.
+
+    Returns
+    -------
+    boollist
+        For every frame, whether it's loud enough.
+    """
+    if len(times) == 0:
+        return np.zeros(0, dtype=bool)
+    amplitudes = np.abs(recording)
+    window_length = int(round(PERIODS_PER_WINDOW / f_min * sample_rate))
+    local_peaks = maximum_filter1d(amplitudes, max(1, window_length))
+    centres = np.clip(np.rint(times * sample_rate).astype(int), 0, len(recording) - 1)
+    return local_peaks[centres] >= max(silence_threshold * float(amplitudes.max()), 1e-12)
+
+
+@dataclass
+class PitchTrack:
+    """The pitch of a recording over time, as found by a `PitchBackend`."""
+
+    # the centre of every frame, in seconds from the start of the recording
+    times: floatlist
+    # the frequency per frame, 0 where nothing was detected
+    freqs: floatlist
+    # the pitch per frame in semitones from C, `nan` where nothing was detected
+    float_pitches: floatlist
+
+    @property
+    def voiced(self) -> boollist:
+        return self.freqs > 0
+
+
+class PitchBackend(ABC):
+    """Finds the fundamental frequency of a recording over time.
+
+    Every backend places its frames according to `frame_times`, so their output
+    can be used interchangeably.
+    """
+
+    name: str = ""
+
+    @abstractmethod
+    def track(
+        self,
+        recording: floatlist,
+        sample_rate: int,
+        f_min: float = 300,
+        f_max: float = 4000,
+        time_step: float | None = None,
+        silence_threshold: float = 0.1,
+    ) -> tuple[floatlist, boollist]:
+        """Determines the frequency of every frame, and whether the frame is voiced.
+
+        Parameters
+        ----------
+        recording : floatlist
+            A `np.array` representing a sound wave of a monophonic recording.
+        sample_rate : int
+            The sample rate of the recording.
+        f_min : float, optional
+            The lowest frequency to detect, by default 300
+        f_max : float, optional
+            The highest frequency to detect, by default 4000
+        time_step : float | None, optional
+            The time between two frames in seconds, by default `default_time_step(f_min)`
+        silence_threshold : float, optional
+            Frames without samples louder than this portion of the loudest sample
+            are considered silent, by default 0.1
+
+        Returns
+        -------
+        tuple[floatlist, boollist]
+            The frequency per frame, 0 for frames that aren't voiced, and the voicing per frame.
+        """
+
+
+class ParselmouthBackend(PitchBackend):
+    """Uses the autocorrelation method of Praat, through `parselmouth`."""
+
+    name = "parselmouth"
+
+    def track(
+        self,
+        recording: floatlist,
+        sample_rate: int,
+        f_min: float = 300,
+        f_max: float = 4000,
+        time_step: float | None = None,
+        silence_threshold: float = 0.1,
+    ) -> tuple[floatlist, boollist]:
+        if time_step is None:
+            time_step = default_time_step(f_min)
+        snd = parselmouth.Sound(recording, sampling_frequency=sample_rate)  # type: ignore
+        parselmouth_output = snd.to_pitch_ac(  # type: ignore
+            time_step=time_step,
+            pitch_floor=f_min,
+            pitch_ceiling=f_max,
+            silence_threshold=silence_threshold,
+        )
+        freqs: floatlist = np.array(parselmouth_output.selected_array["frequency"])  # type: ignore
+        return (freqs, freqs > 0)
+
+
+class YinBackend(PitchBackend):
+    """A NumPy implementation of YIN, which works well for near-sinusoidal sounds like whistles.
+
+    Frames are analysed in batches: the difference function of every frame in a batch
+    is computed with a single FFT based autocorrelation. The first dip of the cumulative mean
+    normalised difference below `yin_threshold` determines the period.
+    """
+
+    name = "yin"
+
+    def __init__(self, yin_threshold: float = 0.15):
+        self.yin_threshold = yin_threshold
+
+    def track(
+        self,
+        recording: floatlist,
+        sample_rate: int,
+        f_min: float = 300,
+        f_max: float = 4000,
+        time_step: float | None = None,
+        silence_threshold: float = 0.1,
+    ) -> tuple[floatlist, boollist]:
+        if time_step is None:
+            time_step = default_time_step(f_min)
+        recording = np.asarray(recording, dtype=float)
+        times = frame_times(len(recording), sample_rate, f_min, time_step)
+
+        max_lag = int(np.ceil(sample_rate / f_min))
+        min_lag = max(2, int(np.floor(sample_rate / f_max)))
+        window_length = max(
+            int(round(PERIODS_PER_WINDOW / f_min * sample_rate)), 2 * max_lag + 2
+        )
+        integration_length = window_length - max_lag - 1
+        # the correlations we need never wrap around, as long as the whole window fits
+        fft_size = fft.next_fast_len(window_length, real=True)
+
+        starts = np.rint(times * sample_rate).astype(int) - window_length // 2
+        starts = np.clip(starts, 0, max(0, len(recording) - window_length))
+        cumulative_energy = np.concatenate([[0], np.cumsum(recording**2)])
+        loud_enough = frames_above_silence(
+            recording, sample_rate, times, f_min, silence_threshold
+        )
+
+        # single precision is plenty for the difference function, and twice as fast
+        samples = recording.astype(np.float32)
+
+        # silent frames are skipped altogether
+        loud_starts = starts[loud_enough]
+        loud_freqs = np.zeros(len(loud_starts))
+        for batch_start in range(0, len(loud_starts), FRAMES_PER_BATCH):
+            batch = loud_starts[batch_start : batch_start + FRAMES_PER_BATCH]
+            frames = samples[batch[:, None] + np.arange(window_length)]
+            lag_starts = batch[:, None] + np.arange(max_lag + 2)
+            energy = (
+                cumulative_energy[lag_starts + integration_length]
+                - cumulative_energy[lag_starts]
+            ).astype(np.float32)
+            loud_freqs[batch_start : batch_start + len(batch)] = self._track_frames(
+                frames, energy, sample_rate, min_lag, integration_length, fft_size
+            )
+
+        freqs = np.zeros(len(times))
+        freqs[loud_enough] = loud_freqs
+        return (freqs, freqs > 0)
+
+    def _track_frames(
+        self,
+        frames: floatlist,
+        energy: floatlist,
+        sample_rate: int,
+        min_lag: int,
+        integration_length: int,
+        fft_size: int,
+    ) -> floatlist:
+        nr_of_lags = energy.shape[1]
+        lags = np.arange(nr_of_lags)
+
+        # difference function d(lag) = e(0) + e(lag) - 2 r(lag), over the integration window
+        spectrum_start = fft.rfft(frames[:, :integration_length], fft_size, workers=-1)
+        spectrum_full = fft.rfft(frames, fft_size, workers=-1)
+        np.conj(spectrum_start, out=spectrum_start)
+        spectrum_start *= spectrum_full
+        correlation = fft.irfft(spectrum_start, fft_size, workers=-1)[:, :nr_of_lags]
+        difference = np.maximum(energy[:, :1] + energy - 2 * correlation, 0)
+
+        # cumulative mean normalised difference
+        cumulative_difference = np.cumsum(difference[:, 1:], axis=1)
+        normalised = np.ones_like(difference)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            normalised[:, 1:] = np.where(
+                cumulative_difference > 0,
+                difference[:, 1:] * lags[1:] / cumulative_difference,
+                1,
+            )
+
+        # the first dip below the threshold, followed down to its local minimum
+        in_range = normalised[:, min_lag:-1]
+        below = in_range < self.yin_threshold
+        voiced = below.any(axis=1)
+        first_dip = np.argmax(below, axis=1)
+        rising = normalised[:, min_lag + 1 :] >= in_range
+        after_dip = np.arange(in_range.shape[1]) >= first_dip[:, None]
+        best = np.argmax(rising & after_dip, axis=1) + min_lag
+
+        # parabolic interpolation around the best lag
+        rows = np.arange(len(frames))
+        before, at, after = (normalised[rows, best + i] for i in (-1, 0, 1))
+        curvature = before - 2 * at + after
+        with np.errstate(divide="ignore", invalid="ignore"):
+            shift = np.where(curvature > 0, (before - after) / (2 * curvature), 0)
+        period = best + np.clip(shift, -0.5, 0.5)
+
+        return np.where(voiced, sample_rate / period, 0)
+
+
+def decimation_factor(sample_rate: int, f_max: float, f_min: float = 300) -> int:
+    """Determines by how much a recording can be decimated, while still covering `f_max`.
+
+    Only factors that divide the sample rate are considered, so the new sample rate is whole.
+
+    Parameters
+    ----------
+    sample_rate : int
+        The sample rate of the recording.
+    f_max : float
+        The highest frequency to detect.
+    f_min : float, optional
+        The lowest frequency to detect, by default 300
+
+    Returns
+    -------
+    int
+        The largest suitable factor, 1 if the recording can't be decimated.
+    """
+    max_factor = int(
+        sample_rate
+        // max(MIN_SAMPLES_PER_PERIOD * f_max, MIN_SAMPLES_PER_FLOOR_PERIOD * f_min)
+    )
+    for factor in range(max_factor, 1, -1):
+        if sample_rate % factor == 0:
+            return factor
+    return 1
+
+
+@lru_cache
+def band_pass_filter(sample_rate: int, f_min: float, f_max: float) -> floatlist:
+    """Designs the filter that keeps the band from `f_min` to `f_max`, with some margin.
+
+    This is a linear phase FIR filter. Unlike an IIR filter, it doesn't produce denormal
+    numbers when a recording fades into digital silence, which slow everything down a lot.
+    """
+    low = f_min / BAND_MARGIN
+    high = min(f_max * BAND_MARGIN, 0.95 * sample_rate / 2)
+    nr_of_taps = 2 * int(2 * sample_rate / low) + 1
+    return firwin(nr_of_taps, [low, high], pass_zero=False, fs=sample_rate)
+
+
+def band_limit(
+    recording: floatlist, sample_rate: int, f_min: float = 300, f_max: float = 4000
+) -> tuple[floatlist, int]:
+    """Removes what's outside the range of whistles from a recording, and decimates it.
+
+    The recording is resampled with a polyphase filter, which also takes care of the
+    anti-aliasing, and then band-pass filtered with a linear phase filter, compensating for its delay.
+
+    Parameters
+    ----------
+    recording : floatlist
+        A `np.array` representing a sound wave of a monophonic recording.
+    sample_rate : int
+        The sample rate of the recording.
+    f_min : float, optional
+        The lowest frequency to keep, by default 300
+    f_max : float, optional
+        The highest frequency to keep, by default 4000
+
+    Returns
+    -------
+    tuple[floatlist, int]
+        The band limited recording, and its sample rate.
+    """
+    factor = decimation_factor(sample_rate, f_max, f_min)
+    decimated: floatlist = (
+        resample_poly(recording, 1, factor) if factor > 1 else np.asarray(recording)
+    )
+    new_sample_rate = sample_rate // factor
+
+    taps = band_pass_filter(new_sample_rate, f_min, f_max)
+    if len(decimated) == 0:
+        return (decimated, new_sample_rate)
+    # with a symmetric filter, keeping the middle part means nothing moves in time
+    filtered: floatlist = oaconvolve(decimated, taps, mode="full")
+    offset = (len(taps) - 1) // 2
+    return (filtered[offset : offset + len(decimated)], new_sample_rate)
+
+
+class BandLimitedBackend(PitchBackend):
+    """Runs another backend on a band limited and decimated version of the recording.
+
+    The pitch analysis takes time in proportion to the number of samples, so this
+    speeds it up considerably. The frames still line up with those of the original recording.
+    """
+
+    def __init__(self, backend: PitchBackend):
+        self.backend = backend
+        self.name = f"{backend.name}-band-limited"
+
+    def track(
+        self,
+        recording: floatlist,
+        sample_rate: int,
+        f_min: float = 300,
+        f_max: float = 4000,
+        time_step: float | None = None,
+        silence_threshold: float = 0.1,
+    ) -> tuple[floatlist, boollist]:
+        if time_step is None:
+            time_step = default_time_step(f_min)
+        band_limited, new_sample_rate = band_limit(recording, sample_rate, f_min, f_max)
+        freqs, _ = self.backend.track(
+            band_limited, new_sample_rate, f_min, f_max, time_step, silence_threshold
+        )
+
+        # the duration may have changed by a fraction of a sample, which can cost a frame
+        nr_of_frames = len(frame_times(len(recording), sample_rate, f_min, time_step))
+        freqs = np.pad(freqs, (0, max(0, nr_of_frames - len(freqs))))[:nr_of_frames]
+        return (freqs, freqs > 0)
+
+
+def find_active_regions(
+    recording: floatlist,
+    sample_rate: int,
+    f_min: float = 300,
+    silence_threshold: float = 0.1,
+    padding: float = VAD_PADDING,
+) -> intlist:
+    """Finds the parts of a recording that aren't silent, based on short-time energy.
+
+    A region is active when its loudest sample exceeds a portion of the silence threshold
+    of the pitch analysis, relative to the loudest sample of the recording. Regions are padded,
+    and merged when they're less than `VAD_MIN_GAP` apart.
+
+    Parameters
+    ----------
+    recording : floatlist
+        A `np.array` representing a sound wave of a monophonic recording.
+    sample_rate : int
+        The sample rate of the recording.
+    f_min : float, optional
+        The lowest frequency to detect, by default 300
+    silence_threshold : float, optional
+        The silence threshold of the pitch analysis, by default 0.1
+    padding : float, optional
+        The silence to keep around every region in seconds, by default `VAD_PADDING`
+
+    Returns
+    -------
+    intlist
+        The start and end of every active region, in samples, as an `(n, 2)` `np.array`.
+    """
+    block_length = max(1, int(VAD_BLOCK_DURATION * sample_rate))
+    nr_of_blocks = -(-len(recording) // block_length)
+    if nr_of_blocks == 0:
+        return np.zeros((0, 2), dtype=int)
+    blocks = np.zeros(nr_of_blocks * block_length)
+    blocks[: len(recording)] = np.abs(recording)
+    block_peaks = blocks.reshape(nr_of_blocks, block_length).max(axis=1)
+    if not block_peaks.max() > 0:
+        return np.zeros((0, 2), dtype=int)
+    active = block_peaks >= VAD_THRESHOLD * silence_threshold * block_peaks.max()
+
+    # padding on both sides, plus half an analysis window for the frames at the edges
+    padding_in_blocks = int(
+        np.ceil((padding + PERIODS_PER_WINDOW / f_min / 2) * sample_rate / block_length)
+    )
+    active = maximum_filter1d(active, 2 * padding_in_blocks + 1)
+
+    changes = np.flatnonzero(np.diff(np.concatenate([[0], active, [0]]).astype(np.int8)))
+    regions: intlist = changes.reshape(-1, 2) * block_length
+
+    # analysing a short silence costs less than starting a separate analysis
+    separated = regions[1:, 0] - regions[:-1, 1] > VAD_MIN_GAP * sample_rate
+    starts = regions[np.concatenate([[True], separated]), 0]
+    ends = regions[np.concatenate([separated, [True]]), 1]
+    return np.stack([starts, np.minimum(ends, len(recording))], axis=1)
+
+
+class VoiceActivityBackend(PitchBackend):
+    """Runs another backend only on the parts of the recording that aren't silent.
+
+    Coach recordings often start and end with a few seconds of silence, which then
+    don't have to be analysed. The frames of every region are put back in their place
+    on the frame grid of the whole recording.
+    """
+
+    def __init__(self, backend: PitchBackend):
+        self.backend = backend
+        self.name = f"{backend.name}-vad"
+
+    def track(
+        self,
+        recording: floatlist,
+        sample_rate: int,
+        f_min: float = 300,
+        f_max: float = 4000,
+        time_step: float | None = None,
+        silence_threshold: float = 0.1,
+    ) -> tuple[floatlist, boollist]:
+        if time_step is None:
+            time_step = default_time_step(f_min)
+        regions = find_active_regions(recording, sample_rate, f_min, silence_threshold)
+        if len(regions) == 1 and regions[0, 1] - regions[0, 0] == len(recording):
+            return self.backend.track(
+                recording, sample_rate, f_min, f_max, time_step, silence_threshold
+            )
+        freqs = track_regions(
+            self.backend,
+            recording,
+            sample_rate,
+            regions,
+            f_min,
+            f_max,
+            time_step,
+            silence_threshold,
+        )
+        return (freqs, freqs > 0)
+
+
+def track_regions(
+    backend: PitchBackend,
+    recording: floatlist,
+    sample_rate: int,
+    regions: intlist,
+    f_min: float,
+    f_max: float,
+    time_step: float,
+    silence_threshold: float,
+    executor: Executor | None = None,
+    band: tuple[float, float] | None = None,
+) -> floatlist:
+    """Runs a backend on parts of a recording, and puts the frames in their place on the
+    frame grid of the whole recording.
+
+    Parameters
+    ----------
+    backend : PitchBackend
+        The backend to run on every region.
+    recording : floatlist
+        A `np.array` representing a sound wave of a monophonic recording.
+    sample_rate : int
+        The sample rate of the recording.
+    regions : intlist
+        The start and end of every region, in samples, as an `(n, 2)` `np.array`.
+    f_min : float
+        The lowest frequency to detect.
+    f_max : float
+        The highest frequency to detect.
+    time_step : float
+        The time between two frames, in seconds.
+    silence_threshold : float
+        The portion of the loudest sample of the whole recording a frame has to reach.
+    executor : Executor | None, optional
+        Where to run the backend, for instance a `ProcessPoolExecutor` to analyse the regions
+        in parallel, by default `None`, in which case they're analysed one by one
+    band : tuple[float, float] | None, optional
+        A narrower floor and ceiling to run the backend with, by default `None`, in which case
+        it's run with `f_min` and `f_max`. The frames are placed on the grid of `f_min` either way.
+
+    Returns
+    -------
+    floatlist
+        The frequency per frame of the whole recording, 0 outside the regions.
+    """
+    times = frame_times(len(recording), sample_rate, f_min, time_step)
+    freqs = np.zeros(len(times))
+    if len(times) == 0:
+        return freqs
+
+    band_min, band_max = (f_min, f_max) if band is None else band
+    window = PERIODS_PER_WINDOW / band_min
+    cut_outs: list[tuple[int, int]] = []
+    for start, end in regions:
+        # the frames of the whole recording that fall in this region
+        first = max(0, int(np.ceil((start / sample_rate - times[0]) / time_step)))
+        last = min(
+            len(times) - 1, int(np.floor((end / sample_rate - times[0]) / time_step))
+        )
+        if last < first:
+            continue
+
+        # cut out the region such that the backend puts its frames exactly on those
+        nr_of_samples = int(np.ceil((window + (last - first) * time_step) * sample_rate))
+        region_start = int(
+            np.rint(
+                (times[first] + (last - first) * time_step / 2) * sample_rate
+                - nr_of_samples / 2
+            )
+        )
+        region_start = min(max(0, region_start), len(recording) - nr_of_samples)
+        cut_outs.append((region_start, nr_of_samples))
+
+    parts = [recording[start : start + length] for start, length in cut_outs]
+    track = partial(
+        backend.track,
+        sample_rate=sample_rate,
+        f_min=band_min,
+        f_max=band_max,
+        time_step=time_step,
+        silence_threshold=silence_threshold,
+    )
+    results = map(track, parts) if executor is None else executor.map(track, parts)
+
+    for (region_start, nr_of_samples), (region_freqs, _) in zip(cut_outs, results):
+        region_times = (
+            frame_times(nr_of_samples, sample_rate, band_min, time_step)
+            + region_start / sample_rate
+        )
+        frames = np.rint((region_times - times[0]) / time_step).astype(int)
+        on_grid = (frames >= 0) & (frames < len(times))
+        freqs[frames[on_grid]] = region_freqs[on_grid]
+
+    # the backend only knew the loudest sample of each region, not that of the whole recording
+    if len(cut_outs) > 1:
+        loud_enough = frames_above_silence(
+            recording, sample_rate, times, f_min, silence_threshold
+        )
+        freqs[~loud_enough] = 0
+    return freqs
+
+
+def split_at_pauses(
+    recording: floatlist,
+    sample_rate: int,
+    nr_of_chunks: int,
+    silence_threshold: float = 0.1,
+    min_pause: float = MIN_PAUSE_FOR_SPLIT,
+) -> intlist:
+    """Splits a recording into chunks of about equal length, only cutting in long pauses.
+
+    A pause is silent by the same criterion as in `find_active_regions`, and is cut in the middle,
+    so the pitch analysis of the chunks doesn't depend on where the recording was cut.
+
+    Parameters
+    ----------
+    recording : floatlist
+        A `np.array` representing a sound wave of a monophonic recording.
+    sample_rate : int
+        The sample rate of the recording.
+    nr_of_chunks : int
+        The nr of chunks to aim for. There may be fewer, if there aren't enough pauses.
+    silence_threshold : float, optional
+        The silence threshold of the pitch analysis, by default 0.1
+    min_pause : float, optional
+        How long a pause has to be to cut in it, in seconds, by default `MIN_PAUSE_FOR_SPLIT`
+
+    Returns
+    -------
+    intlist
+        The start and end of every chunk, in samples, as an `(n, 2)` `np.array`.
+        The chunks follow each other without gaps, and cover the whole recording.
+    """
+    block_length = max(1, int(VAD_BLOCK_DURATION * sample_rate))
+    nr_of_blocks = len(recording) // block_length
+    cuts: list[int] = []
+    if nr_of_chunks > 1 and nr_of_blocks > 0:
+        block_peaks = (
+            np.abs(recording[: nr_of_blocks * block_length])
+            .reshape(nr_of_blocks, block_length)
+            .max(axis=1)
+        )
+        quiet = block_peaks < VAD_THRESHOLD * silence_threshold * block_peaks.max()
+        changes = np.flatnonzero(
+            np.diff(np.concatenate([[0], quiet, [0]]).astype(np.int8))
+        )
+        pauses = changes.reshape(-1, 2)
+        pauses = pauses[pauses[:, 1] - pauses[:, 0] >= min_pause / VAD_BLOCK_DURATION]
+        candidates = (pauses.sum(axis=1) // 2) * block_length
+
+        # the pause closest to every ideal cut
+        for i in range(1, nr_of_chunks):
+            if len(candidates) == 0:
+                break
+            ideal = i * len(recording) // nr_of_chunks
+            cut = int(candidates[np.argmin(np.abs(candidates - ideal))])
+            if 0 < cut < len(recording) and (not cuts or cut > cuts[-1]):
+                cuts.append(cut)
+
+    bounds = [0] + cuts + [len(recording)]
+    return np.array([bounds[:-1], bounds[1:]], dtype=int).T.reshape(-1, 2)
+
+
+@lru_cache(maxsize=None)
+def get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """A pool of `workers` processes, started the first time it's needed and reused after that.
+
+    Starting the processes, and importing the backends in them, can take longer than
+    the analysis of a short recording, so that's done only once. The processes are stopped
+    when this process exits.
+    """
+    pool = ProcessPoolExecutor(workers)
+    atexit.register(pool.shutdown, cancel_futures=True)
+    return pool
+
+
+class ChunkedBackend(PitchBackend):
+    """Runs another backend on chunks of the recording in parallel, in a pool of processes.
+
+    The recording is split at long pauses with `split_at_pauses`, in a few chunks per process,
+    and the frames of every chunk are put back in their place on the frame grid of the whole
+    recording. Recordings shorter than `MIN_CHUNK_DURATION` aren't split.
+
+    The chunks are analysed by `executor` if given, and otherwise by the pool of
+    `get_process_pool`, which is shared by every instance with the same nr of workers.
+    """
+
+    def __init__(
+        self, backend: PitchBackend, workers: int, executor: Executor | None = None
+    ):
+        self.backend = backend
+        self.workers = workers
+        self.executor = executor
+        self.name = f"{backend.name}-chunked"
+
+    def track(
+        self,
+        recording: floatlist,
+        sample_rate: int,
+        f_min: float = 300,
+        f_max: float = 4000,
+        time_step: float | None = None,
+        silence_threshold: float = 0.1,
+    ) -> tuple[floatlist, boollist]:
+        if time_step is None:
+            time_step = default_time_step(f_min)
+        nr_of_chunks = min(
+            self.workers * CHUNKS_PER_WORKER,
+            int(len(recording) / sample_rate / MIN_CHUNK_DURATION),
+        )
+        chunks = split_at_pauses(recording, sample_rate, nr_of_chunks, silence_threshold)
+        if len(chunks) < 2:
+            return self.backend.track(
+                recording, sample_rate, f_min, f_max, time_step, silence_threshold
+            )
+        executor = self.executor or get_process_pool(self.workers)
+        try:
+            freqs = track_regions(
+                self.backend,
+                recording,
+                sample_rate,
+                chunks,
+                f_min,
+                f_max,
+                time_step,
+                silence_threshold,
+                executor,
+            )
+        except BrokenProcessPool:
+            # a process died, so the next analysis gets a new pool
+            if self.executor is None:
+                get_process_pool.cache_clear()
+                executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        return (freqs, freqs > 0)
+
+
+def estimate_pitch_band(
+    recording: floatlist,
+    sample_rate: int,
+    f_min: float = 300,
+    f_max: float = 4000,
+    silence_threshold: float = 0.1,
+) -> tuple[float, float] | None:
+    """Estimates which part of the range from `f_min` to `f_max` is used in a recording.
+
+    This is a coarse pass, taking the strongest frequency in the spectrum of blocks of
+    the recording, which for a whistle is the fundamental. The blocks are long and don't
+    overlap, so this is much cheaper than the pitch analysis itself.
+
+    Parameters
+    ----------
+    recording : floatlist
+        A `np.array` representing a sound wave of a monophonic recording.
+    sample_rate : int
+        The sample rate of the recording.
+    f_min : float, optional
+        The lowest frequency to detect, by default 300
+    f_max : float, optional
+        The highest frequency to detect, by default 4000
+    silence_threshold : float, optional
+        Blocks without samples louder than this portion of the loudest sample
+        are left out, by default 0.1
+
+    Returns
+    -------
+    tuple[float, float] | None
+        The floor and the ceiling of the band, with a margin of `BAND_ESTIMATE_MARGIN`
+        semitones, or `None` if there are too few loud blocks to tell.
+    """
+    block_length = 1 << int(np.ceil(np.log2(BAND_ESTIMATE_BLOCK_DURATION * sample_rate)))
+    nr_of_blocks = len(recording) // block_length
+    if nr_of_blocks == 0:
+        return None
+    blocks = np.reshape(recording[: nr_of_blocks * block_length], (nr_of_blocks, -1))
+    block_peaks = np.abs(blocks).max(axis=1)
+    blocks = blocks[block_peaks >= silence_threshold * block_peaks.max()]
+    if len(blocks) < BAND_ESTIMATE_MIN_BLOCKS or not block_peaks.max() > 0:
+        return None
+
+    spectra = np.abs(fft.rfft(blocks * np.hanning(block_length), axis=1))
+    bin_freqs = fft.rfftfreq(block_length, 1 / sample_rate)
+    in_range = np.flatnonzero((bin_freqs >= f_min) & (bin_freqs <= f_max))
+    if len(in_range) == 0:
+        return None
+    strongest = bin_freqs[in_range[np.argmax(spectra[:, in_range], axis=1)]]
+
+    low, high = np.quantile(strongest, [BAND_ESTIMATE_OUTLIERS, 1 - BAND_ESTIMATE_OUTLIERS])
+    margin = 2 ** (BAND_ESTIMATE_MARGIN / 12)
+    return (max(f_min, float(low) / margin), min(f_max, float(high) * margin))
+
+
+class BandEstimatingBackend(PitchBackend):
+    """Runs another backend with a floor and a ceiling tightened to the band in use.
+
+    The band is found by `estimate_pitch_band`. Any single whistler uses only a small part
+    of the range that is searched by default, and both the analysis window and the sample rate
+    needed after `band_limit` shrink with the band. The frames are still placed on the
+    frame grid of `f_min`, so the output can be used like that of the other backends.
+
+    A band that is already known, like that of earlier attempts of the same user, can be given.
+    The band that is used is then wide enough for both, see `choose_band`. Nothing is kept
+    between calls of `track`, so one instance can be shared.
+    """
+
+    def __init__(
+        self, backend: PitchBackend, known_band: tuple[float, float] | None = None
+    ):
+        self.backend = backend
+        self.known_band = known_band
+        self.name = f"{backend.name}-band-estimate"
+
+    def choose_band(
+        self,
+        recording: floatlist,
+        sample_rate: int,
+        f_min: float = 300,
+        f_max: float = 4000,
+        silence_threshold: float = 0.1,
+    ) -> tuple[float, float]:
+        """Chooses the band that `track` limits the analysis of a recording to.
+
+        Parameters
+        ----------
+        recording : floatlist
+            A `np.array` representing a sound wave of a monophonic recording.
+        sample_rate : int
+            The sample rate of the recording.
+        f_min : float, optional
+            The lowest frequency to detect, by default 300
+        f_max : float, optional
+            The highest frequency to detect, by default 4000
+        silence_threshold : float, optional
+            Blocks without samples louder than this portion of the loudest sample
+            are left out, by default 0.1
+
+        Returns
+        -------
+        tuple[float, float]
+            The band found by `estimate_pitch_band`, widened to include `known_band`,
+            within `f_min` and `f_max`. If no band could be found, that's the whole range
+            from `f_min` to `f_max`, since the known band might not hold for this recording.
+        """
+        band = estimate_pitch_band(recording, sample_rate, f_min, f_max, silence_threshold)
+        if band is None:
+            return (f_min, f_max)
+        if self.known_band is not None:
+            band = (min(band[0], self.known_band[0]), max(band[1], self.known_band[1]))
+        return (max(f_min, band[0]), min(f_max, band[1]))
+
+    def track(
+        self,
+        recording: floatlist,
+        sample_rate: int,
+        f_min: float = 300,
+        f_max: float = 4000,
+        time_step: float | None = None,
+        silence_threshold: float = 0.1,
+    ) -> tuple[floatlist, boollist]:
+        if time_step is None:
+            time_step = default_time_step(f_min)
+        band = self.choose_band(recording, sample_rate, f_min, f_max, silence_threshold)
+        return FixedBandBackend(self.backend, band).track(
+            recording, sample_rate, f_min, f_max, time_step, silence_threshold
+        )
+
+
+class FixedBandBackend(PitchBackend):
+    """Runs another backend with a floor and a ceiling tightened to a band chosen in advance.
+
+    This does what `BandEstimatingBackend` does, for a band that was already chosen,
+    for instance with `BandEstimatingBackend.choose_band`.
+    """
+
+    def __init__(self, backend: PitchBackend, band: tuple[float, float]):
+        self.backend = backend
+        self.band = band
+        self.name = f"{backend.name}-fixed-band"
+
+    def track(
+        self,
+        recording: floatlist,
+        sample_rate: int,
+        f_min: float = 300,
+        f_max: float = 4000,
+        time_step: float | None = None,
+        silence_threshold: float = 0.1,
+    ) -> tuple[floatlist, boollist]:
+        if time_step is None:
+            time_step = default_time_step(f_min)
+        band = (max(f_min, self.band[0]), min(f_max, self.band[1]))
+        if band == (f_min, f_max):
+            return self.backend.track(
+                recording, sample_rate, f_min, f_max, time_step, silence_threshold
+            )
+
+        freqs = track_regions(
+            self.backend,
+            recording,
+            sample_rate,
+            np.array([[0, len(recording)]]),
+            f_min,
+            f_max,
+            time_step,
+            silence_threshold,
+            band=band,
+        )
+        return (freqs, freqs > 0)
+
+
+PITCH_BACKENDS: dict[str, PitchBackend] = {
+    backend.name: backend
+    for backend in [
+        ParselmouthBackend(),
+        YinBackend(),
+        # YIN only sees whole lags, so it needs more samples per period than this leaves
+        BandLimitedBackend(ParselmouthBackend()),
+        # YIN already skips silent frames by itself
+        VoiceActivityBackend(BandLimitedBackend(ParselmouthBackend())),
+        BandEstimatingBackend(
+            VoiceActivityBackend(BandLimitedBackend(ParselmouthBackend()))
+        ),
+    ]
+}
+DEFAULT_PITCH_BACKEND: PitchBackend = PITCH_BACKENDS[
+    "parselmouth-band-limited-vad-band-estimate"
+]
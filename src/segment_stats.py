@@ -0,0 +1,165 @@
+from functools import cached_property
+import numpy as np
+
+from src.my_types import intlist, segbounds
+
+# classes of note and pause lengths, see `SegmentStats.note_classes` and `SegmentStats.pause_classes`
+SHORT = 0
+REGULAR = 1
+LONG = 2
+
+
+class SegmentStats:
+    """Statistics on the lengths of the notes and pauses in a recording.
+
+    The lengths are computed and sorted once, and every statistic is computed
+    the first time it's asked for, and then remembered.
+
+    Parameters
+    ----------
+    segment_bounds : segbounds
+        The bounds of the notes, represented by an `(n, 2)` `np.array` of `int`s,
+        holding the start and end of each note, in terms of indices of the samples
+        of the output of the pitch analysis (approx 400 samples per second).
+    note_factors : tuple[float, float], optional
+        The proportions to the regular note length below which notes are considered
+        unintentional, and above which notes are considered intentionally elongated,
+        by default (0.3, 2)
+    pause_factors : tuple[float, float], optional
+        The proportions to the regular pause length below which pauses are considered
+        unintentional, and above which pauses are considered to be indicative of a new word,
+        by default (0.4, 1.7)
+    """
+
+    def __init__(
+        self,
+        segment_bounds: segbounds,
+        note_factors: tuple[float, float] = (0.3, 2),
+        pause_factors: tuple[float, float] = (0.4, 1.7),
+    ):
+        self.segment_bounds = segment_bounds
+        self.note_factors = note_factors
+        self.pause_factors = pause_factors
+        self.note_lengths: intlist = segment_bounds[:, 1] - segment_bounds[:, 0]
+        self.pause_lengths: intlist = segment_bounds[1:, 0] - segment_bounds[:-1, 1]
+
+    @cached_property
+    def sorted_note_lengths(self) -> intlist:
+        return np.sort(self.note_lengths)
+
+    @cached_property
+    def sorted_pause_lengths(self) -> intlist:
+        return np.sort(self.pause_lengths)
+
+    @cached_property
+    def regular_note_length(self) -> int:
+        """What we should expect as the length of a regular note."""
+        return regular_length(self.sorted_note_lengths)
+
+    @cached_property
+    def regular_pause_length(self) -> int:
+        """What we should expect as the length of a regular pause."""
+        return regular_length(self.sorted_pause_lengths)
+
+    @cached_property
+    def note_thresholds(self) -> tuple[float, float]:
+        """The lower and upper bounds of a regular note length, respectively."""
+        return thresholds(
+            self.sorted_note_lengths, self.regular_note_length, *self.note_factors
+        )
+
+    @cached_property
+    def pause_thresholds(self) -> tuple[float, float]:
+        """The lower and upper bounds of a regular pause length, respectively."""
+        lengths = self.pause_lengths
+        # two similar pauses are both regular, unless one of them is 0
+        if (
+            len(lengths) == 2
+            and lengths[1] < 2 * lengths[0]
+            and self.regular_pause_length > 0
+        ):
+            return (lengths[0] - 1, lengths[1] + 1)
+        return thresholds(
+            self.sorted_pause_lengths, self.regular_pause_length, *self.pause_factors
+        )
+
+    def note_classes(self) -> intlist:
+        """Classifies every note as `SHORT`, `REGULAR` or `LONG`.
+
+        Short notes are below the lower note threshold, and are probably artefacts.
+        Long notes are at or above the upper note threshold, and are probably elongated.
+        """
+        return np.digitize(self.note_lengths, self.note_thresholds)
+
+    def pause_classes(self) -> intlist:
+        """Classifies every pause as `SHORT`, `REGULAR` or `LONG`.
+
+        Short pauses are at or below the lower pause threshold, and probably split up a note.
+        Long pauses are above the upper pause threshold, and probably separate words.
+        """
+        return np.digitize(self.pause_lengths, self.pause_thresholds, right=True)
+
+
+def regular_length(sorted_lengths: intlist) -> int:
+    """Determines the regular length, as the median of the shortest two thirds of the lengths.
+
+    Parameters
+    ----------
+    sorted_lengths : intlist
+        The lengths, sorted.
+
+    Returns
+    -------
+    int
+        The regular length, 0 if there are no lengths.
+    """
+    if len(sorted_lengths) == 0:
+        return 0
+    if len(sorted_lengths) == 1:
+        return int(sorted_lengths[0])
+    shortest_part = sorted_lengths[: len(sorted_lengths) * 2 // 3]
+    return int(np.median(shortest_part))
+
+
+def thresholds(
+    sorted_lengths: intlist, regular: int, short_factor: float, long_factor: float
+) -> tuple[float, float]:
+    """Determines the thresholds for a regular length.
+
+    The lower threshold is proportional to the regular length. For the upper threshold,
+    we look at the lengths from the regular length up to the first length that is clearly long,
+    and choose the largest gap between them. If there's no clearly long length,
+    the upper threshold is proportional to the regular length.
+
+    Parameters
+    ----------
+    sorted_lengths : intlist
+        The lengths, sorted.
+    regular : int
+        The regular length.
+    short_factor : float
+        The proportion to the regular length for the lower threshold.
+    long_factor : float
+        The proportion to the regular length above which a length is clearly long.
+
+    Returns
+    -------
+    tuple[float, float]
+        The lower and upper bounds of a regular length, respectively.
+    """
+    long_guess = regular * long_factor
+    first_relevant = np.searchsorted(sorted_lengths, regular, "left")
+    first_long = np.searchsorted(sorted_lengths, long_guess, "left")
+    relevant = sorted_lengths[first_relevant : first_long + 1]
+
+    if len(relevant) == 0:
+        return (0, 0)
+    if len(relevant) == 1:
+        return (relevant[0] - 1, relevant[0] + 1)
+    if relevant[-1] < long_guess:
+        return (regular * short_factor, long_guess)
+    index_of_last_regular = int(np.argmax(np.diff(relevant)))
+    return (
+        regular * short_factor,
+        (relevant[index_of_last_regular] + relevant[index_of_last_regular + 1]) / 2,
+    )
@@ -0,0 +1,478 @@
+from collections import deque
+from dataclasses import dataclass, field
+import numpy as np
+from scipy.ndimage import maximum_filter1d  # type: ignore
+
+from src.augmentation import Augmentation
+from src.constants import NOTES_PER_SEC
+from src.my_types import floatlist, segbounds
+from src.note import Note, turn_into_notes_strings
+from src.pitch_tracking import (
+    PERIODS_PER_WINDOW,
+    PITCH_BACKENDS,
+    PitchBackend,
+    default_time_step,
+    frame_times,
+)
+from src.segment_stats import SegmentStats
+from src.whistle_analysis import (
+    TUNING_BINS,
+    anchor_tuning,
+    determine_float_note_and_augmentations_of_segment,
+    estimate_tuning,
+    find_closest_words_for_notes_string,
+    freqs_to_float_pitches,
+    pitch_string_by,
+    tuning_histogram,
+)
+from src.word import Word
+
+# how many notes and pauses the running estimates of their regular lengths are based on
+NR_OF_SEGMENTS_FOR_ESTIMATES = 64
+
+
+@dataclass
+class StreamUpdate:
+    """What an `IncrementalAnalyser` found out after being fed another block of audio."""
+
+    # index of the first pitch analysis frame in this update
+    first_frame: int
+    # frequency per new pitch analysis frame, 0 for silence
+    freqs: floatlist
+    # notes that have been finalised, and their bounds in terms of pitch analysis frames
+    notes: list[Note] = field(default_factory=list)
+    segment_bounds: segbounds = field(
+        default_factory=lambda: np.zeros((0, 2), dtype=int)
+    )
+    # words that have been completed, and their bounds in terms of pitch analysis frames
+    words: list[list[Note]] = field(default_factory=list)
+    word_bounds: segbounds = field(default_factory=lambda: np.zeros((0, 2), dtype=int))
+    # the distance of the root from C in semitones, as currently estimated
+    offset: float | None = None
+
+
+@dataclass
+class _PendingNote:
+    pitch: float
+    augmentations: Augmentation
+    lower_bound: int
+    upper_bound: int
+    first_of_word: bool
+
+
+class IncrementalAnalyser:
+    """Analyses a recording block by block, emitting notes and words as soon as they're complete.
+
+    This does the same as `analyse_recording_to_notes`, except that the thresholds for
+    note and pause lengths are running estimates, based on the most recent notes and pauses,
+    and that the root is estimated from the notes seen so far. Before enough notes have been
+    seen, the estimates are based on the default speed. Words are emitted once they're complete,
+    so word boundaries are decided by the pauses alone, without `decode_word_boundaries`.
+
+    Frame `k` of the pitch analysis is centred at `window / 2 + k * time_step` seconds
+    from the start of the stream.
+
+    The pitch analysis runs on small chunks of audio, too small for band limiting them to pay off,
+    so by default the plain parselmouth backend is used.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        f_min: float = 300,
+        f_max: float = 4000,
+        silence_threshold: float = 0.1,
+        min_frames_per_update: int = 8,
+        backend: PitchBackend = PITCH_BACKENDS["parselmouth"],
+    ):
+        self.sample_rate = sample_rate
+        self.f_min = f_min
+        self.f_max = f_max
+        self.silence_threshold = silence_threshold
+        self.min_frames_per_update = min_frames_per_update
+        self.backend = backend
+
+        self.time_step: float = default_time_step(f_min)
+        self.window: float = PERIODS_PER_WINDOW / f_min
+        self.frame_rate: float = 1 / self.time_step
+
+        # audio that still has to be analysed, starting at sample `_audio_start` of the stream
+        self._audio: floatlist = np.zeros(0)
+        self._audio_start: int = 0
+        self._nr_of_samples: int = 0
+        self._peak: float = 0
+
+        # frames that have been analysed, starting at frame `_pitches_start`
+        self._pitches: floatlist = np.zeros(0)
+        self._pitches_start: int = 0
+        self._nr_of_frames: int = 0
+
+        # segmentation state
+        self._previous_voiced: bool = False
+        self._run_start: int | None = None
+        self._open_note: list[int] | None = None
+        self._last_note_end: int | None = None
+        self._raw_segments: deque[tuple[int, int]] = deque(
+            maxlen=NR_OF_SEGMENTS_FOR_ESTIMATES
+        )
+        self._notes_for_estimates: deque[tuple[int, int]] = deque(
+            maxlen=NR_OF_SEGMENTS_FOR_ESTIMATES
+        )
+        # statistics on the two above, computed when needed, and forgotten when they change
+        self._raw_segment_stats: SegmentStats | None = None
+        self._note_stats: SegmentStats | None = None
+        self._pending: deque[_PendingNote] = deque()
+        self._word: list[tuple[Note, int, int]] = []
+
+        # the first note, which is the root, and how long the notes are at every fraction
+        # of a semitone, from which the root is estimated (see `estimate_root`)
+        self._first_note: float | None = None
+        self._tuning_histogram: floatlist = np.zeros(TUNING_BINS)
+        self._offset: float | None = None
+
+        self._finished = False
+
+    @property
+    def offset(self) -> float | None:
+        """The current estimate of the distance of the root from C in semitones."""
+        if self._first_note is None:
+            return None
+        if self._offset is None:
+            tuning = estimate_tuning(self._tuning_histogram)
+            self._offset = anchor_tuning(tuning, self._first_note)
+        return self._offset
+
+    def feed(self, block: floatlist) -> StreamUpdate:
+        """Analyses another block of audio.
+
+        Parameters
+        ----------
+        block : floatlist
+            The samples following the previously fed block.
+
+        Returns
+        -------
+        StreamUpdate
+            The frames that could be analysed, and the notes and words that were completed.
+        """
+        assert not self._finished, "can't feed an analyser that's finished"
+        block = np.asarray(block, dtype=float)
+        if len(block):
+            self._peak = max(self._peak, float(np.max(np.abs(block))))
+        self._audio = np.concatenate([self._audio, block])
+        self._nr_of_samples += len(block)
+
+        update = StreamUpdate(self._nr_of_frames, np.zeros(0))
+        last_frame = self._last_analysable_frame()
+        if last_frame - self._nr_of_frames + 1 >= self.min_frames_per_update:
+            freqs = self._analyse_frames(last_frame)
+            update.freqs = freqs
+            self._process_frames(freqs, update)
+        self._resolve(update, False)
+        return self._finish_update(update)
+
+    def finish(self) -> StreamUpdate:
+        """Analyses what's left, and treats the end of the stream as a long silence.
+
+        Returns
+        -------
+        StreamUpdate
+            The last frames, and the notes and words that hadn't been completed yet.
+        """
+        update = StreamUpdate(self._nr_of_frames, np.zeros(0))
+        last_frame = self._last_analysable_frame()
+        if last_frame >= self._nr_of_frames:
+            freqs = self._analyse_frames(last_frame)
+            update.freqs = freqs
+            self._process_frames(freqs, update)
+
+        if self._run_start is not None:
+            self._end_run(self._nr_of_frames)
+        if self._open_note is not None:
+            self._close_note(update)
+        self._resolve(update, True)
+        if self._word:
+            self._complete_word(update)
+
+        self._finished = True
+        return self._finish_update(update)
+
+    def frame_time(self, frame: int) -> float:
+        """The time in seconds from the start of the stream at which frame `frame` is centred."""
+        return self.window / 2 + frame * self.time_step
+
+    def _last_analysable_frame(self) -> int:
+        duration = self._nr_of_samples / self.sample_rate
+        return int(np.floor((duration - self.window) / self.time_step + 1e-9))
+
+    def _analyse_frames(self, last_frame: int) -> floatlist:
+        """Runs the pitch analysis on the frames from `_nr_of_frames` up to `last_frame`."""
+        first_frame = self._nr_of_frames
+        # leave some context before the first frame, for the path finding of the pitch analysis
+        start_time = max(0, self.frame_time(first_frame) - 1.5 * self.window)
+        start_sample = max(self._audio_start, int(start_time * self.sample_rate))
+        end_sample = int(
+            np.ceil((self.frame_time(last_frame) + self.window / 2) * self.sample_rate)
+        )
+        end_sample = min(end_sample, self._nr_of_samples)
+        chunk = self._audio[
+            start_sample - self._audio_start : end_sample - self._audio_start
+        ]
+
+        chunk_freqs, _ = self.backend.track(
+            chunk,
+            self.sample_rate,
+            self.f_min,
+            self.f_max,
+            self.time_step,
+            self.silence_threshold,
+        )
+        chunk_times = (
+            frame_times(len(chunk), self.sample_rate, self.f_min, self.time_step)
+            + start_sample / self.sample_rate
+        )
+
+        # put the frames of the chunk on our own grid of frames
+        frames = np.arange(first_frame, last_frame + 1)
+        times = self.window / 2 + frames * self.time_step
+        indices = np.rint((times - chunk_times[0]) / self.time_step).astype(int)
+        freqs = chunk_freqs[np.clip(indices, 0, len(chunk_freqs) - 1)]
+
+        # the pitch analysis only knows the loudest sample of the chunk, we know the loudest so far
+        window_samples = max(1, int(self.window * self.sample_rate))
+        local_peaks = maximum_filter1d(np.abs(chunk), window_samples)
+        frame_samples = np.clip(
+            np.rint(times * self.sample_rate).astype(int) - start_sample,
+            0,
+            len(chunk) - 1,
+        )
+        freqs[local_peaks[frame_samples] < self.silence_threshold * self._peak] = 0
+
+        self._nr_of_frames = last_frame + 1
+        self._pitches = np.concatenate([self._pitches, freqs_to_float_pitches(freqs)])
+
+        # we only need to keep the audio for the context of the next chunk
+        next_start_time = self.frame_time(self._nr_of_frames) - 1.5 * self.window
+        keep_from = max(self._audio_start, int(next_start_time * self.sample_rate))
+        self._audio = self._audio[keep_from - self._audio_start :]
+        self._audio_start = keep_from
+
+        return freqs
+
+    def _process_frames(self, freqs: floatlist, update: StreamUpdate) -> None:
+        """Finds the onsets and endings of notes in new frames, and handles them in order."""
+        first_frame = self._nr_of_frames - len(freqs)
+        voiced = np.concatenate([[self._previous_voiced], freqs > 0]).astype(np.int8)
+        changes = np.flatnonzero(np.diff(voiced))
+        for change in changes:
+            if voiced[change + 1]:
+                self._start_run(first_frame + int(change), update)
+            else:
+                self._end_run(first_frame + int(change))
+        self._previous_voiced = bool(voiced[-1])
+
+        silence_since = (
+            self._open_note[1]
+            if self._open_note is not None and self._run_start is None
+            else None
+        )
+        short_pause_threshold, _ = self._pause_thresholds()
+        if (
+            silence_since is not None
+            and self._nr_of_frames - silence_since > short_pause_threshold
+        ):
+            self._close_note(update)
+
+        self._trim_pitches()
+
+    def _start_run(self, frame: int, update: StreamUpdate) -> None:
+        self._run_start = frame
+        if self._open_note is None:
+            return
+        short_pause_threshold, _ = self._pause_thresholds()
+        if frame - self._open_note[1] > short_pause_threshold:
+            self._close_note(update)
+
+    def _end_run(self, frame: int) -> None:
+        assert self._run_start is not None, "no run to end"
+        self._raw_segments.append((self._run_start, frame))
+        self._raw_segment_stats = None
+        if self._open_note is not None:
+            # it wasn't closed when this run started, so they are part of the same note
+            self._open_note[1] = frame
+        else:
+            self._open_note = [self._run_start, frame]
+        self._run_start = None
+
+    def _close_note(self, update: StreamUpdate) -> None:
+        assert self._open_note is not None, "no note to close"
+        lower_bound, upper_bound = self._open_note
+        self._open_note = None
+
+        short_note_threshold, long_note_threshold = self._note_thresholds()
+        self._notes_for_estimates.append((lower_bound, upper_bound))
+        self._note_stats = None
+        if upper_bound - lower_bound < short_note_threshold:
+            return
+
+        regular_length = self._regular_note_length()
+        float_pitches = self._pitches[
+            lower_bound - self._pitches_start : upper_bound - self._pitches_start
+        ]
+        float_note, augmentations = determine_float_note_and_augmentations_of_segment(
+            float_pitches, regular_length, long_note_threshold
+        )
+
+        # the same as `estimate_root`, one note at a time
+        if self._first_note is None:
+            self._first_note = float_note
+        self._tuning_histogram += tuning_histogram(
+            [float_note], [upper_bound - lower_bound]
+        )
+        self._offset = None
+
+        _, long_pause_threshold = self._pause_thresholds()
+        first_of_word = (
+            self._last_note_end is None
+            or lower_bound - self._last_note_end > long_pause_threshold
+        )
+        self._last_note_end = upper_bound
+        self._pending.append(
+            _PendingNote(
+                float_note, augmentations, lower_bound, upper_bound, first_of_word
+            )
+        )
+        self._resolve(update, False)
+
+    def _resolve(self, update: StreamUpdate, end_of_stream: bool) -> None:
+        """Finalises pending notes, as far as the notes and silence after them allow."""
+        _, long_pause_threshold = self._pause_thresholds()
+        while self._pending:
+            note = self._pending[0]
+            assert self.offset is not None, "there has to be a root"
+            pitch = note.pitch - self.offset
+            first_of_word = note.first_of_word
+
+            # A word of one note that's far from the root is probably part of the previous word.
+            # Whether it's a word of one note depends on what comes after it.
+            if first_of_word and self._word and (pitch < -2.5 or pitch > 2.5):
+                if len(self._pending) > 1:
+                    one_note_word = self._pending[1].first_of_word
+                elif self._open_note is not None or self._run_start is not None:
+                    next_onset = (
+                        self._open_note[0]
+                        if self._open_note is not None
+                        else self._run_start
+                    )
+                    one_note_word = next_onset - note.upper_bound > long_pause_threshold  # type: ignore
+                elif (
+                    end_of_stream
+                    or self._nr_of_frames - note.upper_bound > long_pause_threshold
+                ):
+                    one_note_word = True
+                else:
+                    return
+                if one_note_word:
+                    first_of_word = False
+
+            self._pending.popleft()
+            if first_of_word and self._word:
+                self._complete_word(update)
+            finalised = Note(
+                pitch,
+                note.upper_bound - note.lower_bound,
+                note.augmentations,
+                first_of_word,
+            )
+            self._word.append((finalised, note.lower_bound, note.upper_bound))
+            update.notes.append(finalised)
+            update.segment_bounds = np.append(
+                update.segment_bounds, [[note.lower_bound, note.upper_bound]], axis=0
+            )
+
+    def _complete_word(self, update: StreamUpdate) -> None:
+        update.words.append([note for note, _, _ in self._word])
+        update.word_bounds = np.append(
+            update.word_bounds, [[self._word[0][1], self._word[-1][2]]], axis=0
+        )
+        self._word = []
+
+    def _finish_update(self, update: StreamUpdate) -> StreamUpdate:
+        update.offset = self.offset
+        return update
+
+    def _trim_pitches(self) -> None:
+        """Forgets the pitch of frames that won't be part of a note anymore."""
+        keep_from = self._nr_of_frames
+        if self._run_start is not None:
+            keep_from = min(keep_from, self._run_start)
+        if self._open_note is not None:
+            keep_from = min(keep_from, self._open_note[0])
+        if keep_from > self._pitches_start:
+            self._pitches = self._pitches[keep_from - self._pitches_start :]
+            self._pitches_start = keep_from
+
+    def _get_note_stats(self) -> SegmentStats:
+        if self._note_stats is None:
+            self._note_stats = SegmentStats(np.array(self._notes_for_estimates))
+        return self._note_stats
+
+    def _regular_note_length(self) -> int:
+        if len(self._notes_for_estimates) < 3:
+            return int(self.frame_rate / NOTES_PER_SEC)
+        return int(self._get_note_stats().regular_note_length)
+
+    def _note_thresholds(self) -> tuple[float, float]:
+        if len(self._notes_for_estimates) < 3:
+            regular_length = self._regular_note_length()
+            return (0.3 * regular_length, 2 * regular_length)
+        return self._get_note_stats().note_thresholds
+
+    def _pause_thresholds(self) -> tuple[float, float]:
+        # Until we've seen a pause between words, we can't tell them from pauses within words,
+        # so a pause between words has to be at least some portion of a note.
+        min_long_pause_threshold = 0.4 * self._regular_note_length()
+        if len(self._raw_segments) < 3:
+            return (1, min_long_pause_threshold)
+        if self._raw_segment_stats is None:
+            self._raw_segment_stats = SegmentStats(np.array(self._raw_segments))
+        short_pause_threshold, long_pause_threshold = (
+            self._raw_segment_stats.pause_thresholds
+        )
+        return (
+            short_pause_threshold,
+            max(long_pause_threshold, min_long_pause_threshold),
+        )
+
+
+class WordInterpreter:
+    """Finds the best match for words one at a time, as they're emitted by an `IncrementalAnalyser`.
+
+    This does the same as `interpret_notes_strings`, keeping track of key changes.
+    """
+
+    def __init__(self) -> None:
+        # the nr of semitones by which the words are transposed, after key changes
+        self.d_offset: int = 0
+
+    def interpret(self, word: list[Note]) -> tuple[str, list[Word] | None]:
+        """Finds the best match for the next word.
+
+        Parameters
+        ----------
+        word : list[Note]
+            The notes of the word.
+
+        Returns
+        -------
+        tuple[str, list[Word] | None]
+            The notes string of the word, transposed after key changes, and the match,
+            possibly preceeded by a word indicating a key change, or `None` if there isn't any.
+        """
+        notes_string = pitch_string_by(turn_into_notes_strings(word)[0], self.d_offset)
+        match = find_closest_words_for_notes_string(notes_string)
+        if match is None:
+            return (notes_string, None)
+        words, d_offset = match
+        self.d_offset += d_offset
+        return (notes_string, words)
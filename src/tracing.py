@@ -0,0 +1,177 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import json
+import os
+import threading
+import time
+from typing import Any, Iterator
+
+
+@dataclass
+class Span:
+    """The time spent in a single stage of an analysis, and on what amount of data."""
+
+    name: str
+    # when the stage started, in seconds since the start of the trace
+    start: float
+    # wall and CPU time spent in the stage, in seconds, including its sub stages
+    wall_time: float = 0
+    cpu_time: float = 0
+    # the sizes of the arrays and lists the stage worked on, like `{"frames": 2400}`
+    sizes: dict[str, int] = field(default_factory=dict)
+    children: "list[Span]" = field(default_factory=list)
+    thread_id: int = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "start": self.start,
+            "wall_time": self.wall_time,
+            "cpu_time": self.cpu_time,
+            "sizes": self.sizes,
+            "children": [child.to_dict() for child in self.children],
+        }
+
+    def walk(self) -> "Iterator[Span]":
+        """This span, and all spans within it."""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+
+class Trace:
+    """The stages of an analysis, with how long each of them took.
+
+    Stages are recorded with `span`, while the trace is active (see `tracing`).
+    Stages within other stages are recorded as their children.
+    """
+
+    def __init__(self, name: str = "trace"):
+        self.name = name
+        self.spans: list[Span] = []
+        # the wall clock time at the start, for exporting, and the counter to measure against
+        self.created_at: float = time.time()
+        self._origin: float = time.perf_counter()
+        self._open: list[Span] = []
+
+    def walk(self) -> Iterator[Span]:
+        """All spans, in the order in which they started."""
+        for span in self.spans:
+            yield from span.walk()
+
+    def totals(self) -> dict[str, float]:
+        """The total wall time per name of a span, in seconds."""
+        totals: dict[str, float] = {}
+        for span in self.walk():
+            totals[span.name] = totals.get(span.name, 0) + span.wall_time
+        return totals
+
+    def over_budget(self, budgets: dict[str, float]) -> dict[str, float]:
+        """The stages that took longer than their budget in seconds, and how long they took."""
+        return {
+            name: total
+            for name, total in self.totals().items()
+            if name in budgets and total > budgets[name]
+        }
+
+    def to_json(self) -> str:
+        """Represents the trace as JSON, with the spans nested."""
+        return json.dumps(
+            {
+                "name": self.name,
+                "created_at": self.created_at,
+                "spans": [span.to_dict() for span in self.spans],
+            }
+        )
+
+    def to_chrome_trace(self) -> str:
+        """Represents the trace in the Chrome trace event format.
+
+        The result can be opened in `chrome://tracing` or in Perfetto.
+        """
+        events = [
+            {
+                "name": span.name,
+                "ph": "X",
+                "ts": span.start * 1e6,
+                "dur": span.wall_time * 1e6,
+                "pid": os.getpid(),
+                "tid": span.thread_id,
+                "args": {"cpu_time_ms": span.cpu_time * 1e3} | span.sizes,
+            }
+            for span in self.walk()
+        ]
+        return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
+
+    def save(self, path: str, chrome: bool = False) -> None:
+        """Appends the trace to a file, as a line of JSON."""
+        with open(path, "a", encoding="utf-8") as f:
+            f.write((self.to_chrome_trace() if chrome else self.to_json()) + "\n")
+
+
+_current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+
+
+@contextmanager
+def tracing(name: str = "trace") -> Iterator[Trace]:
+    """Records the spans within this context in a new `Trace`.
+
+    Parameters
+    ----------
+    name : str, optional
+        What is traced, by default "trace"
+
+    Yields
+    ------
+    Trace
+        The trace, which is complete after leaving the context.
+    """
+    trace = Trace(name)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(name: str, **sizes: int) -> Iterator[Span]:
+    """Records the time spent within this context, if a trace is active.
+
+    Sizes that are only known afterwards can be added to the `sizes` of the span.
+    Without an active trace, the span isn't recorded anywhere, and nothing is measured.
+
+    Parameters
+    ----------
+    name : str
+        The name of the stage.
+    **sizes : int
+        The sizes of the data the stage works on.
+
+    Yields
+    ------
+    Span
+        The span that's being recorded.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield Span(name, 0, sizes=dict(sizes))
+        return
+
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    new_span = Span(
+        name,
+        wall_start - trace._origin,
+        sizes=dict(sizes),
+        thread_id=threading.get_ident(),
+    )
+    (trace._open[-1].children if trace._open else trace.spans).append(new_span)
+    trace._open.append(new_span)
+    try:
+        yield new_span
+    finally:
+        new_span.wall_time = time.perf_counter() - wall_start
+        new_span.cpu_time = time.thread_time() - cpu_start
+        trace._open.pop()
@@ -45,6 +45,43 @@ def generate_phase_continuous_wave(
     return wave
 
 
+def audible_freq_timeline(
+    frequency_segments: list[floatlist],
+    sample_rate: int = SAMPLE_RATE,
+    silence_threshold: float = 0.1,
+) -> floatlist:
+    """Concatenates the frequency values of the notes, leaving out what wouldn't be heard.
+
+    This is what a pitch analysis of the output of `generate_phase_continuous_wave` would find,
+    without having to generate the wave and analyse it.
+
+    Parameters
+    ----------
+    frequency_segments : list[floatlist]
+        For every note, a `np.array` of frequency values over time, one value per audio sample.
+    sample_rate : int, optional
+        The sample rate, by default SAMPLE_RATE := 44100
+    silence_threshold : float, optional
+        Samples where the amplitude is below this value are considered silent, by default 0.1
+
+    Returns
+    -------
+    floatlist
+        The frequency value per sample, `nan` for rests and for samples that are faded out.
+    """
+    if len(frequency_segments) == 0:
+        return np.array([])
+    frequencies = np.concatenate(frequency_segments)
+    amplitudes = np.concatenate(
+        [
+            get_amplitutude_segment(len(f_s), sample_rate=sample_rate)
+            for f_s in frequency_segments
+        ]
+    )
+    audible = (frequencies > 0) & (amplitudes >= silence_threshold)
+    return np.where(audible, frequencies, np.nan)
+
+
 def get_amplitutude_segment(
     length: int,
     fade_duration_sec: float = NOTE_FADE_DURATION_SEC,
@@ -229,28 +266,28 @@ def freq_timeline_from_string(
             continue
 
         # If we encounter symbols representing augmentations, we alter the note we just added accordingly.
-        if s[i] == Augmentation.LONG.value:
+        if s[i] == Augmentation.LONG.symbol:
             freq_timeline_segments[-1] = apply_lengthen(freq_timeline_segments[-1], speed, sample_rate, 1)  # type: ignore
             i += 1
             continue
-        if s[i] == Augmentation.TRILL_UP.value:
+        if s[i] == Augmentation.TRILL_UP.symbol:
             freq_timeline_segments[-1] = apply_trill(freq_timeline_segments[-1], speed, sample_rate, 2)  # type: ignore
             i += 1
             continue
-        if s[i] == Augmentation.TRILL_DOWN.value:
+        if s[i] == Augmentation.TRILL_DOWN.symbol:
             freq_timeline_segments[-1] = apply_trill(freq_timeline_segments[-1], speed, sample_rate, -2)  # type: ignore
             i += 1
             continue
         # This one is slightly more complicated bc it can indicate a slide between notes
         if (
             symbol := s[i]
-        ) == Augmentation.SLIDE_UP.value or symbol == Augmentation.SLIDE_DOWN.value:
+        ) == Augmentation.SLIDE_UP.symbol or symbol == Augmentation.SLIDE_DOWN.symbol:
             start: float = freq_timeline_segments[-1][-1]  # type: ignore
             i += 1
 
             found_digits_after: bool = any(c.isdigit() for c in s[i:])
             if i == len(s) or not found_digits_after:
-                if symbol == Augmentation.SLIDE_UP.value:
+                if symbol == Augmentation.SLIDE_UP.symbol:
                     dest: float = start * 2 ** (7 / 12)
                 else:
                     dest = start * 2 ** (-7 / 12)
@@ -1,19 +1,45 @@
-from math import log
+from bisect import bisect_right
+import hashlib
+import os
 import re
 import numpy as np
-from itertools import pairwise, product
-import parselmouth
+import numpy.typing as npt
+from functools import lru_cache
+from typing import cast
+from itertools import product
 
-from src.augmentation import Augmentation
+from src.augmentation import AUGMENTATION_SYMBOLS, Augmentation
 from src.constants import (
     FREQ_ROOT,
     VAR_THRESHOLD_FOR_LONG_NOTE,
 )
-from src.my_types import floatlist, segbounds
-from src.note import Note
-from src.file_management import load_words_from_folder
+from src.file_management import NEIGHBOURHOOD_TABLE_FILE
+from src.lexicon import LEXICON
+from src.lexicon_matrices import LexiconMatrices
+from src.my_types import boollist, floatlist, intlist, segbounds
+from src.neighbourhood_table import (
+    NeighbourhoodTable,
+    substitution_cost,
+    substitution_neighbours,
+)
+from src.note import NoteArray, turn_into_notes_strings
+from src.notes_trie import NotesTrie, TrieNote
+from src.segment_stats import SegmentStats
+from src.tracing import span
+from src.pitch_tracking import (
+    DEFAULT_PITCH_BACKEND,
+    ChunkedBackend,
+    PitchBackend,
+    PitchTrack,
+    default_time_step,
+    frame_times,
+)
 from src.util import split_numeric_part
-from src.wave_generation import marginify_wave
+from src.wave_generation import (
+    audible_freq_timeline,
+    freq_timeline_from_string,
+    marginify_wave,
+)
 from src.word import (
     InvalidWordException,
     NumberWord,
@@ -21,9 +47,40 @@ from src.word import (
     is_number_notes_string,
     notes_string_to_number,
 )
-from src.words_functions import get_prevalence
+from src.words_functions import PREVALENCES, get_prevalence
+
+WORDS = LEXICON.words
+WORDS_BY_NOTES_STRING = LEXICON.by_notes_string
+
+# the nr of segments that are classified together, in a matrix padded to the longest of them
+SEGMENTS_PER_BATCH = 256
+
+# Pauses within this factor of the long pause threshold could go either way, so the decoder
+# tries both, at a cost proportional to how far the pause is from the threshold.
+AMBIGUOUS_PAUSE_FACTOR = 1.5
+# the cost of ignoring the pause threshold, for a pause at the edge of the ambiguous range
+BOUNDARY_CHANGE_COST = 1
+# the cost of a word without a match, compared to 1 for every change needed for a match
+UNMATCHED_WORD_COST = 3
+# how many notes ahead the decoder looks for the end of a word
+MAX_NOTES_PER_WORD = 10
 
-WORDS = load_words_from_folder()
+# the cost of a note that's missing from or extra in a notes string, compared to a word
+NOTE_INDEL_COST = 2
+
+# to change whenever the way words are matched changes, such that old neighbourhood tables
+# (see `build_neighbourhood_table`) are no longer used
+MATCHING_VERSION = 1
+
+# the augmentations of a note, by the characters representing them in a notes string
+AUGMENTATIONS_BY_SYMBOLS = {symbols: i for i, symbols in enumerate(AUGMENTATION_SYMBOLS)}
+
+# the nr of bins per semitone in the histogram used to estimate the tuning of a recording
+TUNING_BINS = 100
+# how much the tuning is allowed to drift within a recording, in semitones
+TUNING_DRIFT = 0.1
+# notes further than this from the most common tuning aren't taken into account for its average
+TUNING_TOLERANCE = 0.35
 
 
 def analyse_recording_to_notes(
@@ -31,11 +88,14 @@ def analyse_recording_to_notes(
     sample_rate_recording: int,
     f_min: float = 300,
     f_max: float = 4000,
-) -> tuple[list[Note], segbounds, list[bool], float, int]:
+    backend: PitchBackend = DEFAULT_PITCH_BACKEND,
+    decode_boundaries: bool = False,
+    workers: int = 1,
+) -> tuple[NoteArray, segbounds, list[bool], float, int, PitchTrack]:
     """Extracts from a recording: the notes, when the notes occur, and the offset of the root from C.
 
-    This analysis relies on the Parselmouth package. It uses `parselmouth.Sound` and `snd.to_pitch_ac`.
-    This output is then processed further, to the format described below.
+    The pitch over time is determined by a `PitchBackend`, by default the one relying on
+    the Parselmouth package. This output is then processed further, to the format described below.
 
     Parameters
     ----------
@@ -47,57 +107,65 @@ def analyse_recording_to_notes(
         The lowest frequency to detect in the recording.
     f_max : float
         The highest frequency to detect in the recording.
+    backend : PitchBackend, optional
+        The pitch analysis to use, by default `DEFAULT_PITCH_BACKEND`
+    decode_boundaries : bool, optional
+        Whether to reconsider ambiguous word boundaries with `decode_word_boundaries`,
+        by default `False`
+    workers : int, optional
+        The nr of processes for the pitch analysis, by default 1. With more than one,
+        long recordings are split at long pauses and the parts are analysed in parallel,
+        see `ChunkedBackend`. Everything after the pitch analysis sees the whole recording,
+        so the root and the word boundaries are determined the same way either way.
 
     Returns
     -------
-    tuple[list[Note], segbounds, list[bool], float, int]
+    tuple[NoteArray, segbounds, list[bool], float, int, PitchTrack]
         A `tuple`, with the following information:
-        - The notes in the recording, represented by a `list` of `Note` objects.
-        - The bounds of these notes, represented by a `list` of `tuples`, each with two `int`s,
-            representing the start and end of each note, in terms of indices of the samples
+        - The notes in the recording, represented by a `NoteArray`.
+        - The bounds of these notes, represented by an `(n, 2)` `np.array` of `int`s,
+            holding the start and end of each note, in terms of indices of the samples
             of the output of the pitch analysis (approx 400 samples per second).
         - A list of flags indicating which notes are the first of a word.
         - The distance of the determined root of the recording from C in semitones.
             If the sentence is in D, this value will be 2.
         - The sample rate in the pitch analysis.
+        - The output of the pitch analysis, for reuse.
     """
-    snd = parselmouth.Sound(recording, sampling_frequency=sample_rate_recording)  # type: ignore
-    parselmouth_output = snd.to_pitch_ac(  # type: ignore
-        pitch_floor=f_min,
-        pitch_ceiling=f_max,
-        silence_threshold=0.1,
-    )
-    freqs: floatlist = np.array(parselmouth_output.selected_array["frequency"])  # type: ignore
-    segment_bounds_raw = find_segment_bounds_parselmouth(freqs)
+    if workers > 1:
+        backend = ChunkedBackend(backend, workers)
+    with span("pitch tracking", samples=len(recording)) as stage:
+        freqs, _ = backend.track(recording, sample_rate_recording, f_min, f_max)
+        stage.sizes["frames"] = len(freqs)
 
-    segment_bounds = process_segments(segment_bounds_raw)
+    with span("segmentation", frames=len(freqs)) as stage:
+        segment_bounds_raw = find_segment_bounds_parselmouth(freqs)
+        segment_bounds = process_segments(segment_bounds_raw)
+        stage.sizes["segments"] = len(segment_bounds)
 
     float_pitches = freqs_to_float_pitches(freqs)
 
-    regular_length = determine_regular_note_length(segment_bounds)
-    _, long_note_threshold = determine_note_thresholds(segment_bounds)
+    stats = SegmentStats(segment_bounds)
+    regular_length = stats.regular_note_length
+    _, long_note_threshold = stats.note_thresholds
 
-    float_notes_and_augmentations: list[tuple[float, list[Augmentation]]] = [
-        determine_float_note_and_augmentations_of_segment(
-            float_pitches[lower_bound:upper_bound], regular_length, long_note_threshold
+    with span("augmentations", segments=len(segment_bounds)):
+        float_notes, augmentations = (
+            determine_float_notes_and_augmentations_of_segments(
+                float_pitches, segment_bounds, regular_length, long_note_threshold
+            )
         )
-        for lower_bound, upper_bound in segment_bounds
-    ]
-
-    float_notes: list[float] = [
-        float_note for float_note, _ in float_notes_and_augmentations
-    ]
-    augmentations: list[list[Augmentation]] = [
-        augmentation_per_note
-        for _, augmentation_per_note in float_notes_and_augmentations
-    ]
-    normalised_float_notes, offset = normalise_float_notes(float_notes)
 
-    lengths = [upper_bound - lower_bound for lower_bound, upper_bound in segment_bounds]
+    lengths: list[int] = stats.note_lengths.tolist()
+    with span("root", notes=len(lengths)):
+        normalised_float_notes, offset = normalise_float_notes(
+            float_notes.tolist(), lengths
+        )
 
-    _, long_pause_threshold = determine_pause_thresholds(segment_bounds)
-    pauses = determine_pause_lengths(segment_bounds)
-    new_word_flags = [True] + [pause > long_pause_threshold for pause in pauses]
+    _, long_pause_threshold = stats.pause_thresholds
+    new_word_flags: list[bool] = [True] + (
+        stats.pause_lengths > long_pause_threshold
+    ).tolist()
 
     for i in range(1, len(new_word_flags)):
         if new_word_flags[i]:
@@ -107,12 +175,13 @@ def analyse_recording_to_notes(
             if unexpected_one_note_word:
                 new_word_flags[i] = False
 
-    notes: list[Note] = [
-        Note(pitch, length, augmentation_list, new_word)
-        for pitch, length, augmentation_list, new_word in zip(
-            normalised_float_notes, lengths, augmentations, new_word_flags
-        )
-    ]
+    notes = NoteArray(normalised_float_notes, lengths, augmentations, new_word_flags)
+    if decode_boundaries:
+        with span("word boundaries", notes=len(notes)):
+            notes.first_of_word = decode_word_boundaries(
+                notes, stats.pause_lengths, long_pause_threshold
+            )
+        new_word_flags = notes.first_of_word.tolist()
 
     return (
         notes,
@@ -120,6 +189,13 @@ def analyse_recording_to_notes(
         new_word_flags,
         offset,
         sample_rate_recording * len(freqs) // (len(recording)),
+        PitchTrack(
+            frame_times(
+                len(recording), sample_rate_recording, f_min, default_time_step(f_min)
+            ),
+            freqs,
+            float_pitches,
+        ),
     )
 
 
@@ -135,23 +211,18 @@ def find_segment_bounds_parselmouth(freqs: floatlist) -> segbounds:
     Returns
     -------
     segbounds
-        The bounds of the notes, represented by a `list` of `tuples`, each with two `int`s,
-        representing the start and end of each note, in terms of indices of the samples
+        The bounds of the notes, represented by an `(n, 2)` `np.array` of `int`s,
+        holding the start and end of each note, in terms of indices of the samples
         of the output of the pitch analysis (approx 400 samples per second).
     """
     assert len(freqs) >= 1, "amps has to be non-empty"
 
-    segment_bounds: segbounds = []
+    # Pad with silence on both ends, such that every note has both an onset and an ending
+    voiced = np.concatenate([[0], freqs != 0, [0]]).astype(np.int8)
+    changes = np.flatnonzero(np.diff(voiced))
 
-    active_lower_bound: int = -1
-    for i in range(len(freqs)):
-        if freqs[i] != 0 and active_lower_bound == -1:
-            active_lower_bound = i
-        elif freqs[i] == 0 and active_lower_bound != -1:
-            segment_bounds.append((active_lower_bound, i))
-            active_lower_bound = -1
-    if active_lower_bound != -1:
-        segment_bounds.append((active_lower_bound, len(freqs)))
+    # Onsets and endings alternate, so we can pair them up directly
+    segment_bounds: segbounds = changes.reshape(-1, 2)
 
     return segment_bounds
 
@@ -162,8 +233,8 @@ def determine_regular_note_length(segments: segbounds) -> float:
     Parameters
     ----------
     segments : segbounds
-        The bounds of these notes, represented by a `list` of `tuples`, each with two `int`s,
-        representing the start and end of each note, in terms of indices of the samples
+        The bounds of these notes, represented by an `(n, 2)` `np.array` of `int`s,
+        holding the start and end of each note, in terms of indices of the samples
         of the output of the pitch analysis (approx 400 samples per second).
 
     Returns
@@ -171,15 +242,7 @@ def determine_regular_note_length(segments: segbounds) -> float:
     float
         The regular note length
     """
-    lengths = [upper_bound - lower_bound for lower_bound, upper_bound in segments]
-    if len(lengths) == 0:
-        return 0
-    if len(lengths) == 1:
-        return lengths[0]
-    lengths_sorted = sorted(lengths)
-    shortest_part = lengths_sorted[: len(lengths_sorted) * 2 // 3]
-    regular_segment_length = int(np.median(shortest_part))
-    return regular_segment_length
+    return SegmentStats(segments).regular_note_length
 
 
 def determine_regular_pause_length(segment_bounds: segbounds) -> float:
@@ -188,8 +251,8 @@ def determine_regular_pause_length(segment_bounds: segbounds) -> float:
     Parameters
     ----------
     segments : segbounds
-        The bounds of these notes, represented by a `list` of `tuples`, each with two `int`s,
-        representing the start and end of each note, in terms of indices of the samples
+        The bounds of these notes, represented by an `(n, 2)` `np.array` of `int`s,
+        holding the start and end of each note, in terms of indices of the samples
         of the output of the pitch analysis (approx 400 samples per second).
 
     Returns
@@ -197,15 +260,7 @@ def determine_regular_pause_length(segment_bounds: segbounds) -> float:
     float
         The regular pause length
     """
-    lengths = determine_pause_lengths(segment_bounds)
-    if len(lengths) == 0:
-        return 0
-    if len(lengths) == 1:
-        return lengths[0]
-    lengths_sorted = sorted(lengths)
-    shortest_part = lengths_sorted[: len(lengths_sorted) * 2 // 3]
-    regular_pause_length = int(np.median(shortest_part))
-    return regular_pause_length
+    return SegmentStats(segment_bounds).regular_pause_length
 
 
 def process_segments(segment_bounds: segbounds) -> segbounds:
@@ -219,8 +274,8 @@ def process_segments(segment_bounds: segbounds) -> segbounds:
     Parameters
     ----------
     segment_bounds : segbounds
-        The bounds of the notes, represented by a `list` of `tuples`, each with two `int`s,
-        representing the start and end of each note, in terms of indices of the samples
+        The bounds of the notes, represented by an `(n, 2)` `np.array` of `int`s,
+        holding the start and end of each note, in terms of indices of the samples
         of the output of the pitch analysis (approx 400 samples per second).
 
     Returns
@@ -228,12 +283,12 @@ def process_segments(segment_bounds: segbounds) -> segbounds:
     segbounds
         The (hopefully) corrected bounds of the notes, in the same format.
     """
-    short_pause_threshold, _ = determine_pause_thresholds(segment_bounds)
+    short_pause_threshold, _ = SegmentStats(segment_bounds).pause_thresholds
     segment_bounds_merged = merge_segment_bounds_with_distance(
         segment_bounds, short_pause_threshold
     )
 
-    short_note_threshold, _ = determine_note_thresholds(segment_bounds_merged)
+    short_note_threshold, _ = SegmentStats(segment_bounds_merged).note_thresholds
     segment_bounds_filtered = filter_segment_bounds_below_min_length(
         segment_bounds_merged, short_note_threshold
     )
@@ -251,8 +306,8 @@ def determine_pause_thresholds(
     Parameters
     ----------
     segment_bounds : segbounds
-        The bounds of the notes, represented by a `list` of `tuples`, each with two `int`s,
-        representing the start and end of each note, in terms of indices of the samples
+        The bounds of the notes, represented by an `(n, 2)` `np.array` of `int`s,
+        holding the start and end of each note, in terms of indices of the samples
         of the output of the pitch analysis (approx 400 samples per second).
     short_factor : float, optional
         The proportion to the average pause length below which pauses
@@ -266,57 +321,26 @@ def determine_pause_thresholds(
     tuple[float, float]
         The lower and upper bounds of a regular pause length, respectively.
     """
-    regular_length = determine_regular_pause_length(segment_bounds)
-    short_pause_threshold = regular_length * short_factor
-    long_pause_threshold_guess = regular_length * long_factor
-    all_lengths = determine_pause_lengths(segment_bounds)
-    relevant_lengths = [
-        length
-        for length in all_lengths
-        if length >= regular_length and length < long_pause_threshold_guess
-    ]
-    higher_lengths = [
-        length for length in all_lengths if length >= long_pause_threshold_guess
-    ]
-    if higher_lengths:
-        relevant_lengths.append(min(higher_lengths))
-    sorted_relevant_lengths = list(sorted(relevant_lengths))
-    if len(sorted_relevant_lengths) == 0:
-        return (0, 0)
-    if len(sorted_relevant_lengths) == 1:
-        return (sorted_relevant_lengths[0] - 1, sorted_relevant_lengths[0] + 1)
-    if len(all_lengths) == 2 and all_lengths[1] < 2 * all_lengths[0]:
-        return (all_lengths[0] - 1, all_lengths[1] + 1)
-    index_of_last_short_pause = np.argmax(np.diff(sorted_relevant_lengths))
-    if sorted_relevant_lengths[-1] < long_pause_threshold_guess:
-        long_pause_threshold = long_pause_threshold_guess
-    else:
-        long_pause_threshold = (
-            sorted_relevant_lengths[index_of_last_short_pause]
-            + sorted_relevant_lengths[index_of_last_short_pause + 1]
-        ) / 2
-    return (short_pause_threshold, long_pause_threshold)
+    stats = SegmentStats(segment_bounds, pause_factors=(short_factor, long_factor))
+    return stats.pause_thresholds
 
 
-def determine_pause_lengths(segment_bounds: segbounds) -> list[float]:
+def determine_pause_lengths(segment_bounds: segbounds) -> intlist:
     """Finds the lengths of pauses between the notes.
 
     Parameters
     ----------
     segment_bounds : segbounds
-        The bounds of the notes, represented by a `list` of `tuples`, each with two `int`s,
-        representing the start and end of each note, in terms of indices of the samples
+        The bounds of the notes, represented by an `(n, 2)` `np.array` of `int`s,
+        holding the start and end of each note, in terms of indices of the samples
         of the output of the pitch analysis (approx 400 samples per second).
 
     Returns
     -------
-    list[float]
-        The pauses between the notes (so the length of this `list` will be 1 less than input).
+    intlist
+        The pauses between the notes (so the length of this `np.array` will be 1 less than input).
     """
-    return [
-        lower_bound2 - upper_bound1
-        for (_, upper_bound1), (lower_bound2, _) in pairwise(segment_bounds)
-    ]
+    return segment_bounds[1:, 0] - segment_bounds[:-1, 1]
 
 
 def determine_note_thresholds(
@@ -329,8 +353,8 @@ def determine_note_thresholds(
     Parameters
     ----------
     segment_bounds : segbounds
-        The bounds of the notes, represented by a `list` of `tuples`, each with two `int`s,
-        representing the start and end of each note, in terms of indices of the samples
+        The bounds of the notes, represented by an `(n, 2)` `np.array` of `int`s,
+        holding the start and end of each note, in terms of indices of the samples
         of the output of the pitch analysis (approx 400 samples per second).
     short_factor : float, optional
         The proportion to the average note length below which notes
@@ -344,35 +368,8 @@ def determine_note_thresholds(
     tuple[float, float]
         The lower and upper bounds of a regular note length, respectively.
     """
-    regular_length = determine_regular_note_length(segment_bounds)
-    short_note_threshold = regular_length * short_factor
-    long_note_threshold_max = regular_length * long_factor
-    all_lengths = [u - l for l, u in segment_bounds]
-    relevant_lengths = [
-        length
-        for length in all_lengths
-        if length >= regular_length and length < long_note_threshold_max
-    ]
-    higher_lengths = [
-        length for length in all_lengths if length >= long_note_threshold_max
-    ]
-    if higher_lengths:
-        relevant_lengths.append(min(higher_lengths))
-    sorted_relevant_lengths = list(sorted(relevant_lengths))
-    if len(sorted_relevant_lengths) == 0:
-        return (0, 0)
-    if len(sorted_relevant_lengths) == 1:
-        return (sorted_relevant_lengths[0] - 1, sorted_relevant_lengths[0] + 1)
-    index_of_last_short_note = np.argmax(np.diff(sorted_relevant_lengths))
-    if sorted_relevant_lengths[-1] < long_note_threshold_max:
-        long_note_threshold = long_note_threshold_max
-    else:
-        long_note_threshold = (
-            sorted_relevant_lengths[index_of_last_short_note]
-            + sorted_relevant_lengths[index_of_last_short_note + 1]
-        ) / 2
-
-    return (short_note_threshold, long_note_threshold)
+    stats = SegmentStats(segment_bounds, note_factors=(short_factor, long_factor))
+    return stats.note_thresholds
 
 
 def merge_segment_bounds_with_distance(
@@ -383,8 +380,8 @@ def merge_segment_bounds_with_distance(
     Parameters
     ----------
     segment_bounds : segbounds
-        The bounds of the notes, represented by a `list` of `tuples`, each with two `int`s,
-        representing the start and end of each note, in terms of indices of the samples
+        The bounds of the notes, represented by an `(n, 2)` `np.array` of `int`s,
+        holding the start and end of each note, in terms of indices of the samples
         of the output of the pitch analysis (approx 400 samples per second).
     distance : float, optional
         The distance up to and including which to merge for, by default 3
@@ -394,17 +391,15 @@ def merge_segment_bounds_with_distance(
     segbounds
         The merged segment bounds, in the same format as the input.
     """
-    merged: segbounds = []
-    i = 0
-    while i < len(segment_bounds):
-        j = i
-        while (
-            j < len(segment_bounds) - 1
-            and segment_bounds[j + 1][0] - segment_bounds[j][1] <= distance
-        ):
-            j += 1
-        merged.append((segment_bounds[i][0], segment_bounds[j][1]))
-        i = j + 1
+    if len(segment_bounds) == 0:
+        return segment_bounds
+
+    # A gap that's too big to close separates the previous merged note from the next one
+    separated = determine_pause_lengths(segment_bounds) > distance
+    onsets = segment_bounds[np.concatenate([[True], separated]), 0]
+    endings = segment_bounds[np.concatenate([separated, [True]]), 1]
+
+    merged: segbounds = np.stack([onsets, endings], axis=1)
     return merged
 
 
@@ -416,8 +411,8 @@ def filter_segment_bounds_below_min_length(
     Parameters
     ----------
     segment_bounds : segbounds
-        The bounds of the notes, represented by a `list` of `tuples`, each with two `int`s,
-        representing the start and end of each note, in terms of indices of the samples
+        The bounds of the notes, represented by an `(n, 2)` `np.array` of `int`s,
+        holding the start and end of each note, in terms of indices of the samples
         of the output of the pitch analysis (approx 400 samples per second).
     min_length : float, optional
         The note length below which to remove notes, by default 2
@@ -427,11 +422,8 @@ def filter_segment_bounds_below_min_length(
     segbounds
         The merged segment bounds, in the same format as the input.
     """
-    filtered: segbounds = [
-        (lower_bound, upper_bound)
-        for lower_bound, upper_bound in segment_bounds
-        if upper_bound - lower_bound >= min_length
-    ]
+    lengths = segment_bounds[:, 1] - segment_bounds[:, 0]
+    filtered: segbounds = segment_bounds[lengths >= min_length]
     return filtered
 
 
@@ -451,11 +443,14 @@ def freqs_to_float_pitches(freqs: floatlist, freq_root: float = FREQ_ROOT) -> fl
         Pitch values, `0` for `freq_root`, and for example `2` for a frequency
         a whole tone above `freq_root`
     """
-    freqs_normalised_to_root: floatlist = freqs / freq_root
-    pitches: list[float] = [
-        log(freq, 2) * 12 if freq > 0 else np.nan for freq in freqs_normalised_to_root
-    ]
-    pitches_floatlist: floatlist = np.array(pitches)
+    freqs_normalised_to_root: floatlist = np.asarray(freqs, dtype=float) / freq_root
+    voiced = freqs_normalised_to_root > 0
+    octaves: floatlist = np.log2(
+        freqs_normalised_to_root,
+        out=np.full(len(freqs_normalised_to_root), np.nan),
+        where=voiced,
+    )
+    pitches_floatlist: floatlist = octaves * 12
     return pitches_floatlist
 
 
@@ -465,7 +460,7 @@ def determine_float_note_and_augmentations_of_segment(
     long_note_threshold: float,
     diff_threshold: float = 0.5,
     var_threshold: float = VAR_THRESHOLD_FOR_LONG_NOTE,
-) -> tuple[float, list[Augmentation]]:
+) -> tuple[float, Augmentation]:
     """Determines the pitch value (not rounded) and augmentations for a single note.
 
     Parameters
@@ -485,18 +480,18 @@ def determine_float_note_and_augmentations_of_segment(
 
     Returns
     -------
-    tuple[float, list[Augmentation]]
+    tuple[float, Augmentation]
         - A single pith value for the (start of the) note.
-        - A `list` of augmentations (see augmentation.py).
+        - The augmentations (see augmentation.py).
     """
     # If the segment is deliberatly augmented, it is expected to be longer than the threshold value
     if len(float_pitches) < long_note_threshold:
         start_pitch = float(np.nanmedian(float_pitches))
-        return (start_pitch, [])
+        return (start_pitch, Augmentation(0))
 
     start_pitch = float(np.nanmedian(float_pitches[:regular_length]))
 
-    augmentations: list[Augmentation] = []
+    augmentations = Augmentation(0)
 
     # Assess for long notes
     length_to_check_for_long_note: int = min(
@@ -505,7 +500,7 @@ def determine_float_note_and_augmentations_of_segment(
     )
     var_of_start = np.var(float_pitches[:length_to_check_for_long_note])
     if var_of_start < var_threshold:
-        augmentations.append(Augmentation.LONG)
+        augmentations |= Augmentation.LONG
         float_pitches_rest = float_pitches[length_to_check_for_long_note:]
     else:
         float_pitches_rest = float_pitches[regular_length:]
@@ -530,30 +525,202 @@ def determine_float_note_and_augmentations_of_segment(
             max_diff_index = i
 
     if trill_mag > 0:
-        augmentations.append(Augmentation.TRILL_UP)
+        augmentations |= Augmentation.TRILL_UP
     if trill_mag < 0:
-        augmentations.append(Augmentation.TRILL_DOWN)
+        augmentations |= Augmentation.TRILL_DOWN
 
     # Assess for slides
     if float_pitches[-1] - start_pitch > 2:
-        augmentations.append(Augmentation.SLIDE_UP)
+        augmentations |= Augmentation.SLIDE_UP
     if float_pitches[-1] - start_pitch < -2:
-        augmentations.append(Augmentation.SLIDE_DOWN)
+        augmentations |= Augmentation.SLIDE_DOWN
 
     return (start_pitch, augmentations)
 
 
-def normalise_float_notes(float_notes: list[float]) -> tuple[list[float], float]:
+def determine_float_notes_and_augmentations_of_segments(
+    float_pitches: floatlist,
+    segment_bounds: segbounds,
+    regular_length: int,
+    long_note_threshold: float,
+    diff_threshold: float = 0.5,
+    var_threshold: float = VAR_THRESHOLD_FOR_LONG_NOTE,
+) -> tuple[floatlist, npt.NDArray[np.uint8]]:
+    """Determines the pitch values (not rounded) and augmentations for all notes at once.
+
+    Gives the same results as `determine_float_note_and_augmentations_of_segment` for
+    every segment, but handles the segments in batches, sorted by length and padded with
+    `nan`s into a matrix, so that the trills are found without looping over the samples.
+
+    Parameters
+    ----------
+    float_pitches : floatlist
+        The pitch values for every sample of the output of the pitch analysis.
+    segment_bounds : segbounds
+        The bounds of the notes, represented by an `(n, 2)` `np.array` of `int`s,
+        holding the start and end of each note, in terms of indices of `float_pitches`.
+    regular_length : int
+        The length we expect a note to be on average.
+    long_note_threshold : float
+        The threshold above which we consider a note intentionally enlongated.
+    diff_threshold : float, optional
+        The amount we expect a note to go up and back down for an intentional trill,
+        expressed in semitones, by default 0.5
+    var_threshold : float, optional
+        The max variance we expect the first part for a note that's elongated,
+        by default VAR_THRESHOLD_FOR_LONG_NOTE := 0.2
+
+    Returns
+    -------
+    tuple[floatlist, npt.NDArray[np.uint8]]
+        - A single pith value for the (start of) every note.
+        - The augmentations of every note, as the values of `Augmentation`s.
+    """
+    starts = segment_bounds[:, 0]
+    lengths = segment_bounds[:, 1] - segment_bounds[:, 0]
+    start_pitches = np.zeros(len(segment_bounds))
+    augmentations = np.zeros(len(segment_bounds), dtype=np.uint8)
+
+    # If the segment is deliberatly augmented, it is expected to be longer than the threshold value
+    is_augmentable = lengths >= long_note_threshold
+    order = np.argsort(lengths, kind="stable")
+    for batch_start in range(0, len(order), SEGMENTS_PER_BATCH):
+        batch = order[batch_start : batch_start + SEGMENTS_PER_BATCH]
+        plain = batch[~is_augmentable[batch]]
+        if len(plain) > 0:
+            start_pitches[plain] = _nanmedian_of_rows(
+                _padded_segments(float_pitches, starts[plain], lengths[plain])
+            )
+        augmentable = batch[is_augmentable[batch]]
+        if len(augmentable) > 0:
+            (
+                start_pitches[augmentable],
+                augmentations[augmentable],
+            ) = _classify_augmentable_segments(
+                float_pitches,
+                starts[augmentable],
+                lengths[augmentable],
+                regular_length,
+                diff_threshold,
+                var_threshold,
+            )
+
+    return (start_pitches, augmentations)
+
+
+def _classify_augmentable_segments(
+    float_pitches: floatlist,
+    starts: intlist,
+    lengths: intlist,
+    regular_length: int,
+    diff_threshold: float,
+    var_threshold: float,
+) -> tuple[floatlist, npt.NDArray[np.uint8]]:
+    """Finds the start pitches and augmentations of segments that are long enough to have them."""
+    start_pitches = _nanmedian_of_rows(
+        _padded_segments(float_pitches, starts, np.minimum(lengths, regular_length))
+    )
+
+    # Assess for long notes, grouped by length, so that the variance is computed the same way
+    lengths_to_check_for_long_note = np.minimum(
+        lengths, round(3.3 * regular_length)  # 3.3 is picked from experimentation
+    )
+    is_long = np.zeros(len(starts), dtype=bool)
+    for length_to_check in np.unique(lengths_to_check_for_long_note):
+        group = lengths_to_check_for_long_note == length_to_check
+        starts_of_checks = starts[group, None] + np.arange(length_to_check)
+        is_long[group] = np.var(float_pitches[starts_of_checks], axis=1) < var_threshold
+    rest_offsets = np.where(
+        is_long, lengths_to_check_for_long_note, np.minimum(lengths, regular_length)
+    )
+
+    # Assess for trills: the state of the original loop, as it is before each sample
+    diffs = (
+        _padded_segments(float_pitches, starts + rest_offsets, lengths - rest_offsets)
+        - start_pitches[:, None]
+    )
+    abs_diffs = np.abs(diffs)
+    abs_diffs[np.isnan(abs_diffs)] = -np.inf
+    # the first column is the state before the first sample
+    abs_diffs = np.pad(abs_diffs, ((0, 0), (1, 0)))
+    diffs = np.pad(diffs, ((0, 0), (1, 0)))
+    max_so_far = np.maximum.accumulate(abs_diffs, axis=1)
+    positions = np.arange(abs_diffs.shape[1])
+    is_new_max = np.zeros(abs_diffs.shape, dtype=bool)
+    is_new_max[:, 1:] = abs_diffs[:, 1:] > max_so_far[:, :-1]
+    position_of_max = np.maximum.accumulate(np.where(is_new_max, positions, 0), axis=1)
+    # the max diff and its index as they are before each sample, and after the last one
+    max_diffs_and_final = np.take_along_axis(diffs, position_of_max, axis=1)
+    max_diffs = max_diffs_and_final[:, :-1]
+    max_diff_indices = np.maximum(position_of_max[:, :-1] - 1, 0)
+    diffs = diffs[:, 1:]
+
+    is_trill = (
+        (np.abs(max_diffs) > diff_threshold)  # if we've deviated significantly
+        & (np.abs(max_diffs - diffs) > diff_threshold)  # and gone back significantly
+        & (np.abs(diffs) < 2 * diff_threshold)  # and we've come back far enough
+        & (
+            positions[:-1] - max_diff_indices > regular_length / 2
+        )  # and it's taken enough time not to be a random blip
+    )
+    # the biggest trill is the last one, since the max diff only grows
+    last_trill = np.max(np.where(is_trill, positions[:-1], -1), axis=1, initial=-1)
+    trill_mags = np.where(
+        last_trill >= 0,
+        np.take_along_axis(
+            max_diffs_and_final, np.maximum(last_trill, 0)[:, None], axis=1
+        )[:, 0],
+        0,
+    )
+
+    # Assess for slides
+    slides = float_pitches[starts + lengths - 1] - start_pitches
+
+    augmentations = (
+        is_long * Augmentation.LONG
+        | (trill_mags > 0) * Augmentation.TRILL_UP
+        | (trill_mags < 0) * Augmentation.TRILL_DOWN
+        | (slides > 2) * Augmentation.SLIDE_UP
+        | (slides < -2) * Augmentation.SLIDE_DOWN
+    )
+    return (start_pitches, augmentations.astype(np.uint8))
+
+
+def _nanmedian_of_rows(matrix: floatlist) -> floatlist:
+    """The same as `np.nanmedian(matrix, axis=1)`, without the overhead of masked arrays."""
+    if matrix.shape[1] == 0:
+        return np.full(len(matrix), np.nan)
+    sorted_matrix = np.sort(matrix, axis=1)  # `nan`s are sorted to the end
+    counts = np.sum(~np.isnan(matrix), axis=1)
+    rows = np.arange(len(matrix))
+    upper = sorted_matrix[rows, counts // 2]
+    lower = sorted_matrix[rows, np.maximum(counts - 1, 0) // 2]
+    return np.where(counts % 2 == 1, upper, (lower + upper) / 2)
+
+
+def _padded_segments(
+    float_pitches: floatlist, starts: intlist, lengths: intlist
+) -> floatlist:
+    """Gathers segments of `float_pitches` into the rows of a matrix, padded with `nan`s."""
+    columns = np.arange(max(int(np.max(lengths)), 0))
+    indices = np.minimum(starts[:, None] + columns, len(float_pitches) - 1)
+    return np.where(columns < lengths[:, None], float_pitches[indices], np.nan)
+
+
+def normalise_float_notes(
+    float_notes: list[float], lengths: list[int] | None = None
+) -> tuple[list[float], float]:
     """Determines the most likely intended root, and subtracts this from all pitch values.
 
     We don't assume perfect pitch, so a sentence could be in any key. We change what `0` means
-    based on the provided recording. In doing this, we take into account that the first note could be off,
-    so we see what other notes are close enough to it, to probably be intended `0`s, and we take the average.
+    based on the provided recording, as estimated by `estimate_root`.
 
     Parameters
     ----------
     float_notes : list[float]
         The raw pitch values, which could start anywhere, but should start approximately at `0`.
+    lengths : list[int] | None, optional
+        The length of every note, to weigh the notes by, by default they're weighed equally.
 
     Returns
     -------
@@ -562,19 +729,98 @@ def normalise_float_notes(float_notes: list[float]) -> tuple[list[float], float]
     """
     assert len(float_notes) >= 1, "have to have at least one note"
 
-    first_notes: list[float] = [float_notes[0]]
-    for float_note in float_notes[1:]:
-        difference: float = float(abs(float_note - np.mean(first_notes)))
-        if difference < 0.75:
-            first_notes.append(float_note)
-
-    correction: float = float(np.mean(first_notes))
+    correction = estimate_root(float_notes, lengths)
 
     float_notes_normalised = np.array(float_notes) - correction
 
     return (list(float_notes_normalised), correction)
 
 
+def estimate_root(
+    float_notes: list[float] | floatlist, lengths: list[int] | intlist | None = None
+) -> float:
+    """Estimates the pitch of the root of a recording.
+
+    All notes of a recording are supposed to be whole semitones from the root, also after
+    key changes, so the part of the root below a semitone (the tuning) is estimated from
+    all notes at once, using `tuning_histogram` and `estimate_tuning`. The first note is
+    supposed to be the root, so that determines which semitone it is.
+
+    Parameters
+    ----------
+    float_notes : list[float] | floatlist
+        The raw pitch values, which could start anywhere, but should start approximately at `0`.
+    lengths : list[int] | intlist | None, optional
+        The length of every note, to weigh the notes by, by default they're weighed equally.
+
+    Returns
+    -------
+    float
+        The pitch of the root, relative to C.
+    """
+    assert len(float_notes) >= 1, "have to have at least one note"
+    tuning = estimate_tuning(tuning_histogram(float_notes, lengths))
+    return anchor_tuning(tuning, float(float_notes[0]))
+
+
+def tuning_histogram(
+    float_notes: list[float] | floatlist, lengths: list[int] | intlist | None = None
+) -> floatlist:
+    """Counts how long the notes are at every fraction of a semitone.
+
+    Parameters
+    ----------
+    float_notes : list[float] | floatlist
+        The raw pitch values.
+    lengths : list[int] | intlist | None, optional
+        The length of every note, by default 1 for every note.
+
+    Returns
+    -------
+    floatlist
+        The total length of the notes per bin, for `TUNING_BINS` bins from 0 up to 1 semitone.
+    """
+    bins = (np.mod(np.asarray(float_notes, dtype=float), 1) * TUNING_BINS).astype(int)
+    return np.bincount(
+        bins % TUNING_BINS, weights=lengths, minlength=TUNING_BINS
+    ).astype(float)
+
+
+def estimate_tuning(histogram: floatlist) -> float:
+    """Finds the most common fraction of a semitone in a histogram from `tuning_histogram`.
+
+    The histogram is wrapped around, since `0.99` is as close to `0` as `0.01`. It's smoothed
+    by `TUNING_DRIFT`, and we take the average of the notes around the highest peak,
+    ignoring notes more than `TUNING_TOLERANCE` away from it.
+
+    Parameters
+    ----------
+    histogram : floatlist
+        The total length of the notes per bin, for `TUNING_BINS` bins from 0 up to 1 semitone.
+
+    Returns
+    -------
+    float
+        The tuning of the notes, from `-0.5` up to `0.5` semitones.
+    """
+    centres = (np.arange(TUNING_BINS) + 0.5) / TUNING_BINS
+    # the distance between every two bins, wrapped around to [-0.5, 0.5)
+    distances = np.mod(centres[None, :] - centres[:, None] + 0.5, 1) - 0.5
+
+    smoothed = np.exp(-0.5 * (distances / TUNING_DRIFT) ** 2) @ histogram
+    peak = int(np.argmax(smoothed))
+
+    near_peak = np.abs(distances[peak]) < TUNING_TOLERANCE
+    weights = histogram * near_peak
+    tuning = centres[peak] + np.sum(weights * distances[peak]) / np.sum(weights)
+    return float(np.mod(tuning + 0.5, 1) - 0.5)
+
+
+def anchor_tuning(tuning: float, first_note: float) -> float:
+    """Finds the pitch with the given tuning closest to the first note, which is the root."""
+    return tuning + round(first_note - tuning)
+
+
 def get_word_by_name(name: str) -> Word:
     """Literally just finds a word by its text representation.
 
@@ -593,10 +839,9 @@ def get_word_by_name(name: str) -> Word:
     InvalidWordException
         If the word does not exist.
     """
-    matches = [word for word in WORDS if word.name == name]
-    if not matches:
+    if name not in LEXICON.by_name:
         raise InvalidWordException(f"No word with name {name}")
-    return matches[0]
+    return LEXICON.by_name[name]
 
 
 PI: Word = get_word_by_name("pi")
@@ -635,6 +880,7 @@ def get_stem_and_modifiers_of_notes_string(
     InvalidWordException
         If the string contains no other digits than 0, it's either representing
         a NumberWord, which doesn't have a stem, or an invalid string.
+        Also if the second 0, indicating a direct object, is augmented.
 
     Examples
     --------
@@ -657,12 +903,14 @@ def get_stem_and_modifiers_of_notes_string(
 
     # If the second digit is 0 (the first one is by default), we have a direct object, and we cut off a 0
     if s[2] == "0":
-        assert s[3] == ":", "second zero can't be augmented"
+        # the second zero can't be augmented
+        if s[3] != ":":
+            raise InvalidWordException
         direct_object = True
         s = s[2:]
 
     # If the first 0 is elongated, we have a finite verb, and we remove the elongation
-    elif s[1] == "0":
+    elif s[1] == "_":
         finite_verb = True
         s = s[0] + s[2:]
 
@@ -694,9 +942,13 @@ def get_stem_and_modifiers_of_notes_string(
     )
 
 
+@lru_cache(maxsize=1 << 16)
 def find_exact_word_for_notes_string(s: str) -> Word | None:
     """Tries to find a `Word` object for a notes string, including modifications.
 
+    The fuzzy search tries many neighbours of every notes string, mostly the same ones,
+    so the results are memoised. The returned words are shared, and shouldn't be changed.
+
     Parameters
     ----------
     s : str
@@ -714,6 +966,9 @@ def find_exact_word_for_notes_string(s: str) -> Word | None:
         n = notes_string_to_number(s)
         return NumberWord(n)
 
+    if s[0] != "0":
+        return None
+
     try:
         (
             root,
@@ -728,25 +983,24 @@ def find_exact_word_for_notes_string(s: str) -> Word | None:
     except InvalidWordException:
         return None
 
-    for word in WORDS:
-        if root == word.notes_string:
-            if plural:
-                word = word.pluralize()
-            if comparative:
-                word = word.comparativize()
-            if superlative:
-                word = word.superlativize()
-            if past_tense:
-                word = word.past_tensify()
-            if question:
-                word = word.questionify()
-            if finite_verb:
-                word = word.finite_verbify()
-            if direct_object:
-                word = word.direct_objectify()
-            return word
-
-    return None
+    word = WORDS_BY_NOTES_STRING.get(root)
+    if word is None:
+        return None
+    if plural:
+        word = word.pluralize()
+    if comparative:
+        word = word.comparativize()
+    if superlative:
+        word = word.superlativize()
+    if past_tense:
+        word = word.past_tensify()
+    if question:
+        word = word.questionify()
+    if finite_verb:
+        word = word.finite_verbify()
+    if direct_object:
+        word = word.direct_objectify()
+    return word
 
 
 def get_notes_from_string(s: str) -> tuple[list[int], list[str]]:
@@ -963,70 +1217,580 @@ def find_closest_words_for_notes_string(
         and the amount by which this match deviates from the input,
         or `None`, if no matches are found.
     """
-    if notes_string[0] == "2":
+    result = score_closest_words_for_notes_string(notes_string, max_dev)
+    if result is None:
+        return None
+    words, d_offset, _ = result
+    return (list(words), d_offset)
+
+
+@lru_cache(maxsize=4096)
+def score_closest_words_for_notes_string(
+    notes_string: str, max_dev: int = 2
+) -> tuple[tuple[Word, ...], int, int] | None:
+    """Does the same as `find_closest_words_for_notes_string`, and also tells how good the match is.
+
+    The results are remembered, since the same notes strings are matched over and over
+    when trying different word boundaries. The words are found by searching the trie of
+    `get_notes_trie`, where a note that's missing or extra costs `NOTE_INDEL_COST`.
+
+    Parameters
+    ----------
+    notes_string : str
+        Notes string to match for.
+    max_dev : int, optional
+        Max amount of changes we allow when searching for a match, by default 2
+
+    Returns
+    -------
+    tuple[tuple[Word, ...], int, int] | None
+        The best match, possibly preceeded by a word indicating key change,
+        the amount by which this match deviates from the input,
+        and the nr of changes that were needed to find the match,
+        or `None`, if no matches are found.
+    """
+    first_note = re.match(r"-?\d+", notes_string)
+    first_note_value = first_note.group() if first_note is not None else ""
+
+    if first_note_value == "2":
         pitched_string = pitch_string_by(notes_string, -2)
-        result = find_closest_words_for_notes_string(pitched_string, max_dev)
+        result = score_closest_words_for_notes_string(pitched_string, max_dev)
         if result is not None:
-            result_words, result_offset = result
-            return ([PI] + result_words, -2 + result_offset)
+            result_words, result_offset, nr_of_changes = result
+            return ((PI,) + result_words, -2 + result_offset, nr_of_changes)
 
-    if notes_string[:2] == "-2":
+    if first_note_value == "-2":
         pitched_string = pitch_string_by(notes_string, 2)
-        result = find_closest_words_for_notes_string(pitched_string, max_dev)
+        result = score_closest_words_for_notes_string(pitched_string, max_dev)
         if result is not None:
-            result_words, result_offset = result
-            return ([LA] + result_words, 2 + result_offset)
+            result_words, result_offset, nr_of_changes = result
+            return ((LA,) + result_words, 2 + result_offset, nr_of_changes)
 
-    if not (
-        notes_string[0] == "0" or notes_string[0] == "1" or notes_string[:2] == "-1"
-    ):
+    if first_note_value not in ("0", "1", "-1"):
         return None
 
-    if notes_string[0] == "1":
-        notes_string = "0" + notes_string[1:]
-
-    if notes_string[:2] == "-1":
-        notes_string = "0" + notes_string[2:]
+    # a first note that's a bit off is still the root
+    notes_string = "0" + notes_string[len(first_note_value) :]
 
     exact = find_exact_word_for_notes_string(notes_string)
     if exact is not None:
-        return ([exact], 0)
+        return ((exact,), 0, 0)
 
-    note_values, note_augmentations = get_notes_from_string(notes_string)
+    try:
+        notes = get_trie_notes_from_string(notes_string)
+    except ValueError:
+        return None
 
-    nr_of_notes = len(note_values)
-    if nr_of_notes > 8:
+    # Most notes strings without an exact match are close to one, and are in the table.
+    table = get_neighbourhood_table()
+    if table is not None and max_dev <= table.max_cost:
+        found = table.lookup(notes_string)
+        if found is not None and found[1] <= max_dev:
+            form, cost = found
+            if substitution_cost(notes, get_trie_notes_from_string(form)) == cost:
+                return ((cast(Word, find_exact_word_for_notes_string(form)),), 0, cost)
+
+    trie = get_notes_trie()
+    candidates = trie.search(notes, max_dev)
+    if (number := closest_number(notes, max_dev)) is not None:
+        candidates.append(number)
+    # Inserting or deleting a note costs more than the differences within a word,
+    # and is much slower to search for, so that's only tried when it could win.
+    if min((cost for cost, *_ in candidates), default=max_dev + 1) > NOTE_INDEL_COST:
+        candidates += trie.search(notes, max_dev, NOTE_INDEL_COST)
+    if len(candidates) == 0:
         return None
 
-    neighbours = generate_neighbours(note_values, note_augmentations, max_dev)
+    min_score, _, _, best_string = min(candidates, key=lambda c: rank_candidate(notes, c))
+    best_candidate = cast(Word, find_exact_word_for_notes_string(best_string))
+    return ((best_candidate,), 0, min_score)
 
-    candidates: list[Word] = []
-    min_score: int | None = None
-    for neighbour, score in neighbours:
-        if min_score is not None and score > min_score:
-            break
 
-        candidate = find_exact_word_for_notes_string(neighbour)
-        if candidate is not None:
-            candidates.append(candidate)
-            min_score = score
+def rank_candidate(
+    notes: list[TrieNote], candidate: tuple[int, int, tuple[TrieNote, ...], str]
+) -> tuple:
+    """The key to sort candidates for a sequence of notes by, with the best match first.
 
-    if len(candidates) == 0:
+    Like the neighbours, candidates that only differ in pitch and length come first,
+    and then those with the smallest deviations, in the order of `generate_neighbours`.
+
+    Parameters
+    ----------
+    notes : list[TrieNote]
+        The notes to match.
+    candidate : tuple[int, int, tuple[TrieNote, ...], str]
+        A candidate, as found by `NotesTrie.search`.
+
+    Returns
+    -------
+    tuple
+        The key.
+    """
+    cost, nr_of_indels, found, found_string = candidate
+    word = cast(Word, find_exact_word_for_notes_string(found_string))
+    deviations: tuple[int, ...] = ()
+    toggles: tuple[bool, ...] = ()
+    if nr_of_indels == 0:
+        deviations = tuple(p - q for (p, _), (q, _) in zip(found, notes))
+        toggles = tuple(a != b for (_, a), (_, b) in zip(found, notes))
+    return (cost, nr_of_indels, -get_prevalence(word), deviations, toggles, found)
+
+
+def get_trie_notes_from_string(s: str) -> list[TrieNote]:
+    """Converts a notes string to the notes in a `NotesTrie`.
+
+    Parameters
+    ----------
+    s : str
+        Notes string, with only pitches and augmentations.
+
+    Returns
+    -------
+    list[TrieNote]
+        The pitch and augmentations of every note.
+
+    Raises
+    ------
+    ValueError
+        If the notes string contains anything else, like rests or slides between pitches.
+    """
+    note_values, note_augmentations = get_notes_from_string(s)
+    notes: list[TrieNote] = []
+    for value, symbols in zip(note_values, note_augmentations):
+        if symbols not in AUGMENTATIONS_BY_SYMBOLS:
+            raise ValueError(f"Unexpected augmentations {symbols} in {s}")
+        notes.append((value, AUGMENTATIONS_BY_SYMBOLS[symbols]))
+    return notes
+
+
+@lru_cache(maxsize=1)
+def get_notes_trie() -> NotesTrie:
+    """Builds a trie of all notes strings that have an exact match in the lexicon.
+
+    Those are the notes strings of all words, with every modification they can have
+    (see `get_stem_and_modifiers_of_notes_string`), except for numbers.
+    Words with rests or slides between pitches can only be matched exactly.
+
+    Returns
+    -------
+    NotesTrie
+        The notes of every notes string, with the notes string itself,
+        for which `find_exact_word_for_notes_string` gives the word.
+    """
+    trie = NotesTrie()
+    for stem in LEXICON.by_notes_string:
+        if not stem.startswith("0:"):
+            continue
+        # as a direct object, as a finite verb, or neither
+        for prefixed in (stem, "0:" + stem, "0_" + stem[1:]):
+            try:
+                notes = get_trie_notes_from_string(prefixed)
+                root, *_ = get_stem_and_modifiers_of_notes_string(prefixed)
+            except (ValueError, InvalidWordException):
+                continue
+            if root not in WORDS_BY_NOTES_STRING:
+                continue
+            # the other modifications only add augmentations to the last note
+            last_pitch, last_augmentations = notes[-1]
+            for suffix in AUGMENTATION_SYMBOLS:
+                symbols = AUGMENTATION_SYMBOLS[last_augmentations] + suffix
+                if symbols in AUGMENTATIONS_BY_SYMBOLS:
+                    trie.insert(
+                        notes[:-1] + [(last_pitch, AUGMENTATIONS_BY_SYMBOLS[symbols])],
+                        prefixed + suffix,
+                    )
+    return trie
+
+
+def closest_number(
+    notes: list[TrieNote], max_dev: int = 2
+) -> tuple[int, int, tuple[TrieNote, ...], str] | None:
+    """Finds the number that's closest to a sequence of notes, in the format of `NotesTrie.search`.
+
+    Numbers consist of roots, some of which are long, so they aren't in the trie.
+    The closest one keeps the lengths of the notes, and only changes their pitch.
+    """
+    if any(augmentations & ~Augmentation.LONG for _, augmentations in notes):
+        return None
+    cost = sum(pitch**2 for pitch, _ in notes)
+    if cost > max_dev:
+        return None
+    number = tuple((0, augmentations) for _, augmentations in notes)
+    notes_string = ":".join(f"0{Augmentation(a).symbol}" for _, a in number)
+    return (cost, 0, number, notes_string)
+
+
+def get_matching_fingerprint() -> str:
+    """A hash of everything the closest words for a notes string depend on.
+
+    Those are the words, their prevalences, and the rules for matching.
+    """
+    fingerprint = hashlib.blake2b(digest_size=16)
+    fingerprint.update(f"{MATCHING_VERSION}:{NOTE_INDEL_COST}\n".encode())
+    for word in WORDS:
+        fingerprint.update(f"{word.name}\t{word.notes_string}\n".encode())
+    for name, prevalence in sorted(PREVALENCES.items()):
+        fingerprint.update(f"{name}\t{prevalence}\n".encode())
+    return fingerprint.hexdigest()
+
+
+def build_neighbourhood_table(max_dev: int = 2) -> NeighbourhoodTable:
+    """Finds the closest word for every notes string near one, in advance.
+
+    These are the notes strings that are within `max_dev` of a notes string in the trie of
+    `get_notes_trie`, without inserting or deleting notes, and for which the closest word
+    is at most `NOTE_INDEL_COST` away. For those, `score_closest_words_for_notes_string`
+    wouldn't search for insertions and deletions, so the table gives the same results.
+
+    Parameters
+    ----------
+    max_dev : int, optional
+        Max amount of changes to allow, by default 2
+
+    Returns
+    -------
+    NeighbourhoodTable
+        The closest form, and its cost, for every notes string.
+    """
+    max_cost = min(max_dev, NOTE_INDEL_COST)
+    best: dict[str, tuple[int, int, tuple[TrieNote, ...], str]] = {}
+    for form_notes, form in get_notes_trie().items():
+        for notes, cost in substitution_neighbours(list(form_notes), max_cost):
+            if cost == 0:
+                continue
+            candidate = (cost, 0, form_notes, form)
+            notes_string = ":".join(f"{p}{AUGMENTATION_SYMBOLS[a]}" for p, a in notes)
+            other = best.get(notes_string)
+            if other is None:
+                number = closest_number(notes, max_cost)
+                if number is not None:
+                    other = number
+            if other is not None and rank_candidate(notes, other) < rank_candidate(
+                notes, candidate
+            ):
+                candidate = other
+            best[notes_string] = candidate
+
+    entries = {s: (form, cost) for s, (cost, _, _, form) in best.items()}
+    return NeighbourhoodTable.from_entries(entries, max_cost, get_matching_fingerprint())
+
+
+@lru_cache(maxsize=1)
+def get_neighbourhood_table() -> NeighbourhoodTable | None:
+    """The neighbourhood table built with `python -m src.build_neighbourhood_table`.
+
+    The table isn't built here, since that takes a while. Without it, matching falls back to
+    searching the trie of `get_notes_trie`, which gives the same results, only slower.
+
+    Returns
+    -------
+    NeighbourhoodTable | None
+        The table, or `None` if it wasn't built, or was built for other words.
+    """
+    if not os.path.exists(NEIGHBOURHOOD_TABLE_FILE):
+        return None
+    table = NeighbourhoodTable.load(NEIGHBOURHOOD_TABLE_FILE)
+    if table.fingerprint != get_matching_fingerprint():
         return None
+    return table
+
+
+@lru_cache(maxsize=1)
+def get_lexicon_matrices() -> LexiconMatrices:
+    """The notes strings in the trie of `get_notes_trie`, as matrices.
+
+    Returns
+    -------
+    LexiconMatrices
+        Every notes string, with the prevalence of its word.
+    """
+    forms = list(get_notes_trie().items())
+    # the prevalence of the word itself, to not create all of its modified versions
+    prevalences = [
+        get_prevalence(WORDS_BY_NOTES_STRING[get_stem_and_modifiers_of_notes_string(form)[0]])
+        for _, form in forms
+    ]
+    return LexiconMatrices(forms, prevalences)
+
+
+def score_words_against_lexicon(
+    words: list[NoteArray], max_dev: int = 2, nr_of_candidates: int = 5
+) -> list[list[tuple[Word, float, int]]]:
+    """Finds the closest words for the notes of every word in a sentence, without rounding first.
+
+    This compares the pitches as they were whistled, so of two words with the same nr of changes,
+    the one that's closer to what was whistled comes first. Words with the same nr of notes
+    are compared to all word forms at once, see `LexiconMatrices`. Numbers are included,
+    like in `closest_number`, but words with rests or slides between pitches aren't,
+    and neither are words with another nr of notes.
+
+    Parameters
+    ----------
+    words : list[NoteArray]
+        The notes of every word, relative to the root.
+    max_dev : int, optional
+        Max amount of changes we allow, after rounding the pitches, by default 2
+    nr_of_candidates : int, optional
+        The max nr of words to return per word, by default 5
+
+    Returns
+    -------
+    list[list[tuple[Word, float, int]]]
+        For every word, the closest words with at most `max_dev` changes, with the distance
+        from the pitches and the nr of changes, the closest first.
+    """
+    long = int(Augmentation.LONG)
+    scored = get_lexicon_matrices().score(
+        [word.pitches for word in words],
+        [word.augmentation_masks for word in words],
+        max_dev,
+        nr_of_candidates,
+    )
+    results: list[list[tuple[Word, float, int]]] = []
+    for word, candidates in zip(words, scored):
+        pitches = word.pitches[1:].astype(np.float64)
+        masks = word.augmentation_masks.tolist()
+        number_cost = int(np.sum(np.round(pitches) ** 2))
+        if (
+            len(word) > 0
+            and abs(round(float(word.pitches[0]))) <= 1
+            and not any(mask & ~long for mask in masks)
+            and number_cost <= max_dev
+        ):
+            # with prevalence 0, a number comes after the words at the same distance
+            distance = float(np.sum(pitches**2))
+            number = ":".join(f"0{AUGMENTATION_SYMBOLS[mask]}" for mask in masks)
+            position = bisect_right([d for _, d, _ in candidates], distance)
+            candidates.insert(position, (number, distance, number_cost))
+            del candidates[nr_of_candidates:]
+        results.append(
+            [
+                (cast(Word, find_exact_word_for_notes_string(form)), distance, cost)
+                for form, distance, cost in candidates
+            ]
+        )
+    return results
+
+
+def interpret_notes(
+    notes: NoteArray, max_dev: int = 2
+) -> tuple[list[Word | None], list[str]]:
+    """Does the same as `interpret_notes_strings`, but picks the closest words to the pitches.
+
+    Notes strings that have an exact match, or for which no word is found by
+    `score_words_against_lexicon`, are matched by `find_closest_words_for_notes_string`.
+    All words of the sentence are scored at once, and again after every key change.
+
+    Parameters
+    ----------
+    notes : NoteArray
+        The notes of the sentence, relative to the root.
+    max_dev : int, optional
+        Max amount of changes we allow, after rounding the pitches, by default 2
+
+    Returns
+    -------
+    tuple[list[Word | None], list[str]]
+        The matched words, `None` for words without a match, including the words indicating
+        key changes, and the notes strings, transposed after key changes.
+    """
+    words = notes.words()
+    notes_strings = turn_into_notes_strings(notes)
+    scored = score_words_against_lexicon(words, max_dev, 1)
+    offset = 0
+    interpretations: list[Word | None] = []
+    for i in range(len(words)):
+        exact = find_exact_word_for_notes_string(notes_strings[i])
+        if exact is not None:
+            interpretations.append(exact)
+            continue
+        if len(scored[i]) > 0:
+            interpretations.append(scored[i][0][0])
+            continue
+
+        result = find_closest_words_for_notes_string(notes_strings[i], max_dev)
+        if result is None:
+            interpretations.append(None)
+            continue
+        best_match, d_offset = result
+        interpretations += best_match
+        if d_offset != 0:
+            offset += d_offset
+            for j in range(i, len(notes_strings)):
+                notes_strings[j] = pitch_string_by(notes_strings[j], d_offset)
+            transposed = [
+                NoteArray(
+                    word.pitches + offset,
+                    word.lengths,
+                    word.augmentation_masks,
+                    word.first_of_word,
+                )
+                for word in words
+            ]
+            scored[i + 1 :] = score_words_against_lexicon(
+                transposed[i + 1 :], max_dev, 1
+            )
+    return (interpretations, notes_strings)
+
+
+def interpret_notes_strings(
+    notes_strings: list[str],
+) -> tuple[list[Word | None], list[str]]:
+    """Finds the best match in Toki Musi for every word in a recording, in order.
+
+    When a match implies a key change, the notes strings that follow are transposed accordingly.
+
+    Parameters
+    ----------
+    notes_strings : list[str]
+        The notes string for every word in the recording.
+
+    Returns
+    -------
+    tuple[list[Word | None], list[str]]
+        The matched words, `None` for notes strings without a match, including the words indicating
+        key changes, and the notes strings, transposed after key changes.
+    """
+    notes_strings = list(notes_strings)
+    words: list[Word | None] = []
+    for i in range(len(notes_strings)):
+        if (result := find_closest_words_for_notes_string(notes_strings[i])) is None:
+            words.append(None)
+        else:
+            best_match, d_offset = result
+            words += best_match
+            for j in range(i, len(notes_strings)):
+                notes_strings[j] = pitch_string_by(notes_strings[j], d_offset)
+    return (words, notes_strings)
+
+
+def decode_word_boundaries(
+    notes: NoteArray, pause_lengths: intlist, long_pause_threshold: float
+) -> boollist:
+    """Decides where words start, by matching the possible ways to split the notes against the lexicon.
+
+    The notes are expected to be split where the pause before them is longer than
+    `long_pause_threshold`, as indicated by `notes.first_of_word`. Pauses close to the threshold
+    are ambiguous though, so for those we also try the opposite, at a cost. Every word
+    costs the nr of changes needed to find a match for it, or `UNMATCHED_WORD_COST`,
+    and the cheapest way to split the sentence is found with dynamic programming,
+    keeping track of the key changes along the way. Words are at most `MAX_NOTES_PER_WORD`
+    notes long, unless the pauses say otherwise, so this takes linear time.
 
-    best_candidate = max(candidates, key=get_prevalence)
+    Parameters
+    ----------
+    notes : NoteArray
+        The notes of the sentence, with `first_of_word` as decided by the pauses.
+    pause_lengths : intlist
+        The pauses between the notes (1 less than the nr of notes).
+    long_pause_threshold : float
+        The pause length above which notes are considered to be part of a new word.
 
-    return ([best_candidate], 0)
+    Returns
+    -------
+    boollist
+        For every note, whether it's the first of a word.
+    """
+    nr_of_notes = len(notes)
+    expected_starts: boollist = notes.first_of_word.copy()
+    if nr_of_notes == 0 or long_pause_threshold <= 0:
+        return expected_starts
+    expected_starts[0] = True
+
+    # The cost of deciding against what's expected for every pause (a pause `k` is the one before note `k`),
+    # `inf` if the pause is too far from the threshold.
+    ratios = np.ones(nr_of_notes)
+    ratios[1:] = np.maximum(pause_lengths, 1e-9) / long_pause_threshold
+    distances = np.abs(np.log(ratios)) / np.log(AMBIGUOUS_PAUSE_FACTOR)
+    change_costs = BOUNDARY_CHANGE_COST * np.minimum(distances, 1)
+    can_split = expected_starts | (ratios > 1 / AMBIGUOUS_PAUSE_FACTOR)
+    can_join = ~expected_starts | (ratios < AMBIGUOUS_PAUSE_FACTOR)
+    split_costs = np.where(expected_starts, 0, change_costs)
+    join_costs = np.where(expected_starts, change_costs, 0)
+    cumulative_join_costs = np.concatenate([[0], np.cumsum(join_costs)])
+    cumulative_changes = np.concatenate([[0], np.cumsum(expected_starts)])
+
+    pitches = np.round(notes.pitches).astype(int).tolist()
+    symbols = [AUGMENTATION_SYMBOLS[mask] for mask in notes.augmentation_masks.tolist()]
+    expected_start_positions = np.flatnonzero(expected_starts)
+    # for every note, the next note after it that's expected to start a word
+    next_expected_starts = np.append(expected_start_positions, nr_of_notes)[
+        np.searchsorted(expected_start_positions, np.arange(nr_of_notes), side="right")
+    ].tolist()
+
+    # For every note, the cheapest ways to start a word there, per key:
+    # key -> (cost, nr of changes, start of the previous word, key of the previous word)
+    best: list[dict[int, tuple[float, int, int, int]]] = [
+        {} for _ in range(nr_of_notes + 1)
+    ]
+    best[0][0] = (0, 0, -1, 0)
+    for start in range(nr_of_notes):
+        if not best[start]:
+            continue
+        ends: list[int] = []
+        for end in range(start + 1, min(start + MAX_NOTES_PER_WORD, nr_of_notes) + 1):
+            if end == nr_of_notes or can_split[end]:
+                ends.append(end)
+            if end == nr_of_notes or not can_join[end]:
+                break
+        if expected_starts[start]:
+            # the split indicated by the pauses is always possible, whatever its length
+            if next_expected_starts[start] not in ends:
+                ends.append(next_expected_starts[start])
+
+        # keys that are far behind won't catch up, and would only slow things down
+        cost_to_beat = min(cost for cost, *_ in best[start].values())
+        cost_to_beat += UNMATCHED_WORD_COST
+        for key, (cost, nr_of_changes, _, _) in best[start].items():
+            if cost > cost_to_beat:
+                continue
+            for end in ends:
+                notes_string = ":".join(
+                    str(pitch + key) + symbol
+                    for pitch, symbol in zip(pitches[start:end], symbols[start:end])
+                )
+                match = score_closest_words_for_notes_string(notes_string)
+                if match is None:
+                    word_cost, d_key = UNMATCHED_WORD_COST, 0
+                else:
+                    _, d_key, word_cost = match
+
+                # joining the notes within the word, and splitting after it
+                pause_cost = (
+                    cumulative_join_costs[end] - cumulative_join_costs[start + 1]
+                )
+                changes = cumulative_changes[end] - cumulative_changes[start + 1]
+                if end < nr_of_notes:
+                    pause_cost += split_costs[end]
+                    changes += not expected_starts[end]
+
+                candidate = (
+                    cost + pause_cost + word_cost,
+                    nr_of_changes + int(changes),
+                    start,
+                    key,
+                )
+                current = best[end].get(key + d_key)
+                if current is None or candidate[:2] < current[:2]:
+                    best[end][key + d_key] = candidate
+
+    starts = np.zeros(nr_of_notes, dtype=bool)
+    key = min(best[nr_of_notes], key=lambda k: best[nr_of_notes][k][:2])
+    position = nr_of_notes
+    while position > 0:
+        _, _, position, key = best[position][key]
+        starts[position] = True
+    return starts
 
 
 def determine_deviances_from_target(
-    notes_from_recording: list[Note], target_notes_string: str
+    notes_from_recording: NoteArray, target_notes_string: str
 ) -> list[tuple[float, list[str], list[str]]] | None:
     """Determines how far off the notes from a recording are from the target notes string
 
     Parameters
     ----------
-    notes_from_recording : list[Note]
+    notes_from_recording : NoteArray
         The notes that were extracted from a recording.
     target_notes_string : str
         The notes_string of a word that was attempted.
@@ -1053,57 +1817,55 @@ def determine_deviances_from_target(
         notes_from_recording, values_t, augmentations_t
     ):
         d_pitch: float = note.pitch - val_t
-        in_note_and_not_target: list[str] = []
-        in_target_and_not_note: list[str] = []
-        for a in Augmentation:
-            if a in note.augmentations and a.value not in aug_string_t:
-                in_note_and_not_target.append(a.value)
-            if a.value in aug_string_t and a not in note.augmentations:
-                in_target_and_not_note.append(a.value)
-        deviances.append((d_pitch, in_note_and_not_target, in_target_and_not_note))
+        augmentations_t = Augmentation.from_symbols(aug_string_t)
+        in_note_and_not_target = note.augmentations & ~augmentations_t
+        in_target_and_not_note = augmentations_t & ~note.augmentations
+        deviances.append(
+            (
+                d_pitch,
+                [a.symbol for a in in_note_and_not_target],
+                [a.symbol for a in in_target_and_not_note],
+            )
+        )
 
     return deviances
 
 
 def cut_notes_sentence_into_notes_per_word(
-    notes_sentence: list[Note],
+    notes_sentence: NoteArray,
     target_words: list[Word | None],
-) -> list[list[Note]]:
-    """Cuts a `list` of notes into a `list` of `list`s of notes, on for each detected word.
+) -> list[NoteArray]:
+    """Cuts the notes of a sentence into the notes of each detected word, without copying.
 
     Parameters
     ----------
-    notes_sentence : list[Note]
+    notes_sentence : NoteArray
         All notes in the sentence.
     target_words : list[Word | None]
         The words to match.
 
     Returns
     -------
-    list[list[Note]]
+    list[NoteArray]
         The notes per word.
     """
-    notes_per_word: list[list[Note]] = []
-    for note in notes_sentence:
-        if note.first_of_word:
-            notes_per_word.append([])
-        notes_per_word[-1].append(note)
+    notes_per_word: list[NoteArray] = notes_sentence.words()
 
     for i, word in enumerate(target_words):
         if word is not None and (word.nr_of_notes == 0 or word.name == "rest"):
-            notes_per_word.insert(i, [])
+            notes_per_word.insert(i, notes_sentence[0:0])
 
     return notes_per_word
 
 
 def determine_deviances_from_target_for_sentence(
-    notes_from_recording: list[Note], target_words: list[Word | None]
+    notes_from_recording: NoteArray, target_words: list[Word | None]
 ) -> list[tuple[float, list[str], list[str]]] | None:
     """Determines how far off the notes from a recording are from the target sentence.
 
     Parameters
     ----------
-    notes_from_recording : list[Note]
+    notes_from_recording : NoteArray
         The notes that were extracted from a recording.
     target_words : list[Word | None]
         The words to match.
@@ -1137,25 +1899,25 @@ def determine_deviances_from_target_for_sentence(
     return total_deviances
 
 
-def get_synthesised_versions_of_words(
+def determine_speeds_and_offsets_of_words(
     sentence: list[Word | None],
-    notes_per_word: list[list[Note]],
+    notes_per_word: list[NoteArray],
     segment_bounds: segbounds,
     offset: float,
     sample_rate_recording: int,
     sample_rate_pm: int,
-) -> list[floatlist | None]:
-    """Creates synthesised versions of what the words should sound like.
+) -> tuple[list[float | None], list[float]]:
+    """Determines at what speed and in what key each word should be synthesised to match a recording.
 
-    This function matches the speed of each individual word, and the key of the sentence as a whole,
-    such that the synthesised versions will sound as close to the recording as possible.
+    The speed of each individual word is matched, and the key of the sentence as a whole,
+    taking into account the key changes indicated by words like "pi" and "la".
 
     Parameters
     ----------
     sentence : list[Word | None]
         The words in the sentence, `None` for bits of the recording that weren't identified.
-    notes : list[Note]
-        The notes in the recording.
+    notes_per_word : list[NoteArray]
+        The notes in the recording, per word.
     segment_bounds : segbounds
         The onsets and ends of the recorded notes.
     offset : float
@@ -1167,12 +1929,12 @@ def get_synthesised_versions_of_words(
 
     Returns
     -------
-    list[floatlist | None]
-        A wave for every successfully identified word.
+    tuple[list[float | None], list[float]]
+        The speed for every word, `None` for words that can't be synthesised,
+        and the offset for every word.
     """
     nr_of_notes_per_word = [len(notes_for_word) for notes_for_word in notes_per_word]
 
-    # determine speed per word
     speed_per_word: list[float | None] = []
     d_offsets: list[int] = []
     i_sb = 0
@@ -1180,21 +1942,26 @@ def get_synthesised_versions_of_words(
         if word is None:
             speed_per_word.append(None)
             d_offsets.append(0)
-        elif (
-            wave_for_word := word.wave(10, 0, sample_rate_recording)
-        ) is None or word.name == "rest":
+        elif word.nr_of_notes == 0 or word.name == "rest":
             speed_per_word.append(None)
             if word.name == "pi":
                 d_offsets.append(2)
-            if word.name in ["la", "unpi"]:
+            elif word.name in ["la", "unpi"]:
                 d_offsets.append(-2)
+            else:
+                d_offsets.append(0)
         else:
             lower, _ = segment_bounds[i_sb]
             _, upper = segment_bounds[i_sb + nr_of_notes - 1]
             expected_nr_of_samples_from_segment_bounds = (
                 (upper - lower) / sample_rate_pm * sample_rate_recording
             )
-            nr_of_samples_for_synthesised_version = len(wave_for_word)
+            nr_of_samples_for_synthesised_version = sum(
+                len(segment)
+                for segment in freq_timeline_from_string(
+                    word.get_notes_string(), 10, 0, sample_rate_recording
+                )
+            )
             speed_for_word = (
                 10
                 * nr_of_samples_for_synthesised_version
@@ -1205,18 +1972,117 @@ def get_synthesised_versions_of_words(
 
         i_sb += nr_of_notes
 
-    # create waves
     cum_offsets = np.cumsum(d_offsets)
-    word_waves = [
+    offset_per_word: list[float] = [offset + cum_offset for cum_offset in cum_offsets]
+    return (speed_per_word, offset_per_word)
+
+
+def get_synthesised_versions_of_words(
+    sentence: list[Word | None],
+    notes_per_word: list[NoteArray],
+    segment_bounds: segbounds,
+    offset: float,
+    sample_rate_recording: int,
+    sample_rate_pm: int,
+) -> list[floatlist | None]:
+    """Creates synthesised versions of what the words should sound like.
+
+    This function matches the speed of each individual word, and the key of the sentence as a whole,
+    such that the synthesised versions will sound as close to the recording as possible.
+
+    Parameters
+    ----------
+    sentence : list[Word | None]
+        The words in the sentence, `None` for bits of the recording that weren't identified.
+    notes_per_word : list[NoteArray]
+        The notes in the recording, per word.
+    segment_bounds : segbounds
+        The onsets and ends of the recorded notes.
+    offset : float
+        The nr of semitones by which to transpose.
+    sample_rate_recording : int
+        The sample rate of the recording.
+    sample_rate_pm : int
+        The sample rate used in the pitch analysis.
+
+    Returns
+    -------
+    list[floatlist | None]
+        A wave for every successfully identified word.
+    """
+    speed_per_word, offset_per_word = determine_speeds_and_offsets_of_words(
+        sentence,
+        notes_per_word,
+        segment_bounds,
+        offset,
+        sample_rate_recording,
+        sample_rate_pm,
+    )
+    return [
         (
-            word.wave(speed, offset + cum_offset, sample_rate_recording)
+            word.wave(speed, word_offset, sample_rate_recording)
             if word is not None and speed is not None
             else None
         )
-        for word, speed, cum_offset in zip(sentence, speed_per_word, cum_offsets)
+        for word, speed, word_offset in zip(sentence, speed_per_word, offset_per_word)
     ]
 
-    return word_waves
+
+def get_freq_timelines_of_words(
+    sentence: list[Word | None],
+    notes_per_word: list[NoteArray],
+    segment_bounds: segbounds,
+    offset: float,
+    sample_rate_recording: int,
+    sample_rate_pm: int,
+) -> list[floatlist | None]:
+    """Determines the frequencies over time of the synthesised versions of the words.
+
+    This gives what `get_synthesised_versions_of_words` would sound like, without
+    having to synthesise it and analyse it again.
+
+    Parameters
+    ----------
+    sentence : list[Word | None]
+        The words in the sentence, `None` for bits of the recording that weren't identified.
+    notes_per_word : list[NoteArray]
+        The notes in the recording, per word.
+    segment_bounds : segbounds
+        The onsets and ends of the recorded notes.
+    offset : float
+        The nr of semitones by which to transpose.
+    sample_rate_recording : int
+        The sample rate of the recording.
+    sample_rate_pm : int
+        The sample rate used in the pitch analysis.
+
+    Returns
+    -------
+    list[floatlist | None]
+        A frequency value per sample for every successfully identified word,
+        `nan` where the synthesised version would be silent.
+    """
+    speed_per_word, offset_per_word = determine_speeds_and_offsets_of_words(
+        sentence,
+        notes_per_word,
+        segment_bounds,
+        offset,
+        sample_rate_recording,
+        sample_rate_pm,
+    )
+    return [
+        (
+            audible_freq_timeline(
+                freq_timeline_from_string(
+                    word.get_notes_string(), speed, word_offset, sample_rate_recording
+                ),
+                sample_rate_recording,
+            )
+            if word is not None and speed is not None
+            else None
+        )
+        for word, speed, word_offset in zip(sentence, speed_per_word, offset_per_word)
+    ]
 
 
 def merge_into_one_wave(
@@ -1226,6 +2092,7 @@ def merge_into_one_wave(
     new_word_flags: list[bool],
     sample_rate_recording: int,
     sample_rate_pm: int,
+    fill_value: float = 0,
 ) -> floatlist:
     """Turns synthesised waves, emulating a recording, into one big wave.
 
@@ -1243,13 +2110,15 @@ def merge_into_one_wave(
         The sample rate of the recording.
     sample_rate_pm : int
         The sample rate used in the pitch analysis.
+    fill_value : float, optional
+        The value between the words, by default 0
 
     Returns
     -------
     floatlist
         The merged wave
     """
-    full_wave = np.zeros(len_recording)
+    full_wave = np.full(len_recording, fill_value, dtype=float)
     word_bounds_in_recording = determine_bounds_for_words_in_recording(
         segment_bounds, new_word_flags, sample_rate_recording, sample_rate_pm
     )
@@ -1283,28 +2152,24 @@ def determine_bounds_for_words_in_recording(
 
     Returns
     -------
-    list[tuple[int, int]]
-        A `tuple` for every word, with the start and end index in terms of samples in the recording.
+    segbounds
+        A row for every word, with the start and end index in terms of samples in the recording.
     """
     assert len(segment_bounds) == len(new_word_flags), "should be the same size"
-    last_note_flags = new_word_flags[1:] + [True]
-    onsets = [
-        onset
-        for (onset, _), new_word in zip(segment_bounds, new_word_flags)
-        if new_word
-    ]
-    endings = [
-        ending
-        for (_, ending), last_note in zip(segment_bounds, last_note_flags)
-        if last_note
-    ]
-    bounds_recording = [
-        (
-            (onset * sample_rate_recording) // sample_rate_pm,
-            (ending * sample_rate_recording) // sample_rate_pm,
-        )
-        for onset, ending in zip(onsets, endings)
-    ]
+    if len(segment_bounds) == 0:
+        # without notes there are no words
+        return np.empty((0, 2), dtype=segment_bounds.dtype)
+    first_note_flags = np.array(new_word_flags, dtype=bool)
+    last_note_flags = np.append(first_note_flags[1:], True)
+    onsets = segment_bounds[first_note_flags, 0]
+    endings = segment_bounds[last_note_flags, 1]
+    bounds_recording: segbounds = np.stack(
+        [
+            (onsets * sample_rate_recording) // sample_rate_pm,
+            (endings * sample_rate_recording) // sample_rate_pm,
+        ],
+        axis=1,
+    )
     return bounds_recording
 
 
@@ -1,7 +1,9 @@
 from copy import deepcopy
+from functools import lru_cache
 import json
+from typing import Any
 
-from src.augmentation import Augmentation
+from src.augmentation import MODIFIER_AUGMENTATIONS, Modifier
 from src.constants import SAMPLE_RATE
 from src.util import generate_contractions
 from src.wave_generation import (
@@ -10,7 +12,45 @@ from src.wave_generation import (
 from src.my_types import floatlist
 
 
+class _ModifierAttribute:
+    """Exposes one of the `modifiers` of a `Word` as a `bool` attribute."""
+
+    def __init__(self, modifier: Modifier):
+        self.modifier = modifier
+
+    def __get__(self, word: "Word | None", owner: type | None = None):
+        if word is None:
+            return self
+        return bool(word.modifiers & self.modifier)
+
+    def __set__(self, word: "Word", value: bool) -> None:
+        if value:
+            word.modifiers |= self.modifier
+        else:
+            word.modifiers &= ~self.modifier
+
+
+# the `bool` attributes of `Word` per modifier, in the order they're stored in JSON
+MODIFIER_ATTRIBUTES: dict[str, Modifier] = {
+    "plural": Modifier.PLURAL,
+    "past_tense": Modifier.PAST_TENSE,
+    "comparative": Modifier.COMPARATIVE,
+    "superlative": Modifier.SUPERLATIVE,
+    "question": Modifier.QUESTION,
+    "finite_verb": Modifier.FINITE_VERB,
+    "direct_object": Modifier.DIRECT_OBJECT,
+}
+
+
 class Word:
+    plural = _ModifierAttribute(Modifier.PLURAL)
+    past_tense = _ModifierAttribute(Modifier.PAST_TENSE)
+    comparative = _ModifierAttribute(Modifier.COMPARATIVE)
+    superlative = _ModifierAttribute(Modifier.SUPERLATIVE)
+    question = _ModifierAttribute(Modifier.QUESTION)
+    finite_verb = _ModifierAttribute(Modifier.FINITE_VERB)
+    direct_object = _ModifierAttribute(Modifier.DIRECT_OBJECT)
+
     def __init__(
         self,
         name: str,
@@ -53,6 +93,8 @@ class Word:
         self.questionifiable = questionifiable
         self.colour = colour
         self.composite = composite
+        # the modifications of the word, also available as separate `bool` attributes
+        self.modifiers = Modifier(0)
         self.plural = plural
         self.past_tense = past_tense
         self.comparative = comparative
@@ -65,7 +107,13 @@ class Word:
         return deepcopy(self)
 
     def to_json(self) -> str:
-        return json.dumps(self.__dict__, indent=4)
+        data: dict[str, Any] = {}
+        for key, value in self.__dict__.items():
+            if key == "modifiers":
+                data |= {name: getattr(self, name) for name in MODIFIER_ATTRIBUTES}
+            else:
+                data[key] = value
+        return json.dumps(data, indent=4)
 
     @classmethod
     def from_json(cls, json_str: str) -> "Word":
@@ -160,15 +208,12 @@ class Word:
         return (
             isinstance(value, type(self))
             and self.name == value.name
-            and self.plural == value.plural
-            and self.comparative == value.comparative
-            and self.superlative == value.superlative
-            and self.past_tense == value.past_tense
-            and self.question == value.question
-            and self.finite_verb == value.finite_verb
-            and self.direct_object == value.direct_object
+            and self.modifiers == value.modifiers
         )
 
+    def __hash__(self) -> int:
+        return hash((self.name, int(self.modifiers)))
+
     def __str__(self):
         return f'{self.name}{" (past tense)" if self.past_tense else ""}{" (comparative)" if self.comparative else ""}{" (superlative)" if self.superlative else ""}{" (plural)" if self.plural else ""}{" (question)" if self.question else ""}{" (finite verb)" if self.finite_verb else ""}{" (direct object)" if self.direct_object else ""}'
 
@@ -183,24 +228,7 @@ class Word:
             self.finite_verb and self.direct_object
         ), "can't have word that's both finite verb and direct object"
 
-        string = self.notes_string
-        if self.plural:
-            string += Augmentation.LONG.value
-        if self.comparative:
-            string += Augmentation.TRILL_DOWN.value
-        if self.superlative:
-            string += Augmentation.TRILL_UP.value
-        if self.past_tense:
-            string += Augmentation.SLIDE_DOWN.value
-        if self.question:
-            string += Augmentation.SLIDE_UP.value
-        if string[0] == ":":
-            string = string[1:]
-        if self.finite_verb:
-            index = find_index_after_number(string)
-            string = string[:index] + "_" + string[index:]
-        if self.direct_object:
-            string = "0:" + string
+        string = modified_notes_string(self.notes_string, self.modifiers)
         if to_print:
             string = make_printable(string)
         return string
@@ -252,15 +280,7 @@ class Word:
         bool
             ...
         """
-        return (
-            self.plural
-            or self.comparative
-            or self.superlative
-            or self.past_tense
-            or self.question
-            or self.finite_verb
-            or self.direct_object
-        )
+        return bool(self.modifiers)
 
 
 class NumberWord(Word):
@@ -292,6 +312,36 @@ class NumberWord(Word):
         )
 
 
+@lru_cache(maxsize=None)
+def modified_notes_string(notes_string: str, modifiers: Modifier) -> str:
+    """Applies modifiers to the notes string of a word.
+
+    Parameters
+    ----------
+    notes_string : str
+        The notes string of the unmodified word.
+    modifiers : Modifier
+        The modifications of the word.
+
+    Returns
+    -------
+    str
+        The notes string of the modified word.
+    """
+    string = notes_string
+    for modifier, augmentation in MODIFIER_AUGMENTATIONS.items():
+        if modifiers & modifier:
+            string += augmentation.symbol
+    if string[0] == ":":
+        string = string[1:]
+    if modifiers & Modifier.FINITE_VERB:
+        index = find_index_after_number(string)
+        string = string[:index] + "_" + string[index:]
+    if modifiers & Modifier.DIRECT_OBJECT:
+        string = "0:" + string
+    return string
+
+
 def convert_number_to_notes_string(n: int, binary: bool) -> str:
     """Generates the notes string for a number `n`.
 
@@ -1,16 +1,13 @@
 import numpy as np
 from src.constants import SAMPLE_RATE
-from src.file_management import (
-    WORDS_FOLDER,
-    load_examples_from_file,
-    load_words_from_folder,
-)
+from src.file_management import load_examples_from_file
+from src.lexicon import LEXICON
 from src.wave_generation import add_pause
 from src.word import InvalidWordException, NumberWord, Word
 from src.my_types import floatlist
 
-BASIC_WORDS = load_words_from_folder([WORDS_FOLDER])
-ALL_WORDS = load_words_from_folder()
+BASIC_WORDS = LEXICON.basic_words
+ALL_WORDS = LEXICON.words
 
 
 def get_words_from_sentence(
@@ -152,22 +149,8 @@ def generate_composite(
     Word
         The composite word.
     """
-    composite_object = existing_words[word_names.index(name_of_composite)]
-    composite_object = composite_object.pluralize(first_word_of_composite.plural)
-    composite_object = composite_object.comparativize(
-        first_word_of_composite.comparative
-    )
-    composite_object = composite_object.superlativize(
-        first_word_of_composite.superlative
-    )
-    composite_object = composite_object.past_tensify(first_word_of_composite.past_tense)
-    composite_object = composite_object.questionify(first_word_of_composite.question)
-    composite_object = composite_object.finite_verbify(
-        first_word_of_composite.finite_verb
-    )
-    composite_object = composite_object.direct_objectify(
-        first_word_of_composite.direct_object
-    )
+    composite_object = existing_words[word_names.index(name_of_composite)].copy()
+    composite_object.modifiers = first_word_of_composite.modifiers
     return composite_object
 
 
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+
+from src.analysis_cache import AnalysisCache, make_analysis_key
+
+
+class TestAnalysisCache(unittest.TestCase):
+    def test_make_analysis_key(self):
+        key = make_analysis_key(b"recording", 300, 4000, -1, "mi moku")
+        self.assertEqual(key, make_analysis_key(b"recording", 300.0, 4000, -1, "mi moku"))
+        self.assertNotEqual(key, make_analysis_key(b"recordinG", 300, 4000, -1, "mi moku"))
+        self.assertNotEqual(key, make_analysis_key(b"recording", 300, 3000, -1, "mi moku"))
+        self.assertNotEqual(key, make_analysis_key(b"recording", 300, 4000, 0, "mi moku"))
+        self.assertNotEqual(key, make_analysis_key(b"recording", 300, 4000, -1, ""))
+        banded = make_analysis_key(b"recording", 300, 4000, -1, "mi moku", (500, 1500))
+        self.assertNotEqual(key, banded)
+        self.assertNotEqual(
+            banded, make_analysis_key(b"recording", 300, 4000, -1, "mi moku", (500, 2000))
+        )
+
+    def test_memory_eviction(self):
+        cache = AnalysisCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_disk(self):
+        with tempfile.TemporaryDirectory() as folder:
+            cache = AnalysisCache(max_entries=1, folder=folder)
+            cache.put("a", [1, 2, 3])
+            cache.put("b", [4, 5, 6])
+
+            # "a" is no longer in memory, but can be loaded from disk
+            self.assertIn("a", cache)
+            self.assertEqual(cache.get("a"), [1, 2, 3])
+
+            fresh_cache = AnalysisCache(folder=folder)
+            self.assertEqual(fresh_cache.get("b"), [4, 5, 6])
+
+            fresh_cache.clear()
+            self.assertEqual(os.listdir(folder), [])
+
+    def test_disk_eviction(self):
+        with tempfile.TemporaryDirectory() as folder:
+            cache = AnalysisCache(folder=folder, max_bytes_on_disk=3000)
+            for i in range(5):
+                cache.put(str(i), bytes(1000))
+                os.utime(os.path.join(folder, f"{i}.pkl"), (i, i))
+
+            remaining = sorted(os.listdir(folder))
+            self.assertLessEqual(len(remaining), 2)
+            self.assertIn("4.pkl", remaining)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import json
+import os
+import tempfile
+import unittest
+
+import soundfile as sf  # type: ignore
+
+from src.batch_analysis import find_recordings, run_batch
+from src.wave_generation import marginify_wave
+from src.words_functions import get_sentence_wave, get_words_from_sentence
+
+SENTENCES = ["mi wile moku", "sina pona", "jan pona"]
+
+
+def read_results(path: str) -> dict[str, dict]:
+    with open(path, encoding="utf-8") as f:
+        return {result["path"]: result for result in map(json.loads, f)}
+
+
+class TestBatchAnalysis(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        os.mkdir(os.path.join(self.folder.name, "sub"))
+        self.recordings: dict[str, str] = {}
+        for i, sentence in enumerate(SENTENCES):
+            path = os.path.join(self.folder.name, "sub" if i else "", f"{i}.wav")
+            wave = marginify_wave(get_sentence_wave(get_words_from_sentence(sentence)))
+            sf.write(path, wave, 44100)
+            self.recordings[os.path.normpath(path)] = sentence
+        self.output = os.path.join(self.folder.name, "results.jsonl")
+
+    def test_find_recordings(self):
+        manifest = os.path.join(self.folder.name, "manifest.txt")
+        with open(manifest, "w", encoding="utf-8") as f:
+            f.write("# comment\nsub/1.wav\n\n0.wav\n")
+
+        self.assertEqual(
+            sorted(find_recordings([self.folder.name])), sorted(self.recordings)
+        )
+        self.assertEqual(
+            find_recordings([manifest]),
+            [
+                os.path.join(self.folder.name, "sub", "1.wav"),
+                os.path.join(self.folder.name, "0.wav"),
+            ],
+        )
+
+    def test_run_batch(self):
+        broken = os.path.join(self.folder.name, "broken.wav")
+        with open(broken, "w") as f:
+            f.write("not audio")
+
+        stats = run_batch([self.folder.name], self.output, workers=2, log=None)
+        self.assertEqual(sum(s.recordings for s in stats.values()), 4)
+
+        results = read_results(self.output)
+        self.assertIn("error", results[broken])
+        for path, sentence in self.recordings.items():
+            self.assertEqual(" ".join(results[path]["words"]), sentence)
+
+    def test_resume(self):
+        run_batch([self.folder.name], self.output, workers=1, log=None)
+        with open(self.output, encoding="utf-8") as f:
+            lines = f.readlines()
+
+        # interrupted while writing the second result
+        with open(self.output, "w", encoding="utf-8") as f:
+            f.writelines(lines[:1])
+            f.write(lines[1][:20])
+
+        stats = run_batch([self.folder.name], self.output, workers=1, log=None)
+        self.assertEqual(sum(s.recordings for s in stats.values()), 2)
+        self.assertEqual(set(read_results(self.output)), set(self.recordings))
+
+
+if __name__ == "__main__":
+    unittest.main()
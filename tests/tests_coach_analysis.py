@@ -0,0 +1,30 @@
+import unittest
+
+from src.coach_analysis import analyse_attempt
+from src.file_management import load_words_from_folder
+from src.wave_generation import marginify_wave
+from src.words_functions import get_sentence_wave, get_words_from_sentence
+
+
+class TestCoachAnalysis(unittest.TestCase):
+    def test_reference_sentence(self):
+        words = get_words_from_sentence("mi wile moku")
+        recording = marginify_wave(get_sentence_wave(words))
+        vocabulary = load_words_from_folder()
+
+        analysis = analyse_attempt(
+            recording, 44100, 300, 4000, -1, "mi wile moku", vocabulary
+        )
+        self.assertEqual(analysis.target_words, words)
+        self.assertEqual(analysis.remarks, [])
+
+        # with another nr of words, only the recording itself is interpreted
+        analysis = analyse_attempt(
+            recording, 44100, 300, 4000, -1, "mi wile moku .kili", vocabulary
+        )
+        self.assertEqual(analysis.target_words, words)
+        self.assertEqual(len(analysis.remarks), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+
+import numpy as np
+import soundfile as sf  # type: ignore
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed
+
+from src.coach_server import LATENCY_TARGET, start_server
+from src.wave_generation import marginify_wave
+from src.words_functions import get_sentence_wave, get_words_from_sentence
+
+
+async def stream_file(
+    url: str, path: str, block_size: int = 1024, speed: float = 1
+) -> tuple[list[dict], list[float]]:
+    """Sends a recording to the server as if it was being recorded, and collects the answers.
+
+    Returns the messages from the server, and the time it took to receive each of them,
+    since sending the block they're about.
+    """
+    recording, sample_rate = sf.read(path, dtype="float32")
+    sent_at: list[float] = []
+    messages: list[dict] = []
+    latencies: list[float] = []
+
+    async with connect(url) as connection:
+
+        async def receive() -> None:
+            async for message in connection:
+                messages.append(json.loads(message))
+                latencies.append(time.perf_counter() - sent_at[messages[-1]["block"]])
+                if messages[-1]["type"] == "end":
+                    return
+
+        await connection.send(json.dumps({"type": "start", "sample_rate": sample_rate}))
+        receiver = asyncio.create_task(receive())
+        start = time.perf_counter()
+        for i in range(0, len(recording), block_size):
+            # wait until this block would have been recorded
+            await asyncio.sleep(
+                max(0, start + i / sample_rate / speed - time.perf_counter())
+            )
+            sent_at.append(time.perf_counter())
+            await connection.send(recording[i : i + block_size].tobytes())
+        await connection.send(json.dumps({"type": "end"}))
+        await receiver
+
+    return (messages, latencies)
+
+
+class TestCoachServer(unittest.IsolatedAsyncioTestCase):
+    async def test_live_feedback(self):
+        words = get_words_from_sentence("mi wile moku .kili")
+        recording = marginify_wave(get_sentence_wave(words))
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "recording.wav")
+            sf.write(path, recording, 44100, subtype="FLOAT")
+
+            server = await start_server("localhost", 0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                messages, latencies = await stream_file(f"ws://localhost:{port}", path)
+            finally:
+                server.close()
+                await server.wait_closed()
+
+        self.assertEqual(messages[-1]["type"], "end")
+        self.assertEqual(
+            [m["notes_string"] for m in messages if m["type"] == "word"],
+            [w.get_notes_string() for w in words],
+        )
+        self.assertEqual(
+            [m["words"] for m in messages if m["type"] == "word"],
+            [[str(w)] for w in words],
+        )
+        notes = [m for m in messages if m["type"] == "note"]
+        self.assertEqual(
+            len(notes), sum(len(w.get_notes_string().split(":")) for w in words)
+        )
+
+        # The root is whistled at the start, so the pitch of the first note is close to 0.
+        # Until the root is known, pitches are relative to C.
+        pitches = [m for m in messages if m["type"] == "pitch"]
+        offset = pitches[-1]["offset"]
+        first_note_pitches = [
+            p - (offset if m["offset"] is None else 0)
+            for m in pitches
+            for t, p in zip(m["times"], m["pitches"])
+            if p is not None and notes[0]["start"] < t < notes[0]["end"]
+        ]
+        self.assertGreater(len(first_note_pitches), 0)
+        self.assertLess(abs(np.median(first_note_pitches)), 0.5)
+
+        # Feedback on all but the last blocks arrives while the learner is still whistling.
+        # The bound is generous, as this runs on machines of any speed.
+        live = [
+            latency
+            for message, latency in zip(messages, latencies)
+            if message["type"] == "pitch"
+        ][:-1]
+        self.assertGreater(len(live), 10)
+        self.assertLess(np.median(live), 10 * LATENCY_TARGET)
+
+    async def test_bad_messages(self):
+        block = np.zeros(1024, dtype=np.float32).tobytes()
+        start = json.dumps({"type": "start", "sample_rate": 44100})
+        for messages, close_code in [
+            ([block], 1008),
+            (["not json"], 1008),
+            ([json.dumps({"type": "start"})], 1008),
+            ([json.dumps({"type": "start", "sample_rate": "fast"})], 1008),
+            ([json.dumps({"type": "start", "sample_rate": 44100, "format": "mp3"})], 1008),
+            ([start, block, "not json"], 1007),
+            ([start, block, json.dumps(["end"])], 1007),
+        ]:
+            with self.subTest(message=messages[-1][:40]):
+                server = await start_server("localhost", 0)
+                port = server.sockets[0].getsockname()[1]
+                try:
+                    async with connect(f"ws://localhost:{port}") as connection:
+                        for message in messages:
+                            await connection.send(message)
+                        # whatever was analysed before, and then the connection is closed
+                        with self.assertRaises(ConnectionClosed):
+                            async with asyncio.timeout(10):
+                                async for _ in connection:
+                                    pass
+                        self.assertEqual(connection.close_code, close_code)
+                finally:
+                    server.close()
+                    await asyncio.wait_for(server.wait_closed(), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from src.file_management import load_words_from_folder
+from src.lexicon import FLAGS, LEXICON
+from src.whistle_analysis import WORDS, get_word_by_name
+from src.words_functions import ALL_WORDS, BASIC_WORDS
+
+
+class TestLexicon(unittest.TestCase):
+    def test_views(self):
+        words = load_words_from_folder()
+        self.assertEqual([w.name for w in LEXICON.words], [w.name for w in words])
+        self.assertEqual(
+            len(LEXICON.basic_words) + len(LEXICON.composite_words), len(LEXICON)
+        )
+        self.assertTrue(all(w.composite for w in LEXICON.composite_words))
+        self.assertTrue(
+            all("/" not in w.notes_string for w in LEXICON.words_without_slides)
+        )
+        self.assertEqual(
+            sum(len(group) for group in LEXICON.by_nr_of_notes.values()), len(LEXICON)
+        )
+        self.assertTrue(all(w.nr_of_notes == 2 for w in LEXICON.by_nr_of_notes[2]))
+        for flag in FLAGS:
+            self.assertTrue(all(getattr(w, flag) for w in LEXICON.by_flag[flag]))
+
+    def test_indexes(self):
+        self.assertEqual(LEXICON.by_name["moku"].name, "moku")
+        self.assertEqual(
+            LEXICON.by_notes_string[LEXICON.by_name["moku"].notes_string].name, "moku"
+        )
+
+    def test_shared(self):
+        # every part of the app uses the same words
+        self.assertIs(WORDS, LEXICON.words)
+        self.assertIs(ALL_WORDS, LEXICON.words)
+        self.assertIs(BASIC_WORDS[0], LEXICON.words[0])
+        self.assertIs(get_word_by_name("moku"), LEXICON.by_name["moku"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+
+import numpy as np
+
+from src.augmentation import Augmentation
+from src.lexicon_matrices import LexiconMatrices
+from src.note import NoteArray, turn_into_notes_strings
+from src.whistle_analysis import (
+    interpret_notes,
+    interpret_notes_strings,
+    score_words_against_lexicon,
+)
+from src.word import NumberWord
+from src.words_functions import get_words_from_sentence
+
+LONG = int(Augmentation.LONG)
+TRILL = int(Augmentation.TRILL_UP)
+
+FORMS = [
+    ([(0, 0), (2, 0)], "0:2"),
+    ([(0, 0), (4, 0)], "0:4"),
+    ([(0, 0), (4, LONG)], "0:4_"),
+    ([(0, 0), (3, TRILL)], "0:3*"),
+    ([(0, LONG), (3, 0)], "0_:3"),
+    ([(0, 0), (2, 0), (5, 0)], "0:2:5"),
+]
+
+
+def score(matrices: LexiconMatrices, pitches: list[float], masks: list[int], **kwargs):
+    found = matrices.score([np.array(pitches)], [np.array(masks, dtype=np.uint8)], **kwargs)
+    return [(form, round(distance, 2), cost) for form, distance, cost in found[0]]
+
+
+class TestLexiconMatrices(unittest.TestCase):
+    def setUp(self):
+        self.matrices = LexiconMatrices(FORMS, [10, 1, 0, 0, 0, 0])
+
+    def test_score(self):
+        self.assertEqual(len(self.matrices), len(FORMS))
+        # both are 1 away after rounding, but the pitch is closer to 4
+        self.assertEqual(
+            score(self.matrices, [0.1, 3.3], [0, 0]),
+            [("0:4", 0.49, 1), ("0:4_", 1.49, 2), ("0:2", 1.69, 1)],
+        )
+        # at the same distance, the most prevalent comes first
+        self.assertEqual(
+            [form for form, *_ in score(self.matrices, [0, 3], [0, 0])],
+            ["0:2", "0:4", "0:4_"],
+        )
+        # other augmentations than lengths have to match, also for the first note
+        self.assertEqual(score(self.matrices, [0, 3], [0, TRILL]), [("0:3*", 0, 0)])
+        self.assertEqual(score(self.matrices, [0, 3], [LONG, 0]), [("0_:3", 0, 0)])
+        # the first note is the root, even if it's a bit off
+        self.assertEqual(score(self.matrices, [1.2, 2], [0, 0])[0], ("0:2", 0, 0))
+        self.assertEqual(score(self.matrices, [1.6, 2], [0, 0]), [])
+
+    def test_limits(self):
+        self.assertEqual(
+            score(self.matrices, [0, 3.3], [0, 0], max_cost=1, nr_of_candidates=1),
+            [("0:4", 0.49, 1)],
+        )
+        self.assertEqual(score(self.matrices, [0, 1, 2, 3], [0, 0, 0, 0]), [])
+        self.assertEqual(self.matrices.score([], []), [])
+
+    def test_sentence(self):
+        words = get_words_from_sentence("mi wile moku .kili tan jan pona")
+        rng = np.random.default_rng(0)
+        pitches, masks, first_of_word = [], [], []
+        for word in words:
+            for i, note in enumerate(word.get_notes_string().split(":")):
+                pitch = int(note.rstrip("_"))
+                pitches.append(pitch + rng.uniform(-0.3, 0.3))
+                masks.append(LONG if note.endswith("_") else 0)
+                first_of_word.append(i == 0)
+        notes = NoteArray(pitches, [1] * len(pitches), masks, first_of_word)
+
+        found, notes_strings = interpret_notes(notes)
+        self.assertEqual([str(w) for w in found], [str(w) for w in words])
+        expected = interpret_notes_strings(turn_into_notes_strings(notes))
+        self.assertEqual((found, notes_strings), expected)
+
+        scored = score_words_against_lexicon(notes.words())
+        self.assertEqual([candidates[0][0] for candidates in scored], words)
+        self.assertTrue(all(0 < candidates[0][1] < 0.5 for candidates in scored[1:]))
+
+    def test_numbers(self):
+        notes = NoteArray([0, 0.9, -0.2], [1, 1, 1], [0, LONG, 0], [True, False, False])
+        (candidates,) = score_words_against_lexicon([notes])
+        numbers = [(w, cost) for w, _, cost in candidates if isinstance(w, NumberWord)]
+        self.assertEqual([(str(w), cost) for w, cost in numbers], [("2", 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import io
+import os
+import tempfile
+import tracemalloc
+import unittest
+
+import numpy as np
+import soundfile as sf  # type: ignore
+
+from src.long_form import find_cut, transcribe, write_srt
+from src.wave_generation import marginify_wave
+from src.words_functions import get_sentence_wave, get_words_from_sentence
+
+SENTENCE = "mi wile moku .kili tan jan pona"
+
+
+def write_recording(path: str, repeats: int) -> list[str]:
+    """Writes a sentence a number of times, and returns the words in it."""
+    words = get_words_from_sentence(SENTENCE)
+    sentence_wave = marginify_wave(get_sentence_wave(words))
+    sf.write(path, np.tile(sentence_wave, repeats), 44100, subtype="FLOAT")
+    return [str(word) for word in words if word.nr_of_notes > 0] * repeats
+
+
+def peak_memory(path: str) -> int:
+    tracemalloc.start()
+    for _ in transcribe(path, block_seconds=2):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+class TestLongForm(unittest.TestCase):
+    def test_find_cut(self):
+        block = np.concatenate([np.ones(4410), np.zeros(4410), np.ones(100)])
+        cut = find_cut(block, 44100, 1)
+        self.assertTrue(4410 <= cut < 8820)
+        self.assertIsNone(find_cut(np.ones(44100), 44100, 1))
+
+    def test_transcribe(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "recording.wav")
+            expected = write_recording(path, 4)
+            words = list(transcribe(path, block_seconds=2))
+
+            self.assertEqual([" ".join(word["words"]) for word in words], expected)
+            starts = [word["start"] for word in words]
+            self.assertEqual(starts, sorted(starts))
+            self.assertTrue(all(word["start"] < word["end"] for word in words))
+
+            srt = io.StringIO()
+            self.assertEqual(write_srt(iter(words[:2]), srt), 2)
+            entries = srt.getvalue().split("\n\n")
+            self.assertTrue(entries[1].startswith("2\n00:00:0"))
+            self.assertIn(" --> ", entries[1])
+
+    def test_memory_doesnt_grow(self):
+        with tempfile.TemporaryDirectory() as folder:
+            short_path = os.path.join(folder, "short.wav")
+            long_path = os.path.join(folder, "long.wav")
+            write_recording(short_path, 3)
+            write_recording(long_path, 12)
+            self.assertLess(peak_memory(long_path), 1.5 * peak_memory(short_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
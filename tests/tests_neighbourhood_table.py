@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+from itertools import product
+from unittest import mock
+
+from src import whistle_analysis
+from src.augmentation import Augmentation
+from src.neighbourhood_table import (
+    NeighbourhoodTable,
+    substitution_cost,
+    substitution_neighbours,
+)
+from src.notes_trie import NotesTrie
+
+LONG = int(Augmentation.LONG)
+TRILL = int(Augmentation.TRILL_UP)
+
+
+class TestNeighbourhoodTable(unittest.TestCase):
+    def test_substitution_neighbours(self):
+        notes = [(0, 0), (-5, LONG), (2, TRILL)]
+        neighbours = list(substitution_neighbours(notes, 2))
+        self.assertEqual(len({tuple(n) for n, _ in neighbours}), len(neighbours))
+        self.assertTrue(all(substitution_cost(n, notes) == c for n, c in neighbours))
+
+        expected = [
+            [(0, 0), (p, a), (q, b)]
+            for p, a, q, b in product(
+                range(-8, -2), [0, LONG], range(-1, 5), [TRILL, TRILL | LONG]
+            )
+        ]
+        expected = [n for n in expected if substitution_cost(n, notes) <= 2]
+        self.assertEqual(len(neighbours), len(expected))
+
+    def test_substitution_cost(self):
+        self.assertEqual(substitution_cost([(0, 0), (2, 0)], [(0, 0), (3, LONG)]), 2)
+        self.assertIsNone(substitution_cost([(0, 0), (2, 0)], [(0, 0), (2, TRILL)]))
+        self.assertIsNone(substitution_cost([(0, 0), (2, 0)], [(0, 0)]))
+        self.assertIsNone(substitution_cost([(0, 0)], [(1, 0)]))
+
+    def test_save_and_load(self):
+        entries = {"0:-5_:-1:3": ("0:-5_:-1:2", 1), "0:4": ("0:5", 1), "0:7_": ("0:7", 1)}
+        table = NeighbourhoodTable.from_entries(entries, 2, "fingerprint")
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "table.npz")
+            table.save(path)
+            loaded = NeighbourhoodTable.load(path)
+
+        self.assertEqual(len(loaded), 3)
+        self.assertEqual((loaded.max_cost, loaded.fingerprint), (2, "fingerprint"))
+        for notes_string, entry in entries.items():
+            self.assertEqual(loaded.lookup(notes_string), entry)
+        self.assertIsNone(loaded.lookup("0:4_"))
+
+    def test_used_for_matching(self):
+        score = whistle_analysis.score_closest_words_for_notes_string.__wrapped__
+        # moku is 0:-5_:-1:2, but the table says otherwise
+        entries = {"0:-5_:-1:3": ("0:-5_:-1:2_", 2), "0:-5_:-1:1": ("0:-5_:-1:2_", 1)}
+        table = NeighbourhoodTable.from_entries(entries, 2, "fingerprint")
+        with mock.patch.object(whistle_analysis, "get_neighbourhood_table", lambda: table):
+            words, _, cost = score("0:-5_:-1:3")
+            self.assertEqual(words[0].get_notes_string(), "0:-5_:-1:2_")
+            self.assertEqual(cost, 2)
+            # an entry that's not at the cost stored is ignored
+            words, _, cost = score("0:-5_:-1:1")
+            self.assertEqual(words[0].get_notes_string(), "0:-5_:-1:2")
+            self.assertEqual(cost, 1)
+            # which also goes for an entry beyond the max nr of changes
+            words, _, cost = score("0:-5_:-1:3", max_dev=1)
+            self.assertEqual(words[0].get_notes_string(), "0:-5_:-1:2")
+
+    def test_built_offline(self):
+        # the table for just moku, which is quick to build
+        trie = NotesTrie()
+        notes = [(0, 0), (-5, LONG), (-1, 0), (2, 0)]
+        trie.insert(notes, "0:-5_:-1:2")
+        with mock.patch.object(whistle_analysis, "get_notes_trie", lambda: trie):
+            table = whistle_analysis.build_neighbourhood_table()
+        self.assertEqual(table.fingerprint, whistle_analysis.get_matching_fingerprint())
+        self.assertEqual(table.lookup("0:-5_:-1:3"), ("0:-5_:-1:2", 1))
+
+        get_table = whistle_analysis.get_neighbourhood_table.__wrapped__
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "table.npz")
+            with mock.patch.object(whistle_analysis, "NEIGHBOURHOOD_TABLE_FILE", path):
+                # without a table, matching searches the trie instead
+                self.assertIsNone(get_table())
+
+                table.save(path)
+                self.assertEqual(get_table().lookup("0:-5_:-1:3"), ("0:-5_:-1:2", 1))
+
+                # a table for other words is ignored
+                NeighbourhoodTable.from_entries({}, 2, "old").save(path)
+                self.assertIsNone(get_table())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+import numpy as np
+
+from src.augmentation import Augmentation
+from src.note import Note, NoteArray, turn_into_notes_strings
+
+
+NOTES = [
+    Note(0.1, 80, Augmentation(0), True),
+    Note(2.4, 160, Augmentation.LONG | Augmentation.TRILL_UP, False),
+    Note(-0.6, 80, Augmentation.SLIDE_DOWN, True),
+    Note(4.2, 80, Augmentation(0), True),
+    Note(3.0, 240, Augmentation.LONG, False),
+]
+
+
+class TestNoteArray(unittest.TestCase):
+    def test_round_trip(self):
+        notes = NoteArray.from_notes(NOTES)
+        self.assertEqual(len(notes), 5)
+        self.assertEqual(notes.pitches.dtype, np.float32)
+        self.assertEqual(notes.augmentation_masks.dtype, np.uint8)
+        for note, expected in zip(notes.to_notes(), NOTES):
+            self.assertAlmostEqual(note.pitch, expected.pitch, places=5)
+            self.assertEqual(note.length, expected.length)
+            self.assertEqual(note.augmentations, expected.augmentations)
+            self.assertEqual(note.first_of_word, expected.first_of_word)
+
+        self.assertEqual(turn_into_notes_strings(notes), turn_into_notes_strings(NOTES))
+        self.assertEqual(turn_into_notes_strings(notes), ["0:2_^", "-1\\", "4:3_"])
+
+    def test_views(self):
+        notes = NoteArray.from_notes(NOTES)
+        words = notes.words()
+        self.assertEqual([len(word) for word in words], [2, 1, 2])
+        self.assertTrue(np.shares_memory(words[2].pitches, notes.pitches))
+
+        note = words[2][-1]
+        self.assertEqual(note.augmentations, Augmentation.LONG)
+        note.augmentations = Augmentation.SLIDE_UP
+        note.length = 100
+        self.assertEqual(notes[4].augmentations, Augmentation.SLIDE_UP)
+        self.assertEqual(notes[4].length, 100)
+        self.assertEqual(turn_into_notes_strings(notes)[2], "4:3/")
+
+    def test_equality(self):
+        notes = NoteArray.from_notes(NOTES)
+        self.assertEqual(notes, NoteArray.from_notes(NOTES))
+        self.assertEqual(notes[1:3], NoteArray.from_notes(NOTES[1:3]))
+        self.assertNotEqual(notes, notes[1:])
+        other = NoteArray.from_notes(NOTES)
+        other.first_of_word[1] = not other.first_of_word[1]
+        self.assertNotEqual(notes, other)
+        self.assertNotEqual(notes, NOTES)
+
+
+if __name__ == "__main__":
+    unittest.main()
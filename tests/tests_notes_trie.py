@@ -0,0 +1,90 @@
+import random
+import unittest
+
+from src.augmentation import Augmentation
+from src.notes_trie import NotesTrie
+
+LONG = int(Augmentation.LONG)
+TRILL = int(Augmentation.TRILL_UP)
+
+
+def distance(a: list, b: list, indel_cost: int | None) -> tuple[int, int] | None:
+    """The edit distance between two sequences of notes, as (cost, nr of indels)."""
+    if a[0] != b[0]:
+        return None
+    if indel_cost is None:
+        if len(a) != len(b):
+            return None
+        indel_cost = 1000
+    infinite = (10**9, 0)
+    rows = [[(j * indel_cost, j) for j in range(len(b))]]
+    for i in range(1, len(a)):
+        row = [(i * indel_cost, i)]
+        for j in range(1, len(b)):
+            (p, x), (q, y) = a[i], b[j]
+            if x == y:
+                substitution = (rows[-1][j - 1][0] + (p - q) ** 2, rows[-1][j - 1][1])
+            elif x ^ y == LONG:
+                substitution = (rows[-1][j - 1][0] + (p - q) ** 2 + 1, rows[-1][j - 1][1])
+            else:
+                substitution = infinite
+            deletion = (rows[-1][j][0] + indel_cost, rows[-1][j][1] + 1)
+            insertion = (row[-1][0] + indel_cost, row[-1][1] + 1)
+            row.append(min(substitution, deletion, insertion))
+        rows.append(row)
+    return rows[-1][-1]
+
+
+class TestNotesTrie(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(0)
+        self.sequences = {
+            tuple(
+                [(0, 0)]
+                + [
+                    (rng.randint(-3, 3), rng.choice([0, 0, LONG, TRILL]))
+                    for _ in range(rng.randint(0, 5))
+                ]
+            )
+            for _ in range(300)
+        }
+        self.trie = NotesTrie()
+        for sequence in self.sequences:
+            self.trie.insert(list(sequence), sequence)
+
+    def test_insert_and_get(self):
+        self.assertEqual(len(self.trie), len(self.sequences))
+        sequence = next(iter(self.sequences))
+        self.assertEqual(self.trie.get(list(sequence)), sequence)
+        self.trie.insert(list(sequence), "replaced")
+        self.assertEqual(len(self.trie), len(self.sequences))
+        self.assertEqual(self.trie.get(list(sequence)), "replaced")
+        self.assertIsNone(self.trie.get([(0, 0), (9, 0)]))
+
+    def test_search_like_brute_force(self):
+        rng = random.Random(1)
+        queries = [list(s) for s in rng.sample(sorted(self.sequences), 20)]
+        queries += [
+            [(0, 0)] + [(rng.randint(-3, 3), 0) for _ in range(rng.randint(0, 6))]
+            for _ in range(20)
+        ]
+        for notes in queries:
+            for max_cost, indel_cost in [(0, None), (2, None), (2, 2), (3, 1)]:
+                expected = set()
+                for sequence in self.sequences:
+                    found = distance(list(sequence), notes, indel_cost)
+                    if found is not None and found[0] <= max_cost:
+                        expected.add((*found, sequence))
+                results = self.trie.search(notes, max_cost, indel_cost)
+                self.assertEqual(
+                    {(cost, indels, path) for cost, indels, path, _ in results}, expected
+                )
+                self.assertTrue(all(path == value for _, _, path, value in results))
+
+    def test_first_note_fixed(self):
+        self.assertEqual(self.trie.search([(1, 0)], 2, 2), [])
+        self.assertEqual(self.trie.search([], 2, 2), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,226 @@
+from concurrent.futures import ProcessPoolExecutor
+import subprocess
+import sys
+import unittest
+
+import numpy as np
+
+from src.note import turn_into_notes_strings
+from src.pitch_tracking import (
+    PITCH_BACKENDS,
+    DEFAULT_PITCH_BACKEND,
+    BandEstimatingBackend,
+    BandLimitedBackend,
+    ChunkedBackend,
+    FixedBandBackend,
+    ParselmouthBackend,
+    PitchBackend,
+    VoiceActivityBackend,
+    band_limit,
+    decimation_factor,
+    default_time_step,
+    estimate_pitch_band,
+    find_active_regions,
+    frame_times,
+    get_process_pool,
+    split_at_pauses,
+)
+from src.streaming_analysis import IncrementalAnalyser
+from src.wave_generation import marginify_wave
+from src.whistle_analysis import analyse_recording_to_notes
+from src.words_functions import get_sentence_wave, get_words_from_sentence
+
+
+class TestPitchBackends(unittest.TestCase):
+    def test_incomplete_backend(self):
+        class NoTrackBackend(PitchBackend):
+            name = "no-track"
+
+        with self.assertRaises(TypeError):
+            NoTrackBackend()  # type: ignore
+
+    def test_frame_times(self):
+        for backend in PITCH_BACKENDS.values():
+            for nr_of_samples in [44100, 44100 * 2 + 123]:
+                recording = np.sin(2 * np.pi * 440 * np.arange(nr_of_samples) / 44100)
+                freqs, voiced = backend.track(recording, 44100)
+                times = frame_times(nr_of_samples, 44100, 300, default_time_step(300))
+                self.assertEqual(len(freqs), len(times))
+                self.assertEqual(len(voiced), len(times))
+
+    def test_band_limit(self):
+        self.assertEqual(decimation_factor(44100, 4000), 4)
+        self.assertEqual(decimation_factor(48000, 4000), 4)
+        self.assertEqual(decimation_factor(8000, 4000), 1)
+        # a narrow band doesn't leave too few samples per period of the floor
+        self.assertEqual(decimation_factor(44100, 400, 300), 18)
+
+        t = np.arange(48000) / 48000
+        recording = np.sin(2 * np.pi * 1000 * t) + np.sin(2 * np.pi * 50 * t)
+        band_limited, sample_rate = band_limit(recording, 48000)
+        self.assertEqual(sample_rate, 12000)
+        self.assertEqual(len(band_limited), 12000)
+        # the hum is gone, the whistle is still there, and hasn't moved
+        expected = np.sin(2 * np.pi * 1000 * np.arange(12000) / 12000)
+        np.testing.assert_allclose(band_limited[1000:-1000], expected[1000:-1000], atol=0.05)
+
+    def test_find_active_regions(self):
+        recording = np.zeros(44100 * 10)
+        recording[44100 * 2 : 44100 * 3] = 0.5
+        recording[int(44100 * 3.5) : 44100 * 4] = 0.5
+        recording[44100 * 8 : 44100 * 9] = 0.01
+        regions = find_active_regions(recording, 44100, padding=0.1)
+        # the second burst is close enough to be merged with the first, the third is too quiet
+        self.assertEqual(len(regions), 1)
+        start, end = regions[0] / 44100
+        self.assertAlmostEqual(start, 1.9, delta=0.03)
+        self.assertAlmostEqual(end, 4.1, delta=0.03)
+
+        self.assertEqual(find_active_regions(np.zeros(44100), 44100).shape, (0, 2))
+
+    def test_voice_activity_backend(self):
+        words = get_words_from_sentence("mi wile moku .kili")
+        parts = [marginify_wave(w.wave()) for w in words]
+        # a quiet word, which has to be judged against the loudest part of the whole recording
+        parts[1] *= 0.15
+        silence = np.zeros(int(44100 * 1.7))
+        recording = np.concatenate([silence, *[np.append(p, silence) for p in parts]])
+
+        backend = BandLimitedBackend(ParselmouthBackend())
+        expected, _ = backend.track(recording, 44100)
+        freqs, _ = VoiceActivityBackend(backend).track(recording, 44100)
+        self.assertEqual(len(freqs), len(expected))
+        self.assertGreater(np.mean((freqs > 0) == (expected > 0)), 0.99)
+        both = (freqs > 0) & (expected > 0)
+        np.testing.assert_allclose(freqs[both], expected[both], rtol=0.01)
+
+    def test_split_at_pauses(self):
+        recording = np.full(44100 * 10, 0.5)
+        recording[int(44100 * 2.9) : int(44100 * 3.3)] = 0
+        recording[int(44100 * 7) : int(44100 * 7.1)] = 0
+        # only the first pause is long enough to cut in
+        chunks = split_at_pauses(recording, 44100, 3)
+        self.assertEqual(len(chunks), 2)
+        self.assertAlmostEqual(chunks[0, 1] / 44100, 3.1, delta=0.02)
+        self.assertEqual(chunks[0, 0], 0)
+        self.assertEqual(chunks[1, 0], chunks[0, 1])
+        self.assertEqual(chunks[-1, 1], len(recording))
+
+        self.assertEqual(split_at_pauses(recording, 44100, 1).tolist(), [[0, 44100 * 10]])
+
+    def test_chunked_backend(self):
+        sentence = get_words_from_sentence("mi wile moku .kili tan jan pona")
+        sentence_wave = marginify_wave(get_sentence_wave(sentence))
+        recording = np.concatenate([sentence_wave, 0.7 * sentence_wave] * 4)
+
+        expected = analyse_recording_to_notes(recording, 44100)
+        found = analyse_recording_to_notes(recording, 44100, workers=2)
+        self.assertEqual(
+            turn_into_notes_strings(found[0]), turn_into_notes_strings(expected[0])
+        )
+        self.assertEqual(found[2], expected[2])
+        self.assertAlmostEqual(found[3], expected[3], delta=0.01)
+
+        freqs, _ = ChunkedBackend(DEFAULT_PITCH_BACKEND, 2).track(recording, 44100)
+        self.assertEqual(len(freqs), len(expected[5].freqs))
+        self.assertGreater(np.mean((freqs > 0) == (expected[5].freqs > 0)), 0.99)
+
+        # the processes are started once, and reused by the next analyses
+        pool = get_process_pool(2)
+        again, _ = ChunkedBackend(DEFAULT_PITCH_BACKEND, 2).track(recording, 44100)
+        self.assertIs(get_process_pool(2), pool)
+        np.testing.assert_array_equal(again, freqs)
+        # unless there's a pool to use instead
+        with ProcessPoolExecutor(2) as executor:
+            backend = ChunkedBackend(DEFAULT_PITCH_BACKEND, 2, executor)
+            again, _ = backend.track(recording, 44100)
+        np.testing.assert_array_equal(again, freqs)
+
+    def test_process_pool_shut_down_at_exit(self):
+        # exit handlers run last in, first out, so this print comes after the shutdown
+        script = (
+            "import atexit\n"
+            "atexit.register(lambda: print(len(pool._processes or {})))\n"
+            "from src.pitch_tracking import get_process_pool\n"
+            "pool = get_process_pool(2)\n"
+            "assert pool.submit(abs, -1).result() == 1\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, timeout=60
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), "0")
+
+    def test_estimate_pitch_band(self):
+        times = np.arange(44100 * 2) / 44100
+        recording = np.sin(2 * np.pi * np.where(times < 1, 500, 800) * times)
+        low, high = estimate_pitch_band(recording, 44100)
+        self.assertTrue(400 < low < 500)
+        self.assertTrue(800 < high < 1000)
+        self.assertIsNone(estimate_pitch_band(np.zeros(44100), 44100))
+
+    def test_band_estimating_backend(self):
+        words = get_words_from_sentence("mi wile moku .kili tan jan pona")
+        recording = marginify_wave(get_sentence_wave(words))
+        inner = PITCH_BACKENDS["parselmouth-band-limited-vad"]
+        expected, _ = inner.track(recording, 44100)
+
+        backend = BandEstimatingBackend(inner)
+        freqs, _ = backend.track(recording, 44100)
+        self.assertEqual(len(freqs), len(expected))
+        self.assertGreater(np.mean((freqs > 0) == (expected > 0)), 0.99)
+        both = (freqs > 0) & (expected > 0)
+        np.testing.assert_allclose(freqs[both], expected[both], rtol=0.01)
+        low, high = backend.choose_band(recording, 44100)
+        self.assertTrue(300 < low < freqs[freqs > 0].min())
+        self.assertTrue(freqs.max() < high < 4000)
+
+        # a band known from earlier attempts widens the band of this one
+        backend = BandEstimatingBackend(inner, (low, 3000))
+        self.assertEqual(backend.choose_band(recording, 44100), (low, 3000))
+        # but it isn't used on its own for a recording without a band of its own
+        self.assertEqual(backend.choose_band(np.zeros(44100), 44100), (300, 4000))
+
+        # a band chosen in advance gives the same as choosing it while tracking
+        backend = BandEstimatingBackend(inner)
+        band = backend.choose_band(recording, 44100)
+        fixed, _ = FixedBandBackend(inner, band).track(recording, 44100)
+        np.testing.assert_array_equal(fixed, freqs)
+
+    def test_sine(self):
+        t = np.arange(44100) / 44100
+        for backend in PITCH_BACKENDS.values():
+            for freq in [320, 880, 2500]:
+                freqs, voiced = backend.track(0.5 * np.sin(2 * np.pi * freq * t), 44100)
+                self.assertTrue(np.all(voiced))
+                np.testing.assert_allclose(freqs, freq, rtol=0.01)
+
+    def test_silence(self):
+        for backend in PITCH_BACKENDS.values():
+            freqs, voiced = backend.track(np.zeros(44100), 44100)
+            self.assertFalse(np.any(voiced))
+            self.assertTrue(np.all(freqs == 0))
+
+    def test_yin_agrees_with_parselmouth(self):
+        words = get_words_from_sentence("mi wile moku .kili pi jan pona")
+        recording = marginify_wave(get_sentence_wave(words))
+        notes, *_ = analyse_recording_to_notes(
+            recording, 44100, backend=PITCH_BACKENDS["parselmouth"]
+        )
+        expected = turn_into_notes_strings(notes)
+
+        notes, *_ = analyse_recording_to_notes(
+            recording, 44100, backend=PITCH_BACKENDS["yin"]
+        )
+        self.assertEqual(turn_into_notes_strings(notes), expected)
+
+        analyser = IncrementalAnalyser(44100, backend=PITCH_BACKENDS["yin"])
+        notes = []
+        for i in range(0, len(recording), 2048):
+            notes += analyser.feed(recording[i : i + 2048]).notes
+        notes += analyser.finish().notes
+        self.assertEqual(turn_into_notes_strings(notes), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+import numpy as np
+
+from src.segment_stats import LONG, REGULAR, SHORT, SegmentStats
+
+
+class TestSegmentStats(unittest.TestCase):
+    def test_statistics(self):
+        # notes of 10 with pauses of 5, a long note, a short note, and a new word after 20
+        segment_bounds = np.array(
+            [[0, 10], [15, 25], [30, 40], [45, 70], [75, 77], [97, 107], [112, 122]]
+        )
+        stats = SegmentStats(segment_bounds)
+        self.assertEqual(stats.note_lengths.tolist(), [10, 10, 10, 25, 2, 10, 10])
+        self.assertEqual(stats.pause_lengths.tolist(), [5, 5, 5, 5, 20, 5])
+        self.assertEqual(stats.regular_note_length, 10)
+        self.assertEqual(stats.regular_pause_length, 5)
+        self.assertEqual(stats.note_thresholds, (3, 17.5))
+        self.assertEqual(stats.pause_thresholds, (2, 12.5))
+        self.assertEqual(
+            stats.note_classes().tolist(),
+            [REGULAR, REGULAR, REGULAR, LONG, SHORT, REGULAR, REGULAR],
+        )
+        self.assertEqual(
+            stats.pause_classes().tolist(),
+            [REGULAR, REGULAR, REGULAR, REGULAR, LONG, REGULAR],
+        )
+
+    def test_few_segments(self):
+        stats = SegmentStats(np.zeros((0, 2), dtype=int))
+        self.assertEqual(stats.regular_note_length, 0)
+        self.assertEqual(stats.note_thresholds, (0, 0))
+        self.assertEqual(stats.pause_thresholds, (0, 0))
+        self.assertEqual(stats.pause_classes().tolist(), [])
+
+        stats = SegmentStats(np.array([[0, 10], [15, 25], [32, 42]]))
+        self.assertEqual(stats.pause_thresholds, (4, 8))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+import numpy as np
+
+from src.note import Note, turn_into_notes_strings
+from src.streaming_analysis import IncrementalAnalyser
+from src.wave_generation import marginify_wave
+from src.whistle_analysis import analyse_recording_to_notes
+from src.words_functions import get_sentence_wave, get_words_from_sentence
+
+
+def stream(
+    analyser: IncrementalAnalyser, recording: np.ndarray, block_size: int = 2048
+) -> tuple[list[Note], list[list[Note]]]:
+    notes: list[Note] = []
+    words: list[list[Note]] = []
+    for i in range(0, len(recording), block_size):
+        update = analyser.feed(recording[i : i + block_size])
+        notes += update.notes
+        words += update.words
+    update = analyser.finish()
+    notes += update.notes
+    words += update.words
+    return (notes, words)
+
+
+class TestIncrementalAnalyser(unittest.TestCase):
+    def test_same_as_batch(self):
+        sentence = "mi wile moku .kili pi jan pona la mi pilin pona"
+        for speed in [5, 10, 15]:
+            recording = marginify_wave(
+                get_sentence_wave(get_words_from_sentence(sentence), speed=speed)
+            )
+            notes_batch, *_ = analyse_recording_to_notes(recording, 44100)
+
+            notes, words = stream(IncrementalAnalyser(44100), recording)
+
+            self.assertEqual(
+                turn_into_notes_strings(notes), turn_into_notes_strings(notes_batch)
+            )
+            self.assertEqual(
+                [turn_into_notes_strings(word)[0] for word in words],
+                turn_into_notes_strings(notes_batch),
+            )
+
+    def test_words_are_emitted_before_the_end(self):
+        words = get_words_from_sentence("mi wile moku .kili")
+        recording = marginify_wave(get_sentence_wave(words))
+        analyser = IncrementalAnalyser(44100)
+
+        emitted_at: list[int] = []
+        for i in range(0, len(recording), 1024):
+            update = analyser.feed(recording[i : i + 1024])
+            emitted_at += [i] * len(update.words)
+            # frames that can't be part of a note anymore are forgotten
+            self.assertLess(len(analyser._pitches), 1000)
+
+        self.assertEqual(len(emitted_at), len(words) - 1)
+        self.assertEqual(len(analyser.finish().words), 1)
+
+    def test_silence(self):
+        analyser = IncrementalAnalyser(44100)
+        update = analyser.feed(np.zeros(44100))
+        self.assertGreater(len(update.freqs), 0)
+        self.assertTrue(np.all(update.freqs == 0))
+        self.assertEqual(analyser.finish().notes, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
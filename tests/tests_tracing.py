@@ -0,0 +1,66 @@
+import json
+import unittest
+
+from src.coach_analysis import analyse_attempt
+from src.file_management import load_words_from_folder
+from src.tracing import span, tracing
+from src.wave_generation import marginify_wave
+from src.words_functions import get_sentence_wave, get_words_from_sentence
+
+
+class TestTracing(unittest.TestCase):
+    def test_trace_of_attempt(self):
+        words = get_words_from_sentence("mi wile moku .kili")
+        recording = marginify_wave(get_sentence_wave(words))
+        with tracing("attempt") as trace:
+            analyse_attempt(
+                recording, 44100, 300, 4000, -1, "", load_words_from_folder()
+            )
+
+        self.assertEqual(
+            [stage.name for stage in trace.spans],
+            ["analyse recording", "interpretation", "synthesis", "pitch contours"],
+        )
+        analysis = trace.spans[0]
+        self.assertEqual(
+            analysis.sizes["notes"],
+            sum(len(w.get_notes_string().split(":")) for w in words),
+        )
+        self.assertEqual(
+            [stage.name for stage in analysis.children],
+            [
+                "pitch tracking",
+                "segmentation",
+                "augmentations",
+                "root",
+            ],
+        )
+        pitch_tracking = analysis.children[0]
+        self.assertEqual(pitch_tracking.sizes["samples"], len(recording))
+        self.assertGreater(pitch_tracking.sizes["frames"], 0)
+        self.assertGreater(pitch_tracking.wall_time, 0)
+        self.assertGreaterEqual(
+            analysis.wall_time, sum(s.wall_time for s in analysis.children)
+        )
+        self.assertEqual(
+            trace.over_budget({"pitch tracking": 0, "root": 1e3}).keys(),
+            {"pitch tracking"},
+        )
+
+        nested = json.loads(trace.to_json())
+        self.assertEqual(nested["spans"][0]["children"][0]["name"], "pitch tracking")
+        events = json.loads(trace.to_chrome_trace())["traceEvents"]
+        self.assertEqual(len(events), len(list(trace.walk())))
+        self.assertTrue(all(event["ph"] == "X" for event in events))
+
+    def test_without_trace(self):
+        with span("stage", items=3) as stage:
+            stage.sizes["more"] = 1
+        with tracing() as trace:
+            pass
+        self.assertEqual(trace.spans, [])
+        self.assertEqual(stage.wall_time, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
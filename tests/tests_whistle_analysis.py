@@ -0,0 +1,268 @@
+import unittest
+
+import numpy as np
+
+from src.augmentation import Augmentation
+from src.constants import FREQ_ROOT
+from src.note import NoteArray, turn_into_notes_strings
+from src.wave_generation import marginify_wave
+from src.word import InvalidWordException
+from src.whistle_analysis import (
+    WORDS,
+    WORDS_BY_NOTES_STRING,
+    analyse_recording_to_notes,
+    decode_word_boundaries,
+    determine_float_note_and_augmentations_of_segment,
+    determine_float_notes_and_augmentations_of_segments,
+    determine_bounds_for_words_in_recording,
+    estimate_root,
+    find_exact_word_for_notes_string,
+    filter_segment_bounds_below_min_length,
+    get_stem_and_modifiers_of_notes_string,
+    find_segment_bounds_parselmouth,
+    freqs_to_float_pitches,
+    merge_segment_bounds_with_distance,
+    score_closest_words_for_notes_string,
+)
+from src.words_functions import get_sentence_wave, get_words_from_sentence
+
+
+class TestSegmentation(unittest.TestCase):
+    def test_find_segment_bounds_parselmouth(self):
+        freqs = np.array([0, 1, 1, 0, 0, 1, 0, 1, 1])
+        expected = [[1, 3], [5, 6], [7, 9]]
+        result = find_segment_bounds_parselmouth(freqs)
+        self.assertEqual(result.shape, (3, 2))
+        self.assertEqual(result.tolist(), expected)
+
+        result = find_segment_bounds_parselmouth(np.zeros(5))
+        self.assertEqual(result.shape, (0, 2))
+
+    def test_merge_segment_bounds_with_distance(self):
+        segment_bounds = np.array([[0, 10], [12, 20], [30, 40], [43, 50]])
+        expected = [[0, 20], [30, 50]]
+        result = merge_segment_bounds_with_distance(segment_bounds, 3)
+        self.assertEqual(result.tolist(), expected)
+
+        expected = [[0, 20], [30, 40], [43, 50]]
+        result = merge_segment_bounds_with_distance(segment_bounds, 2)
+        self.assertEqual(result.tolist(), expected)
+
+    def test_filter_segment_bounds_below_min_length(self):
+        segment_bounds = np.array([[0, 10], [12, 14], [30, 40]])
+        expected = [[0, 10], [30, 40]]
+        result = filter_segment_bounds_below_min_length(segment_bounds, 3)
+        self.assertEqual(result.tolist(), expected)
+
+    def test_freqs_to_float_pitches(self):
+        freqs = np.array([FREQ_ROOT, 0, 2 * FREQ_ROOT, FREQ_ROOT * 2 ** (7 / 12)])
+        result = freqs_to_float_pitches(freqs)
+        self.assertTrue(np.isnan(result[1]))
+        np.testing.assert_allclose(result[[0, 2, 3]], [0, 12, 7])
+
+    def test_determine_bounds_for_words_in_recording(self):
+        segment_bounds = np.array([[0, 10], [12, 20], [30, 40], [43, 50]])
+        new_word_flags = [True, False, True, False]
+        expected = [[0, 200], [300, 500]]
+        result = determine_bounds_for_words_in_recording(
+            segment_bounds, new_word_flags, 4000, 400
+        )
+        self.assertEqual(result.tolist(), expected)
+
+        # a recording without notes has no words
+        no_notes = np.empty((0, 2), dtype=int)
+        result = determine_bounds_for_words_in_recording(no_notes, [], 4000, 400)
+        self.assertEqual(result.shape, (0, 2))
+
+
+class TestAugmentations(unittest.TestCase):
+    def test_batched_augmentations(self):
+        rng = np.random.default_rng(0)
+        t = np.arange(200)
+        notes = [
+            np.full(40, 2.0),
+            np.full(200, 2.0),  # long
+            np.exp(-(((t - 120) / 15) ** 2)),  # trill up
+            -np.exp(-(((t - 120) / 15) ** 2)),  # trill down
+            np.clip((t - 150) / 40, 0, 1) * 4,  # slide up
+            np.clip((t - 150) / 40, 0, 1) * -4,  # slide down
+        ]
+        notes += [
+            rng.normal(rng.uniform(-5, 5), 0.4, rng.integers(10, 300))
+            for _ in range(100)
+        ]
+        # a dropout that was merged
+        notes[10][5:8] = np.nan
+
+        pieces = []
+        for note in notes:
+            pieces += [note, np.full(10, np.nan)]
+        float_pitches = np.concatenate(pieces)
+        ends = np.cumsum([len(note) + 10 for note in notes]) - 10
+        segment_bounds = np.stack([ends - [len(note) for note in notes], ends], axis=1)
+
+        start_pitches, augmentations = determine_float_notes_and_augmentations_of_segments(
+            float_pitches, segment_bounds, 40, 80
+        )
+        expected = [
+            determine_float_note_and_augmentations_of_segment(
+                float_pitches[lower_bound:upper_bound], 40, 80
+            )
+            for lower_bound, upper_bound in segment_bounds
+        ]
+        self.assertEqual(
+            list(
+                zip(start_pitches.tolist(), map(Augmentation, augmentations.tolist()))
+            ),
+            expected,
+        )
+        self.assertEqual(
+            augmentations[:6].tolist(),
+            [
+                0,
+                Augmentation.LONG,
+                Augmentation.LONG | Augmentation.TRILL_UP,
+                Augmentation.LONG | Augmentation.TRILL_DOWN,
+                Augmentation.LONG | Augmentation.SLIDE_UP,
+                Augmentation.LONG | Augmentation.SLIDE_DOWN,
+            ],
+        )
+
+
+class TestRoot(unittest.TestCase):
+    def test_estimate_root(self):
+        rng = np.random.default_rng(0)
+        # in D, 30 cents sharp, with a key change halfway, and a slow drift of 10 cents
+        semitones = np.concatenate(
+            [rng.choice([0, 2, 4, 5, 7], 200), rng.choice([2, 4, 6, 7, 9], 200)]
+        )
+        float_notes = (
+            2.3 + semitones + np.linspace(-0.05, 0.05, 400) + rng.normal(0, 0.05, 400)
+        )
+        # the first note is a bit flat, but it's long
+        float_notes[0] = 2.0
+        lengths = rng.integers(40, 120, 400)
+        lengths[0] = 240
+        self.assertAlmostEqual(estimate_root(float_notes, lengths), 2.3, delta=0.02)
+
+        # notes around the edge of a semitone
+        float_notes = np.array([4.45, 6.55, 11.5, 4.52, 8.48])
+        self.assertAlmostEqual(estimate_root(float_notes), 4.5, delta=0.02)
+        self.assertAlmostEqual(estimate_root(float_notes[1:]), 6.5, delta=0.02)
+
+
+class TestMatching(unittest.TestCase):
+    def test_modified_words(self):
+        for sentence in ["_suli", "suli-ed-?", "mi moku .kili"]:
+            for word in get_words_from_sentence(sentence):
+                self.assertEqual(
+                    find_exact_word_for_notes_string(word.get_notes_string()), word
+                )
+
+    def test_finite_verb(self):
+        # a finite verb is marked by an elongated root, not by a second 0
+        (word,) = get_words_from_sentence("_suli")
+        self.assertTrue(word.get_notes_string().startswith("0_:"))
+        self.assertEqual(find_exact_word_for_notes_string(word.get_notes_string()), word)
+        (word,) = get_words_from_sentence("suli")
+        self.assertNotEqual(
+            find_exact_word_for_notes_string("0_" + word.get_notes_string()[1:]), word
+        )
+
+    def test_every_word_by_notes_string(self):
+        # special words, like the key changes, don't start at the root
+        for word in [w for w in WORDS if w.notes_string.startswith("0")]:
+            found = find_exact_word_for_notes_string(word.notes_string)
+            self.assertEqual(found, WORDS_BY_NOTES_STRING[word.notes_string])
+            self.assertEqual(found.notes_string, word.notes_string)
+        self.assertIsNone(find_exact_word_for_notes_string("0:9:9:9:9"))
+
+    def test_closest_words(self):
+        # moku is 0:-5_:-1:2
+        for notes_string, score in [
+            ("0:-5_:-1:3", 1),
+            ("0:-5:-1:2", 1),
+            ("0:-5_:-1:2:2", 2),
+            ("0:-5_:-1:-1:2", 2),
+        ]:
+            words, _, found_score = score_closest_words_for_notes_string(notes_string)
+            self.assertEqual([w.name for w in words], ["moku"])
+            self.assertEqual(found_score, score)
+
+        # eureka as a direct object has 9 notes
+        words, _, score = score_closest_words_for_notes_string("0:0:-1:-4:-10:-11:-3:1:6")
+        self.assertEqual([w.name for w in words], ["eureka"])
+        self.assertEqual(words[0].get_notes_string(), "0:0:-1:-4:-10:-11:-3:1:5")
+        self.assertEqual(score, 1)
+        words, _, score = score_closest_words_for_notes_string("0:-1:-4:-10:-3:1:5")
+        self.assertEqual([w.name for w in words], ["eureka"])
+        self.assertEqual(score, 2)
+
+    def test_first_note_off_root(self):
+        # a first note that's 1 off is still the root, but 11 isn't
+        words, _, score = score_closest_words_for_notes_string("1:-5_:-1:2")
+        self.assertEqual(([w.name for w in words], score), (["moku"], 0))
+        words, _, score = score_closest_words_for_notes_string("-1:-5_:-1:2")
+        self.assertEqual(([w.name for w in words], score), (["moku"], 0))
+        self.assertIsNone(score_closest_words_for_notes_string("11:-5_:-1:2"))
+        self.assertIsNone(score_closest_words_for_notes_string("-11:-5_:-1:2"))
+
+        # only the root starts a word
+        self.assertIsNone(find_exact_word_for_notes_string("3:-5_:-1:2"))
+        self.assertIsNone(find_exact_word_for_notes_string("1:-5_:-1:2"))
+
+    def test_augmented_second_zero(self):
+        with self.assertRaises(InvalidWordException):
+            get_stem_and_modifiers_of_notes_string("0:0_:-5_:-1:2")
+        self.assertIsNone(find_exact_word_for_notes_string("0:0_:-5_:-1:2"))
+        # which is close to moku as a direct object
+        words, _, score = score_closest_words_for_notes_string("0:0_:-5_:-1:2")
+        self.assertEqual(words[0].get_notes_string(), "0:0:-5_:-1:2")
+        self.assertEqual(score, 1)
+
+
+class TestWordBoundaries(unittest.TestCase):
+    def test_decode_word_boundaries(self):
+        # kili moku, with a pause within kili that's a bit too long
+        notes = NoteArray(
+            [0, 2, 5, 3, 0, -5, -1, 2],
+            [80] * 8,
+            [0, 0, 0, 0, 0, Augmentation.LONG, 0, 0],
+            [True, False, True, False, True, False, False, False],
+        )
+        pause_lengths = np.array([20, 36, 20, 100, 20, 20, 20])
+        result = decode_word_boundaries(notes, pause_lengths, 30)
+        self.assertEqual(turn_into_notes_strings(notes[:4]), ["0:2", "5:3"])
+        self.assertEqual(np.flatnonzero(result).tolist(), [0, 4])
+
+        # a pause far above the threshold is a word boundary anyway
+        pause_lengths[1] = 100
+        result = decode_word_boundaries(notes, pause_lengths, 30)
+        self.assertEqual(np.flatnonzero(result).tolist(), [0, 2, 4])
+
+        # jan pona, with a pause between them that's a bit too short
+        notes = NoteArray([0, 5, 0, 4], [80] * 4, [0] * 4, [True, False, False, False])
+        result = decode_word_boundaries(notes, np.array([20, 25, 20]), 30)
+        self.assertEqual(np.flatnonzero(result).tolist(), [0, 2])
+
+
+class TestAnalysis(unittest.TestCase):
+    def test_synthesised_sentence(self):
+        words = get_words_from_sentence("mi wile moku .kili")
+        recording = marginify_wave(get_sentence_wave(words))
+        notes, segment_bounds, new_word_flags, offset, _, pitch_track = (
+            analyse_recording_to_notes(recording, 44100)
+        )
+        self.assertEqual(
+            turn_into_notes_strings(notes), [w.get_notes_string() for w in words]
+        )
+        self.assertEqual(len(segment_bounds), len(new_word_flags))
+        self.assertAlmostEqual(offset, 0, places=1)
+        self.assertEqual(len(pitch_track.times), len(pitch_track.freqs))
+        np.testing.assert_array_equal(
+            np.isnan(pitch_track.float_pitches), ~pitch_track.voiced
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,34 @@
+import json
+import unittest
+
+from src.augmentation import Augmentation, Modifier
+from src.words_functions import get_words_from_sentence
+
+
+class TestModifiers(unittest.TestCase):
+    def test_modifiers(self):
+        word = get_words_from_sentence("moku")[0]
+        modified = word.pluralize().questionify()
+        self.assertEqual(modified.modifiers, Modifier.PLURAL | Modifier.QUESTION)
+        self.assertTrue(modified.plural and modified.question)
+        self.assertFalse(word.is_modified())
+        self.assertEqual(
+            modified.get_notes_string(),
+            word.get_notes_string()
+            + Augmentation.LONG.symbol
+            + Augmentation.SLIDE_UP.symbol,
+        )
+
+        modified.plural = False
+        self.assertEqual(modified.modifiers, Modifier.QUESTION)
+        self.assertEqual(modified, word.questionify())
+        self.assertEqual(len({modified, word.questionify(), word}), 2)
+
+        data = json.loads(modified.to_json())
+        self.assertNotIn("modifiers", data)
+        self.assertEqual((data["plural"], data["question"]), (False, True))
+        self.assertEqual(type(word).from_json(modified.to_json()), modified)
+
+
+if __name__ == "__main__":
+    unittest.main()